@@ -0,0 +1,107 @@
+"""
+Compare the mkvmerge cut + concat export with the direct inpoint/outpoint export
+
+Both modes render the same segments with the same encoder profile. For each
+mode the script reports the wall time, the bytes written to storage by all
+child processes (from getrusage, so it includes the intermediate segments)
+and the peak size of the scratch directory.
+
+Usage:
+    python benchmarks/bench_direct_concat.py [--segments 20] [--duration 600] [--profile x264-veryfast]
+"""
+import argparse
+import os
+import resource
+import shutil
+import tempfile
+import threading
+
+from common import evenly_spaced_segments, generate_source, timed
+
+from ui.job_spec import MuxJob, SourceSpec, SegmentSpec, EncoderSettings
+from ui.video_muxer import VideoMuxer
+
+MODES = ('reencode', 'direct')
+
+
+def directory_size(path):
+    """Total size of the files below path"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def run_mode(export_mode, source, ranges, profile, work_dir):
+    """
+    Render the segments with one export mode
+
+    Returns:
+        (elapsed_seconds, bytes_written, peak_scratch_bytes, output_bytes)
+    """
+    scratch = tempfile.mkdtemp(prefix=f'scratch_{export_mode}_', dir=work_dir)
+    output = os.path.join(work_dir, f'{export_mode}.mkv')
+    job = MuxJob(sources=[SourceSpec(source, [SegmentSpec(start, end) for start, end in ranges])],
+                 output_path=output, encoder=EncoderSettings.from_profile(profile),
+                 export_mode=export_mode, profile=profile)
+
+    # The muxer creates its temp directory through tempfile; point it at our scratch dir
+    peak = {'bytes': 0}
+    stop = threading.Event()
+
+    def watch():
+        while not stop.wait(0.05):
+            peak['bytes'] = max(peak['bytes'], directory_size(scratch))
+
+    watcher = threading.Thread(target=watch, daemon=True)
+    old_tempdir = tempfile.tempdir
+    tempfile.tempdir = scratch
+    blocks_before = resource.getrusage(resource.RUSAGE_CHILDREN).ru_oublock
+    watcher.start()
+    try:
+        elapsed, _ = timed(VideoMuxer().process_job, job)
+    finally:
+        stop.set()
+        watcher.join()
+        tempfile.tempdir = old_tempdir
+
+    # ru_oublock counts 512-byte blocks written by waited-for children
+    written = (resource.getrusage(resource.RUSAGE_CHILDREN).ru_oublock - blocks_before) * 512
+    output_bytes = os.path.getsize(output)
+    os.remove(output)
+    shutil.rmtree(scratch, ignore_errors=True)
+    return elapsed, written, peak['bytes'], output_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--segments', type=int, default=20, help='Number of segments to export')
+    parser.add_argument('--duration', type=int, default=600, help='Source duration in seconds')
+    parser.add_argument('--size', default='1280x720', help='Source resolution')
+    parser.add_argument('--profile', default='x264-veryfast', help='Encoder profile for both modes')
+    parser.add_argument('--source', help='Use an existing source instead of generating one')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='bench_direct_')
+    try:
+        source = args.source or generate_source(os.path.join(work_dir, 'source.mkv'),
+                                                duration=args.duration, size=args.size)
+        ranges = evenly_spaced_segments(args.duration, args.segments)
+        selected = sum(end - start for start, end in ranges)
+
+        print(f"Source: {source}, {len(ranges)} segments, {selected}s selected")
+        print(f"{'mode':>10}  {'time':>8}  {'written':>10}  {'peak scratch':>12}  {'output':>10}")
+        for export_mode in MODES:
+            elapsed, written, peak, output_bytes = run_mode(export_mode, source, ranges, args.profile, work_dir)
+            print(f"{export_mode:>10}  {elapsed:7.2f}s  {written / 1e6:8.1f}MB  {peak / 1e6:10.1f}MB  "
+                  f"{output_bytes / 1e6:8.1f}MB")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Compare mkvmerge cutting modes: one run per segment vs one run per source
+
+Usage:
+    python benchmarks/bench_split_modes.py [--segments 50] [--duration 600] [--workers N]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+
+from common import evenly_spaced_segments, generate_source, timed
+
+from ui.video_muxer import VideoMuxer
+
+
+def run_mode(split_mode, source, ranges, workers):
+    """Cut all ranges from source with the given split mode and return the wall time"""
+    muxer = VideoMuxer(cut_workers=workers, split_mode=split_mode)
+    segments = [(0, source, start, end) for start, end in ranges]
+    temp_dir = tempfile.mkdtemp(prefix=f'bench_{split_mode}_')
+    try:
+        if split_mode == 'per_segment':
+            cut_jobs = muxer._build_per_segment_jobs(segments, temp_dir)
+        else:
+            cut_jobs = muxer._build_per_source_jobs(segments, temp_dir)
+        elapsed, _ = timed(muxer._run_cut_jobs, cut_jobs)
+        outputs = VideoMuxer._ordered_outputs(cut_jobs)
+        created = sum(1 for path in outputs if os.path.exists(path))
+        return elapsed, len(cut_jobs), created
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--segments', type=int, default=50, help='Number of segments to cut')
+    parser.add_argument('--duration', type=int, default=600, help='Source duration in seconds')
+    parser.add_argument('--workers', type=int, default=0, help='Concurrent mkvmerge processes (0 = auto)')
+    parser.add_argument('--source', help='Use an existing source instead of generating one')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='bench_split_')
+    try:
+        source = args.source or generate_source(os.path.join(work_dir, 'source.mkv'), duration=args.duration)
+        ranges = evenly_spaced_segments(args.duration, args.segments)
+
+        print(f"Source: {source}, {len(ranges)} segments")
+        for split_mode in VideoMuxer.SPLIT_MODES:
+            elapsed, runs, created = run_mode(split_mode, source, ranges, args.workers)
+            print(f"{split_mode:>12}: {elapsed:7.2f}s  mkvmerge runs: {runs:3d}  segments: {created}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
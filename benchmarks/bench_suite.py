@@ -0,0 +1,293 @@
+"""
+Reproducible benchmark suite for the cut, concat, encode, thumbnail and probe paths
+
+Generates synthetic sources with ffmpeg lavfi (testsrc2 + sine) for every
+combination of codec, resolution and length, then measures:
+
+    mux        process_job end to end, with the cut and encode phase times
+               and the encoder speed from the job metrics
+    direct     the same render with the direct inpoint/outpoint export mode
+    concat     lossless concat (-c copy) of the cut segments
+    thumbnail  extract_image latency: cold (empty cache), warm from the
+               disk cache and warm from the memory cache
+    probe      media probe latency: ffprobe, warm from the disk cache and
+               warm from the memory cache
+
+Results are written as JSON. With --baseline, every metric is compared to a
+saved result and the exit code is 1 if any metric regressed by more than
+--threshold percent.
+
+Usage:
+    python benchmarks/bench_suite.py --quick --output results.json
+    python benchmarks/bench_suite.py --output new.json --baseline results.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+from common import evenly_spaced_segments, generate_source, timed
+
+# Thumbnail caches must start empty; keep them out of the user's cache
+os.environ['XDG_CACHE_HOME'] = tempfile.mkdtemp(prefix='bench_cache_')
+
+from ui.job_spec import MuxJob, SourceSpec, SegmentSpec, EncoderSettings
+from ui.media_probe import MediaProbe
+from ui.thumbnail_cache import ThumbnailCache
+from ui.thumbnail_extractor import ThumbnailExtractor
+from ui.video_muxer import VideoMuxer
+
+FULL_MATRIX = {
+    'codecs': ['libx264', 'libx265'],
+    'sizes': ['640x360', '1280x720'],
+    'durations': [60, 300],
+    'segments': [1, 10, 50],
+}
+QUICK_MATRIX = {
+    'codecs': ['libx264'],
+    'sizes': ['640x360'],
+    'durations': [60],
+    'segments': [1, 10],
+}
+
+# Metrics where a larger value is better; everything else is a time
+HIGHER_IS_BETTER = {'encode_speed'}
+
+
+def median(values):
+    return round(statistics.median(values), 4) if values else None
+
+
+def bench_mux(source, ranges, profile, workers, repeat, work_dir, export_mode='reencode'):
+    """Render the segments end to end and collect phase times from the job metrics"""
+    samples = {'total_s': [], 'cut_s': [], 'encode_s': [], 'pipeline_s': [], 'encode_speed': []}
+    for run in range(repeat):
+        output = os.path.join(work_dir, f'mux_{run}.mkv')
+        job = MuxJob(sources=[SourceSpec(source, [SegmentSpec(start, end) for start, end in ranges])],
+                     output_path=output, encoder=EncoderSettings.from_profile(profile),
+                     export_mode=export_mode, profile=profile)
+        muxer = VideoMuxer(cut_workers=workers)
+        elapsed, _ = timed(muxer.process_job, job)
+        samples['total_s'].append(elapsed)
+        samples['cut_s'].append(muxer.metrics['phases'].get('cut', 0))
+        samples['encode_s'].append(muxer.metrics['phases'].get('encode', 0))
+        # Overlapped cut + encode when the pipelined encoder was used
+        samples['pipeline_s'].append(muxer.metrics['phases'].get('pipeline', 0))
+        samples['encode_speed'].append(muxer.metrics.get('encode', {}).get('speed', 0))
+        os.remove(output)
+    return {name: median(values) for name, values in samples.items()}
+
+
+def bench_concat(source, ranges, workers, repeat, work_dir):
+    """Cut the segments once, then time a lossless concat of them"""
+    muxer = VideoMuxer(cut_workers=workers)
+    cut_dir = tempfile.mkdtemp(dir=work_dir)
+    try:
+        cut_jobs = muxer._build_per_source_jobs([(0, source, start, end) for start, end in ranges], cut_dir)
+        muxer._run_cut_jobs(cut_jobs)
+        concat_file = os.path.join(cut_dir, 'concat.txt')
+        with open(concat_file, 'w') as f:
+            for seg_file in VideoMuxer._ordered_outputs(cut_jobs):
+                f.write(f"file '{seg_file}'\n")
+
+        output = os.path.join(cut_dir, 'joined.mkv')
+        cmd = ['ffmpeg', '-v', 'error', '-f', 'concat', '-safe', '0', '-i', concat_file,
+               '-c', 'copy', '-y', output]
+        times = []
+        for _ in range(repeat):
+            elapsed, result = timed(subprocess.run, cmd, capture_output=True, text=True)
+            if result.returncode != 0:
+                raise Exception(f"concat failed: {result.stderr}")
+            times.append(elapsed)
+        return {'concat_copy_s': median(times)}
+    finally:
+        shutil.rmtree(cut_dir, ignore_errors=True)
+
+
+def bench_thumbnails(source, duration, count):
+    """Thumbnail latency with an empty cache, a disk-only cache and a memory cache"""
+    timestamps = [int(duration * (idx + 0.5) / count) for idx in range(count)]
+    timestamp_strs = [f"{t // 3600}:{t % 3600 // 60:02d}:{t % 60:02d}" for t in timestamps]
+
+    def run():
+        latencies = []
+        for timestamp_str in timestamp_strs:
+            elapsed, img = timed(ThumbnailExtractor.extract_image, source, timestamp_str)
+            if img is None:
+                raise Exception(f"No thumbnail at {timestamp_str}")
+            latencies.append(elapsed * 1000)
+        return median(latencies)
+
+    shutil.rmtree(ThumbnailCache.shared().cache_dir, ignore_errors=True)
+    ThumbnailCache._shared = None
+    cold = run()
+    # A fresh instance has an empty memory cache but finds the PNGs on disk
+    ThumbnailCache._shared = None
+    warm_disk = run()
+    warm_memory = run()
+    return {'thumb_cold_ms': cold, 'thumb_warm_disk_ms': warm_disk, 'thumb_warm_memory_ms': warm_memory}
+
+
+def bench_probe(source, repeat):
+    """Latency of the metadata probe: one ffprobe run, the disk cache and the memory cache"""
+    cold, warm_disk, warm_memory = [], [], []
+    for _ in range(repeat):
+        elapsed, info = timed(MediaProbe.run_ffprobe, source)
+        if info.duration <= 0:
+            raise Exception(f"Could not probe {source}")
+        cold.append(elapsed * 1000)
+
+        # A fresh memory cache finds the JSON on disk
+        MediaProbe._results.clear()
+        MediaProbe.probe(source)
+        MediaProbe._results.clear()
+        elapsed, _ = timed(MediaProbe.probe, source)
+        warm_disk.append(elapsed * 1000)
+        elapsed, _ = timed(MediaProbe.probe, source)
+        warm_memory.append(elapsed * 1000)
+    return {'probe_ms': median(cold), 'probe_warm_disk_ms': median(warm_disk),
+            'probe_warm_memory_ms': median(warm_memory)}
+
+
+def run_suite(args, matrix):
+    """Run every benchmark over the matrix and return the result document"""
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix='bench_suite_')
+    os.makedirs(work_dir, exist_ok=True)
+    results = {}
+    try:
+        for codec in matrix['codecs']:
+            for size in matrix['sizes']:
+                for duration in matrix['durations']:
+                    source_name = f'{codec}_{size}_{duration}s'
+                    source = generate_source(os.path.join(work_dir, f'{source_name}.mkv'),
+                                             duration=duration, size=size, video_codec=codec)
+                    print(f"== {source_name}", flush=True)
+
+                    results[f'thumbnail/{source_name}'] = bench_thumbnails(source, duration, args.thumbnails)
+                    results[f'probe/{source_name}'] = bench_probe(source, args.repeat)
+
+                    for count in matrix['segments']:
+                        ranges = evenly_spaced_segments(duration, count)
+                        case = f'{source_name}/{count}seg'
+                        results[f'mux/{case}'] = bench_mux(source, ranges, args.profile, args.workers,
+                                                           args.repeat, work_dir)
+                        results[f'direct/{case}'] = bench_mux(source, ranges, args.profile, args.workers,
+                                                              args.repeat, work_dir, export_mode='direct')
+                        results[f'concat/{case}'] = bench_concat(source, ranges, args.workers,
+                                                                 args.repeat, work_dir)
+                        print(f"   {count:3d} segments: {results[f'mux/{case}']}", flush=True)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        shutil.rmtree(os.environ['XDG_CACHE_HOME'], ignore_errors=True)
+
+    return {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'host': platform.node(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'python': sys.version.split()[0],
+            'ffmpeg': ffmpeg_version(),
+            'profile': args.profile,
+            'repeat': args.repeat,
+            'matrix': matrix,
+        },
+        'results': results,
+    }
+
+
+def ffmpeg_version():
+    """First line of `ffmpeg -version`"""
+    try:
+        result = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True)
+        return result.stdout.splitlines()[0] if result.stdout else None
+    except OSError:
+        return None
+
+
+def compare(current, baseline, threshold):
+    """
+    Compare two result documents metric by metric
+
+    Returns:
+        (lines, regressions) where lines is a printable report and
+        regressions the number of metrics worse than the threshold
+    """
+    lines = [f"{'case':<48}{'metric':<22}{'baseline':>11}{'current':>11}{'change':>9}"]
+    regressions = 0
+    for case, metrics in sorted(current['results'].items()):
+        base_metrics = baseline['results'].get(case)
+        if base_metrics is None:
+            continue
+        for metric, value in sorted(metrics.items()):
+            base = base_metrics.get(metric)
+            if not base or value is None:
+                continue
+            change = (value - base) / base * 100
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            flag = ''
+            if worse > threshold:
+                flag = '  REGRESSION'
+                regressions += 1
+            elif worse < -threshold:
+                flag = '  improved'
+            lines.append(f"{case:<48}{metric:<22}{base:>11.4g}{value:>11.4g}{change:>+8.1f}%{flag}")
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--quick', action='store_true', help='Small matrix for a fast smoke run')
+    parser.add_argument('--codecs', help='Comma-separated source codecs (e.g. libx264,libx265)')
+    parser.add_argument('--sizes', help='Comma-separated resolutions (e.g. 640x360,1920x1080)')
+    parser.add_argument('--durations', help='Comma-separated source lengths in seconds')
+    parser.add_argument('--segments', help='Comma-separated segment counts')
+    parser.add_argument('--profile', default='x264-veryfast', help='Encoder profile for the mux benchmark')
+    parser.add_argument('--workers', type=int, default=0, help='Concurrent mkvmerge processes (0 = auto)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement (the median is kept)')
+    parser.add_argument('--thumbnails', type=int, default=10, help='Thumbnails per source')
+    parser.add_argument('--work-dir', help='Keep generated sources here and reuse them across runs')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--baseline', help='Compare against a previously saved result file')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='Percent change that counts as a regression')
+    args = parser.parse_args()
+
+    matrix = dict(QUICK_MATRIX if args.quick else FULL_MATRIX)
+    if args.codecs:
+        matrix['codecs'] = args.codecs.split(',')
+    if args.sizes:
+        matrix['sizes'] = args.sizes.split(',')
+    if args.durations:
+        matrix['durations'] = [int(value) for value in args.durations.split(',')]
+    if args.segments:
+        matrix['segments'] = [int(value) for value in args.segments.split(',')]
+
+    current = run_suite(args, matrix)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=4)
+        print(f"Results written to {args.output}")
+    else:
+        print(json.dumps(current, indent=4))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        lines, regressions = compare(current, baseline, args.threshold)
+        print('\n'.join(lines))
+        print(f"{regressions} regression(s) over {args.threshold:g}%")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+Compare thumbnail extraction via a temporary JPEG file vs a raw RGB pipe
+
+Measures per-thumbnail latency and, when strace is installed, the number of
+system calls made by Python and ffmpeg together for each path.
+
+Usage:
+    python benchmarks/bench_thumbnail_pipe.py [--count 20] [--source FILE]
+"""
+import argparse
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from common import generate_source, timed
+
+from PIL import Image
+
+from ui.thumbnail_extractor import ThumbnailExtractor
+
+WIDTH = 120
+HEIGHT = 68
+
+
+def extract_via_tempfile(video_path, seconds):
+    """The previous extraction path: ffmpeg writes a JPEG, PIL reads it back"""
+    with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as tmp_file:
+        tmp_path = tmp_file.name
+    try:
+        cmd = ['ffmpeg', '-ss', str(seconds), '-i', video_path, '-frames:v', '1',
+               '-s', f'{WIDTH}x{HEIGHT}', '-q:v', '2', '-y', tmp_path]
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=5)
+        if result.returncode != 0 or os.path.getsize(tmp_path) == 0:
+            return None
+        img = Image.open(tmp_path)
+        img.load()
+        return img
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def extract_via_pipe(video_path, seconds):
+    """The current extraction path: raw RGB frame over stdout"""
+    return ThumbnailExtractor._decode_frame_ffmpeg(video_path, seconds, WIDTH, HEIGHT)
+
+
+PATHS = {
+    'tempfile': extract_via_tempfile,
+    'pipe': extract_via_pipe,
+}
+
+
+def run_path(name, source, timestamps):
+    """Extract every timestamp with one path and return the latencies"""
+    extract = PATHS[name]
+    latencies = []
+    for seconds in timestamps:
+        elapsed, img = timed(extract, source, seconds)
+        if img is None:
+            raise Exception(f"{name}: no frame at {seconds}s")
+        latencies.append(elapsed * 1000)
+    return latencies
+
+
+def count_syscalls(name, source, count, duration):
+    """Run one path under strace -f -c and return the total number of syscalls"""
+    if not shutil.which('strace'):
+        return None
+
+    with tempfile.NamedTemporaryFile(suffix='.txt', delete=False) as tmp_file:
+        summary_path = tmp_file.name
+    try:
+        cmd = ['strace', '-f', '-c', '-o', summary_path, sys.executable, os.path.abspath(__file__),
+               '--only', name, '--source', source, '--count', str(count), '--duration', str(duration)]
+        subprocess.run(cmd, capture_output=True, text=True)
+        with open(summary_path) as f:
+            for line in f:
+                match = re.match(r'^100\.00\s+\S+\s+(?:\S+\s+)?(\d+)\s+(\d+)?\s*total', line.strip())
+                if match:
+                    return int(match.group(1))
+        return None
+    finally:
+        os.unlink(summary_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=20, help='Thumbnails to extract per path')
+    parser.add_argument('--duration', type=int, default=120, help='Generated source duration in seconds')
+    parser.add_argument('--source', help='Use an existing source instead of generating one')
+    parser.add_argument('--only', choices=sorted(PATHS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    timestamps = [int(args.duration * (i + 0.5) / args.count) for i in range(args.count)]
+
+    if args.only:
+        # Child mode used by the strace measurement
+        run_path(args.only, args.source, timestamps)
+        return
+
+    work_dir = tempfile.mkdtemp(prefix='bench_thumb_')
+    try:
+        source = args.source or generate_source(os.path.join(work_dir, 'source.mkv'), duration=args.duration)
+        print(f"Source: {source}, {args.count} thumbnails of {WIDTH}x{HEIGHT}")
+        for name in PATHS:
+            latencies = run_path(name, source, timestamps)
+            syscalls = count_syscalls(name, source, args.count, args.duration)
+            syscall_text = f"{syscalls / args.count:8.0f}" if syscalls else "     n/a"
+            print(f"{name:>9}: median {statistics.median(latencies):7.1f} ms  "
+                  f"mean {statistics.mean(latencies):7.1f} ms  syscalls/thumb {syscall_text}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
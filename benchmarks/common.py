@@ -0,0 +1,70 @@
+"""Shared helpers for the benchmark scripts"""
+import os
+import subprocess
+import sys
+import time
+
+# Add parent directory to path to import the application modules
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+
+def generate_source(path, duration=600, size='640x360', rate=25, video_codec='libx264', gop=50):
+    """
+    Generate a synthetic test source with ffmpeg's lavfi test patterns
+
+    Args:
+        path: Output file path (the container is picked from the extension)
+        duration: Length in seconds
+        size: Frame size as WxH
+        rate: Frame rate
+        video_codec: ffmpeg video encoder to use
+        gop: Keyframe interval in frames
+
+    Returns:
+        The output path
+    """
+    if os.path.exists(path):
+        return path
+
+    cmd = [
+        'ffmpeg', '-v', 'error',
+        '-f', 'lavfi', '-i', f'testsrc2=size={size}:rate={rate}:duration={duration}',
+        '-f', 'lavfi', '-i', f'sine=frequency=440:sample_rate=48000:duration={duration}',
+        '-c:v', video_codec, '-preset', 'ultrafast', '-g', str(gop),
+        '-c:a', 'aac',
+        '-shortest', '-y', path
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise Exception(f"Could not generate test source: {result.stderr}")
+    return path
+
+
+def evenly_spaced_segments(duration, count, fill=0.5):
+    """
+    Build count segments spread evenly over a source
+
+    Args:
+        duration: Source duration in seconds
+        count: Number of segments
+        fill: Fraction of each slot covered by its segment
+
+    Returns:
+        List of (start_seconds, end_seconds) tuples
+    """
+    slot = duration / count
+    length = max(1, int(slot * fill))
+    return [(int(i * slot), int(i * slot) + length) for i in range(count)]
+
+
+def timed(func, *args, **kwargs):
+    """
+    Call func and measure its wall time
+
+    Returns:
+        (elapsed_seconds, result)
+    """
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
@@ -0,0 +1,271 @@
+"""
+Headless command line interface for tk_video_muxer
+
+Runs mux jobs described in JSON/YAML job files without importing Tk, so it
+works on render nodes without a display.
+
+Usage:
+    python cli.py run job.json [job2.yaml ...] [--summary results.json]
+    python cli.py batch jobs/ [--concurrency 2] [--summary results.json]
+    python cli.py run job.json --dry-run
+    python cli.py calibrate source.mkv [--target-speed 1.5] [--apply]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from config_manager import ConfigManager
+from ui.encoder_calibration import EncoderCalibrator
+from ui.encoder_profiles import DEFAULT_PROFILE, PROFILES
+from ui.job_spec import MuxJob, EncoderSettings
+from ui.scratch_manager import ScratchManager
+from ui.segment_planner import SegmentPlanner
+from ui.video_muxer import VideoMuxer
+
+JOB_EXTENSIONS = ('.json', '.yaml', '.yml')
+
+_print_lock = threading.Lock()
+
+
+def log(message):
+    """Print a line without interleaving output from concurrent jobs"""
+    with _print_lock:
+        print(message, flush=True)
+
+
+def make_progress_printer(job_name):
+    """
+    Build a progress callback that prints a line whenever the phase changes
+    or the value advances by at least 5%
+
+    The phase is the text before "...", so live encoder stats after it
+    (speed, fps, ETA) don't cause a line per update.
+    """
+    last = {'value': -100, 'phase': None}
+
+    def progress(value, text):
+        phase = text.split('...')[0]
+        if phase != last['phase'] or value - last['value'] >= 5 or value < last['value']:
+            last['value'] = value
+            last['phase'] = phase
+            log(f"[{job_name}] {value:3d}% {text}")
+
+    return progress
+
+
+def run_job(job_file, args, config):
+    """
+    Load and render one job file
+
+    Returns:
+        Result dict for the summary
+    """
+    started = time.time()
+    result = {
+        'job_file': os.path.abspath(job_file),
+        'name': os.path.splitext(os.path.basename(job_file))[0],
+        'started_at': datetime.now(timezone.utc).isoformat(),
+    }
+
+    try:
+        # Jobs without a profile use the configured default (e.g. saved by calibrate --apply)
+        default_profile = config.get('encoder_profile') or DEFAULT_PROFILE
+        job = MuxJob.load(job_file, default_profile)
+        if args.profile:
+            job.encoder = EncoderSettings.from_profile(args.profile)
+            job.profile = args.profile
+        elif not job.profile:
+            job.profile = default_profile
+        result['name'] = job.name
+        result['profile'] = job.profile
+        result['output_path'] = job.output_path
+        result['duration_seconds'] = job.total_duration()
+
+        muxer = VideoMuxer(
+            progress_callback=make_progress_printer(job.name),
+            cut_workers=args.cut_workers if args.cut_workers is not None else config.get('cut_workers', 0),
+            split_mode=args.split_mode or config.get('split_mode', 'per_source'),
+            encode_chunks=args.encode_chunks or config.get('encode_chunks', 1),
+            chunk_threads=args.chunk_threads or config.get('chunk_threads', 0),
+            core_budget=job_core_budget(args, config),
+            background=args.background or config.get('background_render', False),
+            metrics_dir=args.metrics_dir or config.get('metrics_dir', ''),
+            scratch_dirs=args.scratch_dir or config.get('scratch_dirs', []),
+            segment_cache_bytes=config.get('segment_cache_bytes'),
+            pipeline_lookahead=(args.pipeline_lookahead if args.pipeline_lookahead is not None
+                                else config.get('pipeline_lookahead', 0)),
+            split_streams=args.split_streams or config.get('split_streams', False),
+            merge_segments=args.merge_segments or config.get('merge_segments', 'none'),
+        )
+        if args.dry_run:
+            plan = muxer.plan_job(job)
+            result['plan'] = plan.to_dict()
+            for line in plan.summary().splitlines():
+                log(f"[{job.name}] {line}")
+            plan.check()
+        else:
+            try:
+                muxer.process_job(job)
+            finally:
+                result['metrics'] = muxer.metrics
+        result['status'] = 'ok'
+    except Exception as e:
+        result['status'] = 'failed'
+        result['error'] = str(e)
+        log(f"[{result['name']}] FAILED: {e}")
+
+    result['elapsed_seconds'] = round(time.time() - started, 3)
+    return result
+
+
+def job_core_budget(args, config):
+    """Split the total core budget evenly between the concurrent jobs"""
+    total = args.cores if args.cores is not None else config.get('render_cores', 0)
+    if not total:
+        return None
+    return max(1, total // max(1, args.concurrency))
+
+
+def run_jobs(job_files, args):
+    """Run job files with the configured concurrency and write the summary"""
+    config = ConfigManager()
+    concurrency = max(1, args.concurrency)
+    # Remove intermediates left behind by crashed runs
+    ScratchManager(args.scratch_dir or config.get('scratch_dirs', [])).sweep()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda job_file: run_job(job_file, args, config), job_files))
+
+    failed = [result for result in results if result['status'] != 'ok']
+    summary = {
+        'finished_at': datetime.now(timezone.utc).isoformat(),
+        'jobs': len(results),
+        'succeeded': len(results) - len(failed),
+        'failed': len(failed),
+        'results': results,
+    }
+
+    if args.summary:
+        with open(args.summary, 'w') as f:
+            json.dump(summary, f, indent=4)
+        log(f"Summary written to {args.summary}")
+    else:
+        log(json.dumps(summary, indent=4))
+
+    return 1 if failed else 0
+
+
+def calibrate(args):
+    """Measure encoder profiles on a source and recommend (or apply) one"""
+    profiles = args.profiles.split(',') if args.profiles else None
+    calibrator = EncoderCalibrator(sample_seconds=args.sample, core_budget=args.cores or None)
+    measurements, recommended = calibrator.calibrate(
+        args.source, profiles, args.target_speed, make_progress_printer('calibrate'))
+
+    log(f"{'profile':<16}{'fps':>8}{'speed':>8}{'kbit/s':>10}")
+    for measurement in measurements:
+        if measurement.error:
+            log(f"{measurement.profile:<16}  failed: {measurement.error.splitlines()[-1]}")
+        else:
+            log(f"{measurement.profile:<16}{measurement.fps:>8.1f}{measurement.speed:>7.2f}x"
+                f"{measurement.bitrate_kbps:>10.0f}")
+
+    if recommended is None:
+        log("No profile could encode the sample")
+        return 1
+
+    meets = any(m.profile == recommended and m.speed >= args.target_speed for m in measurements)
+    log(f"Recommended profile: {recommended}"
+        + ("" if meets else f" (no profile reached {args.target_speed}x realtime; fastest shown)"))
+
+    if args.summary:
+        with open(args.summary, 'w') as f:
+            json.dump({'source': os.path.abspath(args.source), 'target_speed': args.target_speed,
+                       'recommended': recommended,
+                       'measurements': [m.to_dict() for m in measurements]}, f, indent=4)
+        log(f"Summary written to {args.summary}")
+
+    if args.apply:
+        ConfigManager().set('encoder_profile', recommended)
+        log(f"Saved {recommended} as the default encoder profile")
+    return 0
+
+
+def find_job_files(directory):
+    """List the job files in a directory, sorted by name"""
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.endswith(JOB_EXTENSIONS))
+
+
+def add_muxer_options(parser):
+    """Options shared by all subcommands that render jobs"""
+    parser.add_argument('--summary', help='Write a JSON result summary to this file')
+    parser.add_argument('--profile', choices=list(PROFILES), help='Encoder profile for every job')
+    parser.add_argument('--cut-workers', type=int, help='Concurrent mkvmerge processes per job (0 = auto)')
+    parser.add_argument('--split-mode', choices=VideoMuxer.SPLIT_MODES, help='mkvmerge cutting mode')
+    parser.add_argument('--encode-chunks', type=int, help='Parallel keyframe-aligned encode chunks per job')
+    parser.add_argument('--chunk-threads', type=int, help='x265 threads per encode chunk (0 = auto)')
+    parser.add_argument('--pipeline-lookahead', type=int,
+                        help='Cut segments one by one, this many ahead of the encoder (0 = off, cut with --split-mode first)')
+    parser.add_argument('--split-streams', action='store_true',
+                        help='Encode video and each audio track in separate processes and mux at the end')
+    parser.add_argument('--merge-segments', choices=SegmentPlanner.MERGE_MODES,
+                        help='Merge consecutive ranges of a source that touch (adjacent) or also overlap')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Validate and plan the jobs, print the processes, bytes and time, render nothing')
+    parser.add_argument('--cores', type=int,
+                        help='CPU cores shared by all concurrent jobs (0 = no limit)')
+    parser.add_argument('--scratch-dir', action='append',
+                        help='Preferred directory for intermediate files (repeatable, fastest first)')
+    parser.add_argument('--metrics-dir', help='Write a JSON metrics record per job to this directory')
+    parser.add_argument('--background', action='store_true',
+                        help='Run renders at reduced CPU and I/O priority (nice/ionice)')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='Run one or more job files')
+    run_parser.add_argument('jobs', nargs='+', help='Job files (.json, .yaml, .yml)')
+    run_parser.add_argument('--concurrency', type=int, default=1, help='Jobs to run at the same time')
+    add_muxer_options(run_parser)
+
+    batch_parser = subparsers.add_parser('batch', help='Run every job file in a directory')
+    batch_parser.add_argument('directory', help='Directory containing job files')
+    batch_parser.add_argument('--concurrency', type=int, default=1, help='Jobs to run at the same time')
+    add_muxer_options(batch_parser)
+
+    calibrate_parser = subparsers.add_parser('calibrate', help='Benchmark encoder profiles on a source')
+    calibrate_parser.add_argument('source', help='Video to take the sample from')
+    calibrate_parser.add_argument('--target-speed', type=float, default=1.5,
+                                  help='Minimum encode speed as a multiple of realtime')
+    calibrate_parser.add_argument('--sample', type=float, default=10, help='Sample length in seconds')
+    calibrate_parser.add_argument('--profiles', help='Comma-separated profiles to try (default: all)')
+    calibrate_parser.add_argument('--cores', type=int, help='Thread limit for the encoder (0 = all)')
+    calibrate_parser.add_argument('--summary', help='Write the measurements to this JSON file')
+    calibrate_parser.add_argument('--apply', action='store_true',
+                                  help='Save the recommended profile as the default in the config')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'calibrate':
+        return calibrate(args)
+    if args.command == 'run':
+        job_files = args.jobs
+    else:
+        job_files = find_job_files(args.directory)
+        if not job_files:
+            log(f"No job files found in {args.directory}")
+            return 1
+
+    return run_jobs(job_files, args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -30,7 +30,24 @@ class ConfigManager:
     def _get_default_config(self):
         """Get default configuration"""
         return {
-            "input_folder_path": ""
+            "input_folder_path": "",
+            "cut_workers": 0,  # 0 = choose automatically from CPU count
+            "split_mode": "per_source",
+            "export_mode": "reencode",
+            "encoder_profile": "x265-medium",  # see ui/encoder_profiles.py
+            "encode_chunks": 1,  # >1 encodes keyframe-aligned chunks in parallel
+            "chunk_threads": 0,  # 0 = split CPU count evenly between chunks
+            "render_cores": 0,  # core budget shared by queued jobs, 0 = CPU count
+            "max_concurrent_renders": 2,  # one job gets at most render_cores / this
+            "background_render": False,  # run renders under nice/ionice
+            "metrics_dir": "",  # directory for per-job JSON metrics, "" = off
+            "scratch_dirs": [],  # preferred temp locations, fastest first
+            "segment_cache_bytes": 5368709120,  # incremental export cache limit (5 GB)
+            "pipeline_lookahead": 0,  # >0 cuts per segment, this many ahead of the encoder; 0 = off
+            "split_streams": False,  # encode audio tracks in separate processes, mux with mkvmerge
+            "merge_segments": "none",  # none, adjacent or overlapping (see ui/segment_planner.py)
+            "scene_threshold": 0.3,  # minimum change score (0..1) of suggested scene boundaries
+            "scene_sample": "auto"  # auto, keyframes or fps (see ui/scene_detector.py)
         }
     
     def save_config(self):
@@ -0,0 +1,56 @@
+import hashlib
+import os
+
+def get_cache_dir(name):
+    """
+    Get (and create) a cache subdirectory for the application
+    
+    Follows the XDG base directory spec: $XDG_CACHE_HOME/tk_video_muxer/<name>,
+    falling back to ~/.cache/tk_video_muxer/<name>.
+    
+    Args:
+        name: Subdirectory name
+        
+    Returns:
+        Absolute directory path
+    """
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    path = os.path.join(base, 'tk_video_muxer', name)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def file_identity(path):
+    """
+    Identify a source file by path, size and modification time
+    
+    Args:
+        path: File path
+        
+    Returns:
+        (absolute_path, size, mtime_ns) tuple, or None if the file is missing
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+def identity_key(path, *extra):
+    """
+    Build a stable cache key for a source file
+    
+    The key changes whenever the file is replaced or modified, so stale
+    cache entries are simply never looked up again.
+    
+    Args:
+        path: File path
+        *extra: Additional values that distinguish cache entries
+        
+    Returns:
+        Hex digest string, or None if the file is missing
+    """
+    identity = file_identity(path)
+    if identity is None:
+        return None
+    text = '|'.join(str(part) for part in (*identity, *extra))
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
@@ -0,0 +1,170 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_EXCEPTION, wait
+from .keyframe_index import KeyframeIndex
+from .encode_telemetry import EncodeProgress
+
+class ChunkedEncoder:
+    """
+    Encode the concatenated timeline as parallel keyframe-aligned chunks
+
+    x265 stops scaling at around 8-12 threads, so on large machines the
+    timeline is split at keyframes into independent chunks that are encoded
+    by separate ffmpeg processes. Audio is encoded once alongside them and
+    everything is joined losslessly at the end, together with the
+    subtitle and attachment streams of the timeline, giving the same
+    duration and stream layout as the single-process encode.
+    """
+
+    def __init__(self, muxer, chunks, threads_per_chunk):
+        """
+        Initialize the ChunkedEncoder
+
+        Args:
+            muxer: VideoMuxer used to run commands, read encoder settings and report progress
+            chunks: Number of chunks to split the timeline into
+            threads_per_chunk: x265 thread pool size for each chunk
+        """
+        self.muxer = muxer
+        self.chunks = chunks
+        self.threads_per_chunk = threads_per_chunk
+
+        # Latest telemetry per chunk, for the combined progress bar
+        self._chunk_stats = {}
+        self._progress_lock = threading.Lock()
+        self._last_progress = 0
+
+    def encode(self, concat_file, output_path, total_duration, temp_dir):
+        """
+        Encode the timeline described by concat_file to output_path
+
+        Args:
+            concat_file: ffmpeg concat list with the cut segments
+            output_path: Path for the output file
+            total_duration: Timeline duration in seconds
+            temp_dir: Directory for intermediate files
+        """
+        # Join the cut segments losslessly so the timeline has a single timebase
+        joined = os.path.join(temp_dir, 'joined.mkv')
+        self._run_ffmpeg(['ffmpeg', '-v', 'error', '-f', 'concat', '-safe', '0',
+                          '-i', concat_file, '-c', 'copy', '-y', joined])
+
+        # Through the muxer, so a cancel also stops the probe of a long timeline
+        ranges = self.plan_chunks(KeyframeIndex.build(joined, self.muxer).times, total_duration)
+        has_audio = self._has_audio(joined)
+        print(f"Chunked encode: {len(ranges)} chunks, {self.threads_per_chunk} threads each")
+
+        chunk_files = [os.path.join(temp_dir, f'chunk_{idx:03d}.mkv') for idx in range(len(ranges))]
+        audio_file = os.path.join(temp_dir, 'audio.mka')
+        self._chunk_stats = {idx: EncodeProgress() for idx in range(len(ranges))}
+        self._last_progress = 0
+
+        with ThreadPoolExecutor(max_workers=len(ranges) + 1) as executor:
+            futures = [executor.submit(self._encode_chunk, idx, start, end, joined, chunk_files[idx], total_duration)
+                       for idx, (start, end) in enumerate(ranges)]
+            if has_audio:
+                futures.append(executor.submit(self._encode_audio, joined, audio_file))
+
+            done, pending = wait(futures, return_when=FIRST_EXCEPTION)
+            for future in done:
+                error = future.exception()
+                if error is not None:
+                    # Fail fast: kill the sibling encoders
+                    for other in pending:
+                        other.cancel()
+                    self.muxer.kill_active_processes()
+                    raise error
+
+        self.muxer.update_progress(99, "Joining encoded chunks...")
+        chunk_list = os.path.join(temp_dir, 'chunks.txt')
+        with open(chunk_list, 'w') as f:
+            for chunk_file in chunk_files:
+                f.write(f"file {self.muxer.concat_quote(chunk_file)}\n")
+
+        cmd = ['ffmpeg', '-v', 'error', '-f', 'concat', '-safe', '0', '-i', chunk_list]
+        maps = ['-map', '0:v']
+        if has_audio:
+            cmd += ['-i', audio_file]
+            maps += ['-map', '1:a']
+        # Subtitles and attachments aren't re-encoded; take them from the joined timeline
+        timeline_input = 2 if has_audio else 1
+        cmd += ['-i', joined]
+        maps += ['-map', f'{timeline_input}:s?', '-map', f'{timeline_input}:t?']
+        cmd += [*maps, '-c', 'copy', '-y', output_path]
+        self._run_ffmpeg(cmd)
+        self.muxer.metrics['encode'] = EncodeProgress.combine(
+            list(self._chunk_stats.values()), total_duration).to_dict()
+
+    def plan_chunks(self, keyframes, total_duration):
+        """
+        Pick chunk boundaries at the keyframes closest to equal splits
+
+        Args:
+            keyframes: Sorted keyframe times of the joined timeline
+            total_duration: Timeline duration in seconds
+
+        Returns:
+            List of (start, end) tuples; end is None for the last chunk
+        """
+        boundaries = [0.0]
+        for idx in range(1, self.chunks):
+            target = total_duration * idx / self.chunks
+            nearest = min(keyframes, key=lambda t: abs(t - target), default=None)
+            if nearest is not None and nearest > boundaries[-1]:
+                boundaries.append(nearest)
+
+        ranges = []
+        for idx, start in enumerate(boundaries):
+            end = boundaries[idx + 1] if idx + 1 < len(boundaries) else None
+            ranges.append((start, end))
+        return ranges
+
+    def _encode_chunk(self, idx, start, end, joined, chunk_file, total_duration):
+        """Encode the video of one chunk (runs on a worker thread)"""
+        cmd = ['ffmpeg', '-ss', f'{start:.6f}', '-i', joined]
+        if end is not None:
+            cmd += ['-t', f'{end - start:.6f}']
+        cmd += ['-map', '0:v:0', '-an', *self._video_args(), '-y', chunk_file]
+
+        log_path = os.path.splitext(chunk_file)[0] + '.log'
+        self.muxer.run_ffmpeg_with_progress(
+            cmd, (end - start) if end is not None else total_duration - start, log_path,
+            callback=lambda stats: self._report_progress(idx, stats, total_duration))
+
+    def _encode_audio(self, joined, audio_file):
+        """Encode the audio of the whole timeline (runs on a worker thread)"""
+        self._run_ffmpeg(['ffmpeg', '-v', 'error', '-i', joined, '-vn',
+                          *self.muxer.audio_args, '-y', audio_file])
+
+    def _video_args(self):
+        """Get the video encoder arguments limited to this chunk's thread budget"""
+        return self.muxer.thread_limited_video_args(self.muxer.video_args, self.threads_per_chunk)
+
+    def _report_progress(self, idx, stats, total_duration):
+        """Combine the per-chunk telemetry into one progress value"""
+        with self._progress_lock:
+            self._chunk_stats[idx] = stats
+            combined = EncodeProgress.combine(list(self._chunk_stats.values()), total_duration)
+            combined.percent = min(combined.percent, 98)
+            if combined.percent <= self._last_progress:
+                return
+            self._last_progress = combined.percent
+        if self.muxer.stats_callback:
+            self.muxer.stats_callback(combined)
+        summary = combined.summary()
+        self.muxer.update_progress(combined.percent,
+                                   f"Compressing video ({len(self._chunk_stats)} chunks)... {summary}".rstrip())
+
+    def _has_audio(self, path):
+        """Check whether a file has at least one audio stream"""
+        returncode, stdout, _ = self.muxer.run_command([
+            'ffprobe', '-v', 'error', '-select_streams', 'a',
+            '-show_entries', 'stream=index', '-of', 'csv=p=0', path
+        ])
+        return returncode == 0 and stdout.strip() != ''
+
+    def _run_ffmpeg(self, cmd):
+        """Run an ffmpeg command and raise on failure"""
+        returncode, _, stderr = self.muxer.run_command(cmd)
+        if returncode != 0:
+            raise Exception(f"ffmpeg error (cmd: {' '.join(cmd)}): {stderr}")
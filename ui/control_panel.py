@@ -1,7 +1,16 @@
 import tkinter as tk
 from tkinter import messagebox, filedialog, ttk
-from .video_muxer import VideoMuxer
-import threading
+from .render_scheduler import RenderScheduler, RenderJob
+from .ui_dispatcher import UIDispatcher
+from .job_spec import MuxJob
+from .encoder_profiles import DEFAULT_PROFILE
+from .scratch_manager import ScratchManager
+import os
+import sys
+
+# Add parent directory to path to import config_manager
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config_manager import ConfigManager
 
 class ControlPanel:
     """Lower panel containing output controls and progress tracking"""
@@ -16,6 +25,30 @@ class ControlPanel:
         """
         self.get_editors_callback = get_editors_callback
         self.root = parent.winfo_toplevel()  # Get root window for threading
+        self.config = ConfigManager()
+        self.dispatcher = UIDispatcher.for_widget(parent)
+        
+        # Jobs run concurrently within the configured core budget
+        self.scheduler = RenderScheduler(
+            total_cores=self.config.get('render_cores', 0),
+            max_concurrent=self.config.get('max_concurrent_renders', 2),
+            on_update=lambda: self.dispatcher.post('render_queue', self.refresh_queue),
+            muxer_options={
+                'cut_workers': self.config.get('cut_workers', 0),
+                'split_mode': self.config.get('split_mode', 'per_source'),
+                'encode_chunks': self.config.get('encode_chunks', 1),
+                'chunk_threads': self.config.get('chunk_threads', 0),
+                'metrics_dir': self.config.get('metrics_dir', ''),
+                'scratch_dirs': self.config.get('scratch_dirs', []),
+                'segment_cache_bytes': self.config.get('segment_cache_bytes'),
+                'pipeline_lookahead': self.config.get('pipeline_lookahead', 0),
+                'split_streams': self.config.get('split_streams', False),
+                'merge_segments': self.config.get('merge_segments', 'none'),
+            })
+        # Remove intermediates left behind by a crashed session
+        ScratchManager(self.config.get('scratch_dirs', [])).sweep_in_background()
+        self._reported_jobs = set()
+        self._queue_ids = []
         
         # Modern colors
         bg_color = '#2b2b2b'
@@ -66,6 +99,30 @@ class ControlPanel:
         # Add hover effect - darken background, keep text color
         self.start_button.bind('<Enter>', lambda e: self.start_button.config(bg='#1e1e1e'))
         self.start_button.bind('<Leave>', lambda e: self.start_button.config(bg=bg_color))
+        
+        self.background_var = tk.BooleanVar(value=self.config.get('background_render', False))
+        tk.Checkbutton(button_row, text="Background priority", variable=self.background_var,
+                       bg=bg_color, fg=fg_color, selectcolor=entry_bg,
+                       activebackground=bg_color, activeforeground=fg_color,
+                       font=('Segoe UI', 9), highlightthickness=0).pack(pady=(0, 3))
+        
+        # Render queue: one row per job, reorderable while queued
+        queue_frame = tk.Frame(self.frame, bg=bg_color)
+        queue_frame.pack(fill='x', pady=5, padx=15)
+        
+        self.queue_list = tk.Listbox(queue_frame, height=4, bg=entry_bg, fg=fg_color, bd=0,
+                                     relief=tk.FLAT, highlightthickness=0, activestyle='none',
+                                     selectbackground=accent_color, font=('Consolas', 9))
+        self.queue_list.pack(side=tk.LEFT, fill='x', expand=True)
+        
+        queue_buttons = tk.Frame(queue_frame, bg=bg_color)
+        queue_buttons.pack(side=tk.LEFT, padx=(8, 0))
+        for text, command in (("▲", lambda: self.move_selected(-1)),
+                              ("▼", lambda: self.move_selected(1)),
+                              ("✕", self.cancel_selected)):
+            tk.Button(queue_buttons, text=text, command=command, bg=entry_bg, fg=fg_color,
+                      bd=0, relief=tk.FLAT, width=3, cursor='hand2', highlightthickness=0,
+                      activebackground='#4c4c4c', activeforeground=fg_color).pack(pady=1)
 
         # Progress bar and labels
         progress_frame = tk.Frame(self.frame, bg=bg_color)
@@ -122,55 +179,86 @@ class ControlPanel:
             messagebox.showerror("Error", "No file editors found")
             return
         
-        # Disable start button during processing
-        self.start_button.config(state=tk.DISABLED)
-        self.progress_bar['value'] = 0
-        self.progress_label.config(text="Starting muxing process...")
+        # Snapshot the editors into a plain job on the Tk thread
+        try:
+            job = MuxJob.from_editors(editors, self.output_path.get(),
+                                      export_mode=self.config.get('export_mode', 'reencode'),
+                                      profile=self.config.get('encoder_profile', DEFAULT_PROFILE))
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid segment time: {e}")
+            return
         
-        # Run muxing in a separate thread to avoid blocking the UI
-        thread = threading.Thread(target=self.run_muxing_process, args=(editors,))
-        thread.daemon = True
-        thread.start()
-
-    def run_muxing_process(self, editors):
-        """
-        Execute the actual muxing process using VideoMuxer
+        self.scheduler.submit(job, background=self.background_var.get())
+    
+    def selected_job_id(self):
+        """Get the id of the job selected in the queue list, or None"""
+        selection = self.queue_list.curselection()
+        if not selection or selection[0] >= len(self._queue_ids):
+            return None
+        return self._queue_ids[selection[0]]
+    
+    def move_selected(self, offset):
+        """Move the selected queued job up or down"""
+        job_id = self.selected_job_id()
+        if job_id is not None and self.scheduler.move(job_id, offset):
+            self.refresh_queue()
+            self.queue_list.selection_set(self._queue_ids.index(job_id))
+    
+    def cancel_selected(self):
+        """Cancel the selected job"""
+        job_id = self.selected_job_id()
+        if job_id is not None:
+            self.scheduler.cancel(job_id)
+    
+    def refresh_queue(self):
+        """Redraw the queue list and progress bar (main thread only)"""
+        jobs = self.scheduler.jobs()
+        selected = self.selected_job_id()
         
-        Args:
-            editors: List of FileSegmentEditor instances
-        """
-        try:
-            # Create VideoMuxer instance with progress callback
-            muxer = VideoMuxer(progress_callback=self.update_progress)
-            
-            # Process videos
-            muxer.process_videos(editors, self.output_path.get())
-            
-            # Show success message
-            self.root.after(100, lambda: messagebox.showinfo("Success", "Muxing completed successfully!"))
-            
-        except Exception as e:
-            error_msg = str(e)
-            self.update_progress(0, "Error occurred")
-            self.root.after(100, lambda: messagebox.showerror("Error", f"Muxing failed: {error_msg}"))
-        
-        finally:
-            # Re-enable start button and hide percentage
-            self.root.after(100, lambda: self.start_button.config(state=tk.NORMAL))
-            self.root.after(100, lambda: self.percentage_label.config(text=""))
+        self._queue_ids = [job['id'] for job in jobs]
+        self.queue_list.delete(0, tk.END)
+        for job in jobs:
+            cores = f" {job['cores']} cores" if job['state'] in (RenderJob.RUNNING, RenderJob.CANCELLING) else ""
+            self.queue_list.insert(tk.END, f"{job['state']:<10} {job['progress']:3d}%{cores}  "
+                                           f"{job['name']} - {job['text']}")
+        if selected in self._queue_ids:
+            self.queue_list.selection_set(self._queue_ids.index(selected))
+        
+        running = [job for job in jobs if job['state'] == RenderJob.RUNNING]
+        if running:
+            self.update_progress(running[0]['progress'],
+                                 f"{running[0]['name']}: {running[0]['text']}"
+                                 + (f" (+{len(running) - 1} more running)" if len(running) > 1 else ""))
+        
+        # Report each finished job once
+        for job in jobs:
+            if job['id'] in self._reported_jobs:
+                continue
+            if job['state'] == RenderJob.DONE:
+                self._reported_jobs.add(job['id'])
+                self.update_progress(100, f"{job['name']}: Complete!")
+                messagebox.showinfo("Success", f"Muxing of {job['name']} completed successfully!")
+            elif job['state'] == RenderJob.FAILED:
+                self._reported_jobs.add(job['id'])
+                self.update_progress(0, f"{job['name']}: Error occurred")
+                messagebox.showerror("Error", f"Muxing of {job['name']} failed: {job['error']}")
+            elif job['state'] == RenderJob.CANCELLED and job['finished_at']:
+                self._reported_jobs.add(job['id'])
     
     def update_progress(self, value, text):
         """
         Update progress bar and label (thread-safe)
         
+        Updates are coalesced by the UI dispatcher: only the latest value
+        reported between two frames is drawn.
+        
         Args:
             value: Progress value (0-100)
             text: Progress text to display
         """
-        self.root.after(0, lambda: self.progress_bar.config(value=value))
-        self.root.after(0, lambda: self.progress_label.config(text=text))
-        # Show percentage inline if value > 0 (active muxing)
-        if value > 0:
-            self.root.after(0, lambda: self.percentage_label.config(text=f"({value}%)"))
-        else:
-            self.root.after(0, lambda: self.percentage_label.config(text=""))
+        def apply():
+            self.progress_bar.config(value=value)
+            self.progress_label.config(text=text)
+            # Show percentage inline if value > 0 (active muxing)
+            self.percentage_label.config(text=f"({value}%)" if value > 0 else "")
+        self.dispatcher.post('progress', apply)
@@ -1,5 +1,6 @@
 import tkinter as tk
 from .file_segment_editor import FileSegmentEditor
+from .row_virtualizer import RowVirtualizer
 
 class EditorPanel:
     """Upper panel containing scrollable file segment editors"""
@@ -41,18 +42,27 @@ class EditorPanel:
         canvas = tk.Canvas(self.frame, bg=bg_color, highlightthickness=0, bd=0)
         scrollbar = tk.Scrollbar(self.frame, orient="vertical", command=canvas.yview)
         self.scrollable_frame = tk.Frame(canvas, bg=scroll_bg)
+        
+        # Editor widgets and segment rows only exist for the part of the list near the viewport
+        self.virtualizer = RowVirtualizer(canvas, self.get_editors)
 
-        self.scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
+        def configure_scroll_region(event):
+            canvas.configure(scrollregion=canvas.bbox("all"))
+            self.virtualizer.schedule()
+        self.scrollable_frame.bind("<Configure>", configure_scroll_region)
 
         canvas_window = canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
+        
+        # Every scroll moves the viewport, whether from the scrollbar or the view
+        def on_scroll(first, last):
+            scrollbar.set(first, last)
+            self.virtualizer.schedule()
+        canvas.configure(yscrollcommand=on_scroll)
 
         # Make scrollable_frame fill the canvas width
         def configure_canvas_width(event):
             canvas.itemconfig(canvas_window, width=event.width)
+            self.virtualizer.schedule()
         canvas.bind("<Configure>", configure_canvas_width)
 
         canvas.pack(side="left", fill="both", expand=True)
@@ -66,9 +76,11 @@ class EditorPanel:
     
     def add_editor(self):
         """Add a new file segment editor"""
+        # New editors start collapsed; the virtualizer expands them once they are in view
         editor = FileSegmentEditor(self.scrollable_frame, self.set_output_path_callback, self.remove_editor)
         self.editors.append(editor)
         editor.frame.pack(pady=10, fill='x', padx=10)
+        self.virtualizer.schedule()
     
     def remove_editor(self, editor):
         """Remove an editor from the panel"""
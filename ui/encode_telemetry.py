@@ -0,0 +1,168 @@
+import time
+from dataclasses import dataclass, asdict
+
+@dataclass
+class EncodeProgress:
+    """One snapshot of ffmpeg's -progress output"""
+    frame: int = 0
+    fps: float = 0.0
+    bitrate_kbps: float = 0.0
+    total_size: int = 0
+    out_time: float = 0.0
+    speed: float = 0.0
+    dup_frames: int = 0
+    drop_frames: int = 0
+    percent: int = 0
+    eta_seconds: float = None
+    finished: bool = False
+
+    def to_dict(self):
+        return asdict(self)
+
+    def summary(self):
+        """Short human readable status, e.g. '2.31x, 57.2 fps, ETA 0:01:23'"""
+        parts = []
+        if self.speed:
+            parts.append(f"{self.speed:.2f}x")
+        if self.fps:
+            parts.append(f"{self.fps:.1f} fps")
+        if self.eta_seconds is not None:
+            eta = int(self.eta_seconds)
+            parts.append(f"ETA {eta // 3600}:{eta % 3600 // 60:02d}:{eta % 60:02d}")
+        return ', '.join(parts)
+
+    @classmethod
+    def combine(cls, snapshots, total_duration):
+        """
+        Merge the progress of encoders running in parallel on parts of one timeline
+
+        Args:
+            snapshots: EncodeProgress objects, one per encoder
+            total_duration: Duration of the whole timeline in seconds
+
+        Returns:
+            EncodeProgress for the whole timeline
+        """
+        combined = cls(
+            frame=sum(s.frame for s in snapshots),
+            fps=round(sum(s.fps for s in snapshots), 2),
+            total_size=sum(s.total_size for s in snapshots),
+            out_time=sum(s.out_time for s in snapshots),
+            speed=round(sum(s.speed for s in snapshots), 3),
+            dup_frames=sum(s.dup_frames for s in snapshots),
+            drop_frames=sum(s.drop_frames for s in snapshots),
+            finished=bool(snapshots) and all(s.finished for s in snapshots),
+        )
+        if combined.out_time > 0:
+            combined.bitrate_kbps = round(combined.total_size * 8 / 1000 / combined.out_time, 1)
+        if total_duration:
+            combined.percent = min(int(combined.out_time / total_duration * 100), 100)
+            if combined.speed > 0:
+                combined.eta_seconds = max(0.0, (total_duration - combined.out_time) / combined.speed)
+        return combined
+
+
+class ProgressReader:
+    """
+    Parser for ffmpeg's machine-readable `-progress` stream
+
+    ffmpeg writes blocks of key=value lines, each ending with
+    progress=continue (or progress=end for the last one). Every complete
+    block becomes an EncodeProgress snapshot with a percentage and ETA
+    computed from the expected output duration. Values reported as N/A
+    keep their previous value, so the final snapshot stays complete.
+    """
+
+    # ffmpeg arguments that send the key/value stream to stdout
+    ARGS = ['-nostats', '-progress', 'pipe:1']
+
+    def __init__(self, total_duration=None, callback=None):
+        """
+        Initialize the ProgressReader
+
+        Args:
+            total_duration: Expected output duration in seconds (for percent and ETA)
+            callback: Optional function called with every EncodeProgress snapshot
+        """
+        self.total_duration = total_duration
+        self.callback = callback
+        self.last = EncodeProgress()
+        self._values = {}
+        self._started = time.perf_counter()
+
+    def read(self, stream):
+        """
+        Consume a text stream until EOF
+
+        Returns:
+            The last EncodeProgress snapshot
+        """
+        for line in iter(stream.readline, ''):
+            self.feed(line)
+        return self.last
+
+    def feed(self, line):
+        """
+        Parse one line of the progress stream
+
+        Returns:
+            EncodeProgress if the line completed a block, otherwise None
+        """
+        key, sep, value = line.strip().partition('=')
+        if not sep:
+            return None
+        value = value.strip()
+        if key != 'progress':
+            if value != 'N/A':
+                self._values[key.strip()] = value
+            return None
+
+        snapshot = self._snapshot(finished=value == 'end')
+        self.last = snapshot
+        if self.callback:
+            self.callback(snapshot)
+        return snapshot
+
+    def _snapshot(self, finished):
+        """Build an EncodeProgress from the values of the current block"""
+        values = self._values
+        snapshot = EncodeProgress(
+            frame=self._int(values.get('frame')),
+            fps=self._float(values.get('fps')),
+            bitrate_kbps=self._float(values.get('bitrate', '').replace('kbits/s', '')),
+            total_size=self._int(values.get('total_size')),
+            # out_time_ms is in microseconds as well (a long-standing ffmpeg quirk)
+            out_time=self._int(values.get('out_time_us', values.get('out_time_ms'))) / 1_000_000,
+            speed=self._float(values.get('speed', '').rstrip('x')),
+            dup_frames=self._int(values.get('dup_frames')),
+            drop_frames=self._int(values.get('drop_frames')),
+            finished=finished,
+        )
+
+        if finished:
+            snapshot.percent = 100
+            snapshot.eta_seconds = 0.0
+        elif self.total_duration:
+            snapshot.percent = min(int(snapshot.out_time / self.total_duration * 100), 99)
+            remaining = max(0.0, self.total_duration - snapshot.out_time)
+            if snapshot.speed > 0:
+                snapshot.eta_seconds = remaining / snapshot.speed
+            elif snapshot.out_time > 0:
+                # No speed reported yet: extrapolate from the wall clock
+                elapsed = time.perf_counter() - self._started
+                snapshot.eta_seconds = elapsed * remaining / snapshot.out_time
+        return snapshot
+
+    @staticmethod
+    def _int(value):
+        try:
+            return max(0, int(value))
+        except (TypeError, ValueError):
+            return 0
+
+    @staticmethod
+    def _float(value):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return 0.0
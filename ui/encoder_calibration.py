@@ -0,0 +1,173 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from dataclasses import dataclass, asdict
+from .encoder_profiles import PROFILES, QUALITY_ORDER
+from .job_spec import EncoderSettings
+from .media_probe import MediaProbe
+from .video_muxer import VideoMuxer
+
+@dataclass
+class ProfileMeasurement:
+    """Result of encoding the calibration sample with one profile"""
+    profile: str
+    elapsed_seconds: float = 0.0
+    frames: int = 0
+    fps: float = 0.0
+    speed: float = 0.0  # sample duration / wall time (1.0 = realtime)
+    size_bytes: int = 0
+    bitrate_kbps: float = 0.0
+    error: str = ''
+
+    def to_dict(self):
+        return asdict(self)
+
+
+class EncoderCalibrator:
+    """
+    Measure encoder profiles on this machine with a sample of a real source
+
+    Every candidate profile encodes the same short excerpt of the source;
+    wall time, frame rate and output size are recorded. The recommended
+    profile is the highest-quality one (see encoder_profiles.QUALITY_ORDER)
+    that encodes at least `target_speed` times faster than realtime.
+    """
+
+    def __init__(self, sample_seconds=10, core_budget=None):
+        """
+        Initialize the EncoderCalibrator
+
+        Args:
+            sample_seconds: Length of the excerpt encoded with every profile
+            core_budget: Thread limit for the encoder, to calibrate for the
+                         share of the machine a queued job will get (None = all)
+        """
+        self.sample_seconds = sample_seconds
+        self.core_budget = core_budget
+
+    def calibrate(self, source_path, profiles=None, target_speed=1.5, progress_callback=None):
+        """
+        Encode the sample with each profile and pick the best one
+
+        Args:
+            source_path: Video to take the sample from
+            profiles: Profile names to try (None = all in QUALITY_ORDER)
+            target_speed: Minimum speed (multiple of realtime) a profile must reach
+            progress_callback: Optional function called with (value, text)
+
+        Returns:
+            (measurements, recommended_profile) tuple; recommended_profile is
+            None if no profile could encode the sample
+        """
+        profiles = list(profiles or QUALITY_ORDER)
+        start, duration = self.sample_range(source_path)
+
+        measurements = []
+        temp_dir = tempfile.mkdtemp()
+        try:
+            for idx, profile in enumerate(profiles):
+                if progress_callback:
+                    progress_callback(int(idx / len(profiles) * 100), f"Calibrating {profile}...")
+                measurements.append(self.measure(source_path, profile, start, duration, temp_dir))
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+        if progress_callback:
+            progress_callback(100, "Calibration complete")
+        return measurements, self.recommend(measurements, target_speed)
+
+    def sample_range(self, source_path):
+        """
+        Pick the excerpt to encode: sample_seconds from the middle of the source
+
+        Returns:
+            (start_seconds, duration_seconds) tuple
+        """
+        try:
+            total = MediaProbe.probe(source_path).duration
+        except Exception as e:
+            raise Exception(f"Could not read duration of {source_path}: {e}")
+        if total <= 0:
+            raise Exception(f"Could not read duration of {source_path}")
+
+        duration = min(self.sample_seconds, total)
+        start = max(0.0, (total - duration) / 2)
+        return start, duration
+
+    def measure(self, source_path, profile, start, duration, temp_dir):
+        """
+        Encode the sample with one profile
+
+        Returns:
+            ProfileMeasurement object (with error set if ffmpeg failed)
+        """
+        settings = EncoderSettings.from_profile(profile)
+        video_args = settings.video_args()
+        if self.core_budget:
+            video_args = VideoMuxer.thread_limited_video_args(video_args, self.core_budget)
+
+        output = os.path.join(temp_dir, f'{profile}.mkv')
+        cmd = [
+            'ffmpeg', '-v', 'error', '-nostats', '-progress', 'pipe:1',
+            '-ss', f'{start:.3f}', '-t', f'{duration:.3f}', '-i', source_path,
+            *video_args, *settings.audio_args(),
+            '-y', output
+        ]
+
+        started = time.perf_counter()
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        elapsed = time.perf_counter() - started
+
+        measurement = ProfileMeasurement(profile, elapsed_seconds=round(elapsed, 3))
+        if result.returncode != 0 or not os.path.exists(output):
+            measurement.error = result.stderr.strip() or f"return code {result.returncode}"
+            return measurement
+
+        frames = 0
+        for line in result.stdout.splitlines():
+            if line.startswith('frame='):
+                try:
+                    frames = int(line[6:])
+                except ValueError:
+                    pass
+
+        measurement.frames = frames
+        measurement.fps = round(frames / elapsed, 2) if elapsed > 0 else 0.0
+        measurement.speed = round(duration / elapsed, 3) if elapsed > 0 else 0.0
+        measurement.size_bytes = os.path.getsize(output)
+        measurement.bitrate_kbps = round(measurement.size_bytes * 8 / 1000 / duration, 1) if duration else 0.0
+        os.remove(output)
+        return measurement
+
+    @staticmethod
+    def recommend(measurements, target_speed):
+        """
+        Pick the highest-quality profile that meets the target speed
+
+        Falls back to the fastest working profile if none is fast enough.
+
+        Args:
+            measurements: List of ProfileMeasurement objects
+            target_speed: Minimum speed (multiple of realtime)
+
+        Returns:
+            Profile name or None
+        """
+        # Stream copy doesn't encode, so it can't be a recommendation
+        working = [m for m in measurements
+                   if not m.error and PROFILES.get(m.profile, {}).get('video_codec') != 'copy']
+        if not working:
+            return None
+
+        def rank(measurement):
+            # Profiles outside QUALITY_ORDER (tuned variants) rank after the listed ones
+            if measurement.profile in QUALITY_ORDER:
+                return QUALITY_ORDER.index(measurement.profile)
+            return len(QUALITY_ORDER)
+
+        for measurement in sorted(working, key=rank):
+            if measurement.speed >= target_speed:
+                return measurement.profile
+        return max(working, key=lambda m: m.speed).profile
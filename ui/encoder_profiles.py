@@ -0,0 +1,53 @@
+"""
+Named encoder profiles
+
+Profiles are plain EncoderSettings field values so job files, the config
+and the calibration benchmark can refer to them by name. QUALITY_ORDER
+lists them from highest to lowest quality per bit, which is the order the
+calibration benchmark walks when it looks for the best profile that still
+meets a target speed.
+"""
+
+DEFAULT_PROFILE = 'x265-medium'
+
+PROFILES = {
+    'x265-slow': {'video_codec': 'libx265', 'preset': 'slow', 'crf': 22,
+                  'audio_codec': 'libopus', 'audio_bitrate': '128k'},
+    'x265-medium': {'video_codec': 'libx265', 'preset': 'medium', 'crf': 23,
+                    'audio_codec': 'libvorbis', 'audio_quality': 5},
+    'x265-fast': {'video_codec': 'libx265', 'preset': 'fast', 'crf': 24,
+                  'audio_codec': 'libvorbis', 'audio_quality': 5},
+    'x265-veryfast': {'video_codec': 'libx265', 'preset': 'veryfast', 'crf': 25,
+                      'audio_codec': 'libvorbis', 'audio_quality': 4},
+    'x264-medium': {'video_codec': 'libx264', 'preset': 'medium', 'crf': 20,
+                    'audio_codec': 'aac', 'audio_bitrate': '160k'},
+    'x264-fast': {'video_codec': 'libx264', 'preset': 'fast', 'crf': 21,
+                  'audio_codec': 'aac', 'audio_bitrate': '160k'},
+    'x264-veryfast': {'video_codec': 'libx264', 'preset': 'veryfast', 'crf': 22,
+                      'audio_codec': 'aac', 'audio_bitrate': '128k'},
+    'x264-film': {'video_codec': 'libx264', 'preset': 'medium', 'crf': 20, 'tune': 'film',
+                  'audio_codec': 'aac', 'audio_bitrate': '160k'},
+    'x264-animation': {'video_codec': 'libx264', 'preset': 'medium', 'crf': 20, 'tune': 'animation',
+                       'audio_codec': 'aac', 'audio_bitrate': '160k'},
+    'copy': {'video_codec': 'copy', 'audio_codec': 'copy'},
+}
+
+# Highest quality first; tuned variants are only used when picked by name. 'copy' is not
+# an encoder setting, so it is never measured or recommended by the calibration
+QUALITY_ORDER = ('x265-slow', 'x265-medium', 'x265-fast', 'x264-medium', 'x265-veryfast',
+                 'x264-fast', 'x264-veryfast')
+
+
+def profile_settings(name):
+    """
+    Get the EncoderSettings fields of a profile
+
+    Args:
+        name: Profile name
+
+    Returns:
+        New dict of EncoderSettings keyword arguments
+    """
+    if name not in PROFILES:
+        raise ValueError(f"Unknown encoder profile: {name} (choose from {', '.join(PROFILES)})")
+    return dict(PROFILES[name])
@@ -1,6 +1,12 @@
 import tkinter as tk
 from tkinter import filedialog
-from .time_segment_row import TimeSegmentRow
+from .time_segment_row import TimeSegmentRow, SegmentEntry
+from .keyframe_index import KeyframeIndex
+from .media_probe import MediaProbe
+from .filmstrip import Filmstrip
+from .scene_detector import SceneDetector
+from .ui_dispatcher import UIDispatcher
+from .job_spec import SourceSpec, SegmentSpec, parse_time
 import os
 import sys
 
@@ -9,6 +15,20 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config_manager import ConfigManager
 
 class FileSegmentEditor:
+    """
+    Editor for the segments of one source file
+    
+    The editor's state (file, duration, segment entries, scene analysis)
+    lives on the object; its widgets only exist while the editor is in or
+    near the viewport. A collapsed editor is a single empty frame of the
+    height it would have expanded, so a project with hundreds of files
+    only builds the widgets of the few on screen (see RowVirtualizer).
+    """
+    
+    # Height of an editor without its segment slots; measured on the first expanded editor
+    chrome_height = 110
+    _measured = False
+    
     def __init__(self, parent, set_output_path_callback=None, remove_callback=None):
         # Modern color scheme
         self.bg_color = '#2b2b2b'  # Dark background
@@ -22,12 +42,37 @@ class FileSegmentEditor:
         self.set_output_path_callback = set_output_path_callback
         self.remove_callback = remove_callback
         self.config = ConfigManager()
+        self.scene_analysis = None
+        self._scenes_button = {'text': "🎬 Scenes", 'state': tk.DISABLED}
 
         # Add subtle border/shadow effect
         self.frame.configure(highlightbackground='#1a1a1a', highlightthickness=1)
+        
+        self.segments = []  # SegmentEntry objects in order
+        self.rows = {}  # SegmentEntry -> bound TimeSegmentRow
+        self._row_pool = []  # unbound rows ready for reuse
+        
+        # Widgets are built by expand() once the editor scrolls into view
+        self.body = None
+        self.segments_frame = None
+        self.scenes_btn = None
+        self.collapse()
 
+    @property
+    def expanded(self):
+        """Whether the editor's widgets exist"""
+        return self.body is not None
+    
+    def expand(self):
+        """Build the editor's widgets in place of the placeholder"""
+        if self.expanded:
+            return
+        self.body = tk.Frame(self.frame, bg=self.bg_color, bd=0)
+        self.body.pack(fill='x')
+        self.frame.pack_propagate(True)
+        
         # Header with file selection and remove button
-        header_frame = tk.Frame(self.frame, bg=self.bg_color, bd=0)
+        header_frame = tk.Frame(self.body, bg=self.bg_color, bd=0)
         header_frame.pack(fill='x', padx=10, pady=10)
         
         # File selection row (left side)
@@ -52,6 +97,14 @@ class FileSegmentEditor:
         browse_btn.bind('<Enter>', lambda e: browse_btn.config(bg='#2980b9'))
         browse_btn.bind('<Leave>', lambda e: browse_btn.config(bg=self.accent_color))
         
+        # Scene detection button: suggests segment boundaries at scene changes
+        self.scenes_btn = tk.Button(file_row, command=self.suggest_scenes,
+                                    bg=self.entry_bg, fg=self.fg_color, bd=0, relief=tk.FLAT,
+                                    font=('Segoe UI', 9), cursor='hand2',
+                                    padx=10, pady=5, activebackground='#4a4a4a', activeforeground='white',
+                                    **self._scenes_button)
+        self.scenes_btn.pack(side=tk.LEFT)
+        
         # Remove editor button (top right corner)
         remove_btn = tk.Button(header_frame, text="✕", command=self.remove_editor, 
                               bg=self.bg_color, fg='#e74c3c', font=('Arial', 18, 'bold'),
@@ -64,13 +117,13 @@ class FileSegmentEditor:
         remove_btn.bind('<Leave>', lambda e: remove_btn.config(bg=self.bg_color))
 
         # Segments section
-        segments_section = tk.Frame(self.frame, bg=self.bg_color, bd=0)
-        segments_section.pack(fill='both', expand=True, padx=10, pady=(0, 10))
+        segments_section = tk.Frame(self.body, bg=self.bg_color, bd=0)
+        segments_section.pack(fill='x', padx=10, pady=(0, 10))
         
-        # Time segments container
-        self.segments_frame = tk.Frame(segments_section, bg=self.bg_color, bd=0)
-        self.segments_frame.pack(fill='both', expand=True)
-        self.segments = []
+        # Time segments container: one fixed-height slot per segment; rows are
+        # only bound to the slots near the viewport (see RowVirtualizer)
+        self.segments_frame = tk.Frame(segments_section, bg=self.bg_color, bd=0, height=1)
+        self.segments_frame.pack(fill='x')
         
         # Add segment button at the bottom (transparent, aligned right)
         add_btn = tk.Button(segments_section, text="+ Add Segment", command=self.add_segment, 
@@ -83,7 +136,41 @@ class FileSegmentEditor:
         add_btn.bind('<Enter>', lambda e: add_btn.config(fg='#229954'))
         add_btn.bind('<Leave>', lambda e: add_btn.config(fg='#27ae60'))
         
-        # Don't add initial segment - wait for file selection
+        self.layout()
+    
+    def collapse(self):
+        """Replace the editor's widgets with an empty frame of the same height"""
+        if self.expanded:
+            for segment in list(self.rows):
+                self._release_row(segment)
+            self._row_pool = []
+            self.body.destroy()
+            self.body = None
+            self.segments_frame = None
+            self.scenes_btn = None
+        self.frame.pack_propagate(False)
+        self.frame.configure(height=self.estimated_height())
+    
+    def estimated_height(self):
+        """Height of the editor when expanded, from its number of segments"""
+        return self.chrome_height + max(1, len(self.segments) * self.row_height())
+    
+    def has_focus(self):
+        """Check whether keyboard focus is in one of the editor's widgets"""
+        if not self.expanded:
+            return False
+        try:
+            focused = self.frame.focus_get()
+        except KeyError:
+            # focus_get fails when focus is inside some Tk-internal widgets
+            return False
+        return focused is not None and str(focused).startswith(str(self.body) + '.')
+    
+    def set_scenes_button(self, **options):
+        """Set the text/state of the scenes button, kept while the editor is collapsed"""
+        self._scenes_button.update(options)
+        if self.scenes_btn is not None:
+            self.scenes_btn.config(**options)
 
     def browse_file(self):
         # Video file extensions
@@ -104,19 +191,146 @@ class FileSegmentEditor:
             path = filedialog.askopenfilename(filetypes=video_types)
         if path:
             self.file_path.set(path)
-            self.get_video_duration(path)
+            self.video_duration = None
+            self.scene_analysis = None
+            self.set_scenes_button(text="🎬 Scenes", state=tk.DISABLED)
+            
+            # Index keyframes in the background for fast seeks and smart cuts
+            KeyframeIndex.build_in_background(path)
             
             # Generate output filename
             self.generate_output_filename(path)
             
-            # Add first segment if this is the first file selection
-            if not self.segments:
-                self.add_segment()
-            else:
-                # Update all segments with new duration and refresh thumbnails
-                for segment in self.segments:
-                    segment.update_end_time()
-                    segment.refresh_thumbnails()
+            # Probe off the UI thread; network shares can take seconds to answer
+            dispatcher = UIDispatcher.for_widget(self.frame)
+            MediaProbe.submit(path, callback=lambda info: dispatcher.call(
+                lambda: self.on_probe_ready(path, info)))
+    
+    def on_probe_ready(self, path, info):
+        """Apply the probed duration once the metadata of the selected file is known"""
+        if self.file_path.get() != path or not self.frame.winfo_exists():
+            return
+        self.video_duration = info.duration if info and info.duration > 0 else None
+        
+        # Build the filmstrip in one decode pass so previews can be served instantly
+        if self.video_duration:
+            dispatcher = UIDispatcher.for_widget(self.frame)
+            
+            def filmstrip_built(strip):
+                if strip:
+                    dispatcher.call(lambda: self.on_filmstrip_ready(path))
+            
+            Filmstrip.build_in_background(path, self.video_duration, callback=filmstrip_built)
+            
+            if SceneDetector.available() and info.has_video:
+                self.set_scenes_button(state=tk.NORMAL)
+        
+        # Add first segment if this is the first file selection
+        if not self.segments:
+            self.add_segment()
+        else:
+            # Fill empty end times with the new duration and refresh the shown rows
+            duration_str = self.get_duration_str()
+            for segment in self.segments:
+                if not segment.end:
+                    segment.end = duration_str
+            for segment, row in self.rows.items():
+                row.show(segment)
+    
+    def on_filmstrip_ready(self, path):
+        """Fill placeholder thumbnails from the filmstrip once it is loaded"""
+        if self.file_path.get() != path or not self.frame.winfo_exists():
+            return
+        for row in self.rows.values():
+            row.apply_filmstrip_previews()
+    
+    def suggest_scenes(self):
+        """Show the detected scene changes as split suggestions, analysing the file first if needed"""
+        path = self.file_path.get()
+        if not path:
+            return
+        if self.scene_analysis is not None:
+            self.show_scene_menu()
+            return
+        
+        # Decoding takes a while on long files; keep the window responsive
+        self.set_scenes_button(text="🎬 Analysing...", state=tk.DISABLED)
+        dispatcher = UIDispatcher.for_widget(self.frame)
+        detector = SceneDetector(sample=self.config.get('scene_sample', 'auto'))
+        detector.analyze_in_background(path, callback=lambda analysis: dispatcher.call(
+            lambda: self.on_scenes_ready(path, analysis)))
+    
+    def on_scenes_ready(self, path, analysis):
+        """Keep the scene analysis of the selected file and offer its suggestions"""
+        if self.file_path.get() != path or not self.frame.winfo_exists():
+            return
+        self.set_scenes_button(text="🎬 Scenes", state=tk.NORMAL)
+        if analysis is None:
+            return
+        self.scene_analysis = analysis
+        # Scrolled away meanwhile: the suggestions are offered on the next click
+        if self.expanded:
+            self.show_scene_menu()
+    
+    def show_scene_menu(self):
+        """Pop up a menu of suggested boundaries below the scenes button"""
+        changes = self.scene_analysis.changes(threshold=self.config.get('scene_threshold', 0.3))
+        # The time fields hold whole seconds; drop suggestions that round onto an existing boundary
+        boundaries = set()
+        for segment in self.segments:
+            boundaries.update(self.segment_range(segment) or ())
+        suggestions = []
+        for seconds, score in changes:
+            rounded = round(seconds)
+            if rounded not in boundaries and (not suggestions or suggestions[-1][0] != rounded):
+                suggestions.append((rounded, score))
+        
+        menu = tk.Menu(self.frame, tearoff=0, bg=self.entry_bg, fg=self.fg_color,
+                       activebackground=self.accent_color, activeforeground='white')
+        if not suggestions:
+            menu.add_command(label="No scene changes found", state=tk.DISABLED)
+        else:
+            menu.add_command(label=f"Split at all {len(suggestions)} scene changes",
+                             command=lambda: self.split_at_scenes([s for s, _ in suggestions]))
+            menu.add_separator()
+            for seconds, score in suggestions:
+                menu.add_command(label=f"Split at {self.format_seconds(seconds)}  (change {score:.0%})",
+                                 command=lambda s=seconds: self.split_segment_at(s))
+        menu.tk_popup(self.scenes_btn.winfo_rootx(),
+                      self.scenes_btn.winfo_rooty() + self.scenes_btn.winfo_height())
+    
+    def split_at_scenes(self, times):
+        """Split the segments at every given time"""
+        for seconds in times:
+            self.split_segment_at(seconds)
+    
+    def split_segment_at(self, seconds):
+        """
+        Split the segment that contains the given time into two
+        
+        Args:
+            seconds: Split point in whole seconds; ignored if it is not strictly
+                     inside a complete segment
+        """
+        for idx, segment in enumerate(self.segments):
+            segment_range = self.segment_range(segment)
+            if segment_range and segment_range[0] < seconds < segment_range[1]:
+                split_time = self.format_seconds(seconds)
+                self.segments.insert(idx + 1, SegmentEntry(split_time, segment.end))
+                segment.end = split_time
+                if segment in self.rows:
+                    self.rows[segment].show(segment)
+                self.layout()
+                self.update_remove_buttons()
+                return
+    
+    @staticmethod
+    def segment_range(segment):
+        """Get (start, end) of a segment entry in seconds, or None while a field is incomplete"""
+        try:
+            return parse_time(segment.start), parse_time(segment.end)
+        except ValueError:
+            return None
     
     def generate_output_filename(self, input_path):
         """Generate output filename based on input file"""
@@ -137,65 +351,123 @@ class FileSegmentEditor:
         output_path = os.path.join(dir_name, output_name)
         self.set_output_path_callback(output_path)
 
-    def get_video_duration(self, file_path):
-        """Get video duration using ffprobe or moviepy"""
-        try:
-            import subprocess
-            result = subprocess.run(
-                ['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
-                 '-of', 'default=noprint_wrappers=1:nokey=1', file_path],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            if result.returncode == 0:
-                self.video_duration = float(result.stdout.strip())
-            else:
-                self.video_duration = None
-        except (FileNotFoundError, Exception):
-            # ffprobe not available, try moviepy
-            try:
-                from moviepy.editor import VideoFileClip
-                clip = VideoFileClip(file_path)
-                self.video_duration = clip.duration
-                clip.close()
-            except:
-                self.video_duration = None
-
+    def to_source_spec(self):
+        """
+        Describe this editor as a plain SourceSpec for the muxer
+        
+        Segments with an empty start or end are skipped.
+        
+        Returns:
+            SourceSpec object, or None if no existing file is selected
+        """
+        path = self.file_path.get()
+        if not path or not os.path.exists(path):
+            return None
+        
+        segments = []
+        for segment in self.segments:
+            start_time = segment.start
+            end_time = segment.end
+            if start_time and end_time:
+                segments.append(SegmentSpec(parse_time(start_time), parse_time(end_time)))
+        return SourceSpec(path, segments)
+    
     def add_segment(self):
         # Determine start time from previous segment
         start_time = "00:00"
         if self.segments:
             # Get end time of last segment
-            prev_end = self.segments[-1].end_var.get()
+            prev_end = self.segments[-1].end
             if prev_end:
                 start_time = prev_end
         
-        segment = TimeSegmentRow(self.segments_frame, self, start_time)
+        # New segments end at the video's end until edited; the row is bound
+        # once the segment's slot scrolls into view
+        segment = SegmentEntry(start_time, self.get_duration_str())
         self.segments.append(segment)
-        segment.frame.pack(fill='x', pady=2)
+        self.layout()
         self.update_remove_buttons()
+        return segment
 
     def remove_segment(self, segment):
         if len(self.segments) > 1:  # Only remove if more than one segment
-            segment.frame.destroy()
+            if segment in self.rows:
+                self._release_row(segment)
             self.segments.remove(segment)
+            self.layout()
             self.update_remove_buttons()
     
     def update_remove_buttons(self):
         # Disable remove button if only one segment remains
-        for segment in self.segments:
-            if len(self.segments) <= 1:
-                segment.remove_button.config(state=tk.DISABLED)
-            else:
-                segment.remove_button.config(state=tk.NORMAL)
+        for row in self.rows.values():
+            row.set_removable(len(self.segments) > 1)
+    
+    def row_height(self):
+        """Height of one segment slot in pixels"""
+        return TimeSegmentRow.row_height
+    
+    def layout(self):
+        """Size the segment list to its slots and move the bound rows into theirs"""
+        if not self.expanded:
+            self.frame.configure(height=self.estimated_height())
+            return
+        self.segments_frame.configure(height=max(1, len(self.segments) * self.row_height()))
+        if self.rows:
+            positions = {segment: idx for idx, segment in enumerate(self.segments)}
+            for segment, row in self.rows.items():
+                row.place_at(positions[segment])
+    
+    def show_rows(self, first, last):
+        """
+        Bind rows to the segments first..last-1 and pool every other row
+        
+        A row whose field has keyboard focus stays bound, so the widget
+        being edited is never taken away.
+        """
+        if not FileSegmentEditor._measured and self.frame.winfo_ismapped():
+            # Placeholders take the height of the editor around its segment slots
+            FileSegmentEditor.chrome_height = self.frame.winfo_height() - self.segments_frame.winfo_height()
+            FileSegmentEditor._measured = True
+        wanted = self.segments[first:last]
+        wanted_set = set(wanted)
+        for segment, row in list(self.rows.items()):
+            if segment not in wanted_set and not row.has_focus():
+                self._release_row(segment)
+        for segment in wanted:
+            if segment not in self.rows:
+                self._bind_row(segment)
+        self.layout()
+    
+    def row_for(self, segment):
+        """Get the row showing a segment, binding one if needed"""
+        row = self.rows.get(segment) or self._bind_row(segment)
+        self.layout()
+        return row
+    
+    def _bind_row(self, segment):
+        """Show a segment in a pooled (or new) row"""
+        row = self._row_pool.pop() if self._row_pool else TimeSegmentRow(self.segments_frame, self)
+        row.set_removable(len(self.segments) > 1)
+        row.show(segment)
+        self.rows[segment] = row
+        return row
+    
+    def _release_row(self, segment):
+        """Unbind the row of a segment and return it to the pool"""
+        row = self.rows.pop(segment)
+        row.unbind()
+        self._row_pool.append(row)
     
     def get_duration_str(self):
         """Convert video duration to time string"""
         if self.video_duration is None:
             return ""
-        
-        total_seconds = int(self.video_duration)
+        return self.format_seconds(self.video_duration)
+    
+    @staticmethod
+    def format_seconds(seconds):
+        """Format seconds as mm:ss, or hh:mm:ss from one hour on"""
+        total_seconds = int(seconds)
         hours = total_seconds // 3600
         minutes = (total_seconds % 3600) // 60
         seconds = total_seconds % 60
@@ -219,16 +491,11 @@ class FileSegmentEditor:
             if current_index + 1 < len(self.segments):
                 # Focus next segment's start field
                 next_segment = self.segments[current_index + 1]
-                next_segment.start_entry.focus_set()
-                next_segment.start_entry.select_range(0, tk.END)
+                self.row_for(next_segment).focus_field('start')
             else:
-                # No next segment - create a new one
-                self.add_segment()
-                # Focus the newly created segment's start field
-                if self.segments:
-                    new_segment = self.segments[-1]
-                    new_segment.start_entry.focus_set()
-                    new_segment.start_entry.select_range(0, tk.END)
+                # No next segment - create a new one and focus its start field
+                new_segment = self.add_segment()
+                self.row_for(new_segment).focus_field('start')
         except ValueError:
             # Current segment not in list (shouldn't happen)
             pass
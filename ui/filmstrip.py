@@ -0,0 +1,248 @@
+import bisect
+import json
+import math
+import os
+import re
+import subprocess
+import threading
+from PIL import Image, PngImagePlugin
+from .cache_utils import get_cache_dir, identity_key
+from .media_probe import MediaProbe
+
+class Filmstrip:
+    """
+    Sprite sheet of evenly spaced thumbnails for one source
+
+    The sheet is produced by a single ffmpeg pass that decodes keyframes
+    only, resamples them to `count` evenly spaced frames and tiles them
+    into one image. It is cached as a PNG per source, so previews for any
+    timestamp can be served instantly from the nearest cell while the exact
+    frame is extracted lazily.
+
+    A cell shows the last keyframe before its nominal time, which can be a
+    whole GOP earlier, so the real timestamp of every cell is recorded
+    during extraction and stored in the PNG alongside the sheet.
+    """
+
+    COLUMNS = 10
+    DEFAULT_COUNT = 100
+
+    # PNG text chunk holding the cell timestamps
+    TIMES_KEY = 'cell_times'
+    SHOWINFO_PTS = re.compile(r'Parsed_showinfo.*?pts_time:\s*(-?[\d.]+)')
+
+    # Loaded filmstrips by source identity (path + size + mtime)
+    _strips = {}
+    _lock = threading.Lock()
+
+    def __init__(self, sheet, duration, count, width, height, cell_times=None):
+        """
+        Initialize the Filmstrip
+
+        Args:
+            sheet: PIL Image containing the tiled thumbnails
+            duration: Source duration in seconds
+            count: Number of thumbnails in the sheet
+            width: Thumbnail width in pixels
+            height: Thumbnail height in pixels
+            cell_times: Timestamp of the frame shown by each cell (None = nominal times)
+        """
+        self.sheet = sheet
+        self.duration = duration
+        self.count = count
+        self.width = width
+        self.height = height
+        self.interval = duration / count
+        self.cell_times = cell_times or [idx * self.interval for idx in range(count)]
+
+    def cell_time(self, idx):
+        """Get the timestamp (in seconds) of the frame shown by a cell"""
+        return self.cell_times[idx]
+
+    def nearest(self, seconds):
+        """
+        Get the thumbnail closest to a timestamp
+
+        Args:
+            seconds: Timestamp in seconds
+
+        Returns:
+            (PIL Image, cell_time) tuple
+        """
+        # Cell times never decrease, so the closest one is next to the insertion point
+        pos = bisect.bisect_left(self.cell_times, seconds)
+        idx = min(range(max(0, pos - 1), min(self.count, pos + 1)),
+                  key=lambda i: abs(self.cell_times[i] - seconds))
+        col = idx % self.COLUMNS
+        row = idx // self.COLUMNS
+        box = (col * self.width, row * self.height, (col + 1) * self.width, (row + 1) * self.height)
+        return self.sheet.crop(box), self.cell_time(idx)
+
+    @classmethod
+    def cached(cls, video_path, width=120, height=68):
+        """
+        Get the filmstrip of a source if it is already loaded in memory
+
+        Only checks the strips loaded by load_or_build() in this process, so
+        it never touches the disk and is safe to call from the Tk thread.
+
+        Args:
+            video_path: Path to the video file
+            width: Thumbnail width in pixels
+            height: Thumbnail height in pixels
+
+        Returns:
+            Filmstrip object or None
+        """
+        key = identity_key(video_path)
+        if key is None:
+            return None
+        with cls._lock:
+            strip = cls._strips.get(key)
+        if strip is not None and (strip.width, strip.height) == (width, height):
+            return strip
+        return None
+
+    @classmethod
+    def build_in_background(cls, video_path, duration=None, callback=None, count=DEFAULT_COUNT,
+                            width=120, height=68):
+        """
+        Load or build the filmstrip of a source on a daemon thread
+
+        Args:
+            video_path: Path to the video file
+            duration: Source duration in seconds (None = probe it)
+            callback: Optional function called with the Filmstrip (or None on
+                      failure) from the background thread
+            count: Number of thumbnails
+            width: Thumbnail width in pixels
+            height: Thumbnail height in pixels
+        """
+        def worker():
+            try:
+                strip = cls.load_or_build(video_path, duration, count, width, height)
+            except Exception as e:
+                print(f"Warning: Could not build filmstrip for {video_path}: {e}")
+                strip = None
+            if callback:
+                callback(strip)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    @classmethod
+    def load_or_build(cls, video_path, duration=None, count=DEFAULT_COUNT, width=120, height=68):
+        """
+        Load the filmstrip from the cache or build it with ffmpeg
+
+        Args:
+            video_path: Path to the video file
+            duration: Source duration in seconds (None = probe it)
+            count: Number of thumbnails
+            width: Thumbnail width in pixels
+            height: Thumbnail height in pixels
+
+        Returns:
+            Filmstrip object
+        """
+        if duration is None:
+            duration = MediaProbe.probe(video_path).duration
+        if not duration or duration <= 0:
+            raise Exception("Unknown duration")
+
+        key = identity_key(video_path, 'filmstrip', count, width, height)
+        if key is None:
+            raise Exception(f"File not found: {video_path}")
+        cache_path = os.path.join(get_cache_dir('filmstrips'), f'{key}.png')
+
+        sheet = None
+        cell_times = None
+        if os.path.exists(cache_path):
+            try:
+                with Image.open(cache_path) as cached_sheet:
+                    # Sheets cached without cell timestamps are rebuilt
+                    cell_times = json.loads(cached_sheet.text[cls.TIMES_KEY])
+                    sheet = cached_sheet.copy()
+            except (OSError, ValueError, KeyError, AttributeError):
+                sheet = None
+
+        if sheet is None:
+            sheet, cell_times = cls._extract_sheet(video_path, duration, count, width, height)
+            tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+            try:
+                info = PngImagePlugin.PngInfo()
+                info.add_text(cls.TIMES_KEY, json.dumps(cell_times))
+                sheet.save(tmp_path, format='PNG', pnginfo=info)
+                os.replace(tmp_path, cache_path)
+            except OSError as e:
+                print(f"Warning: Could not cache filmstrip: {e}")
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+
+        strip = cls(sheet, duration, count, width, height, cell_times)
+        with cls._lock:
+            cls._strips[identity_key(video_path)] = strip
+        return strip
+
+    @classmethod
+    def _extract_sheet(cls, video_path, duration, count, width, height):
+        """
+        Decode keyframes once and tile `count` evenly spaced frames
+
+        Returns:
+            (sheet, cell_times) tuple
+        """
+        rows = math.ceil(count / cls.COLUMNS)
+        cmd = [
+            'ffmpeg', '-hide_banner', '-nostats', '-v', 'info',
+            # Keyframe-only decode keeps this pass far below realtime cost
+            '-skip_frame', 'nokey',
+            '-i', video_path,
+            '-an',
+            # showinfo logs the timestamp of every decoded keyframe (at info level)
+            '-vf', (f'showinfo,'
+                    f'fps={count}/{duration:.3f},'
+                    f'scale={width}:{height},'
+                    f'tile={cls.COLUMNS}x{rows}'),
+            '-frames:v', '1',
+            '-f', 'rawvideo',
+            '-pix_fmt', 'rgb24',
+            'pipe:1'
+        ]
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+        stderr = result.stderr.decode(errors='replace')
+        sheet_size = (width * cls.COLUMNS, height * rows)
+        frame_bytes = sheet_size[0] * sheet_size[1] * 3
+        if result.returncode != 0 or len(result.stdout) < frame_bytes:
+            errors = '\n'.join(line for line in stderr.splitlines() if 'Parsed_showinfo' not in line)
+            raise Exception(f"ffmpeg error: {errors.strip()}")
+
+        keyframe_times = [float(value) for value in cls.SHOWINFO_PTS.findall(stderr)]
+        cell_times = cls.select_cell_times(keyframe_times, duration / count, count)
+        return Image.frombytes('RGB', sheet_size, result.stdout[:frame_bytes]), cell_times
+
+    @staticmethod
+    def select_cell_times(frame_times, interval, count):
+        """
+        Work out which decoded frame the fps filter put into each cell
+
+        The fps filter rounds every input timestamp to the nearest output
+        slot, starts at the slot of the first frame, and fills each slot
+        with the last frame rounded to or before it.
+
+        Args:
+            frame_times: Timestamps of the decoded frames in order
+            interval: Seconds between two cells
+            count: Number of cells
+
+        Returns:
+            List of count timestamps (nominal times if no frames were logged)
+        """
+        if not frame_times:
+            return [idx * interval for idx in range(count)]
+        slots = [math.floor(t / interval + 0.5) for t in frame_times]
+        cell_times = []
+        for idx in range(count):
+            pos = bisect.bisect_right(slots, slots[0] + idx) - 1
+            cell_times.append(frame_times[max(0, pos)])
+        return cell_times
@@ -0,0 +1,182 @@
+import threading
+import time
+from .cache_utils import file_identity
+
+try:
+    import av
+except ImportError:
+    # PyAV is optional; ThumbnailExtractor falls back to spawning ffmpeg
+    av = None
+
+class _OpenDecoder:
+    """An open demuxer/decoder for one source file"""
+
+    def __init__(self, video_path):
+        self.identity = file_identity(video_path)
+        self.container = av.open(video_path)
+        self.stream = self.container.streams.video[0]
+        self.stream.thread_type = 'AUTO'
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+    def close(self):
+        try:
+            self.container.close()
+        except Exception:
+            pass
+
+
+class FrameDecoderPool:
+    """
+    Keeps PyAV demuxers/decoders open per source for fast repeated seeks
+
+    Spawning ffmpeg for every preview frame pays process startup, demuxer
+    open and codec init each time. The pool opens each source once, reuses
+    it for every seek and closes decoders that have been idle for longer
+    than idle_timeout seconds.
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, idle_timeout=30.0):
+        """
+        Initialize the FrameDecoderPool
+
+        Args:
+            idle_timeout: Seconds after which an unused decoder is closed
+        """
+        self.idle_timeout = idle_timeout
+        self._decoders = {}
+        self._lock = threading.Lock()
+        self._reaper = None
+
+    @staticmethod
+    def available():
+        """Check whether PyAV is installed"""
+        return av is not None
+
+    @classmethod
+    def shared(cls):
+        """
+        Get the application-wide decoder pool
+
+        Returns:
+            FrameDecoderPool object
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def decode(self, video_path, seconds, width, height):
+        """
+        Decode the frame shown at a timestamp
+
+        Args:
+            video_path: Path to the video file
+            seconds: Timestamp in seconds
+            width: Output width in pixels
+            height: Output height in pixels
+
+        Returns:
+            PIL Image or None if the frame could not be decoded
+        """
+        if av is None:
+            return None
+
+        try:
+            decoder = self._get_decoder(video_path)
+        except Exception as e:
+            print(f"Warning: PyAV could not open {video_path}: {e}")
+            return None
+
+        with decoder.lock:
+            decoder.last_used = time.monotonic()
+            try:
+                return self._decode_at(decoder, seconds, width, height)
+            except Exception:
+                # A decoder in a bad state is dropped; the next call reopens it
+                self._discard(video_path, decoder)
+                return None
+
+    def close_all(self):
+        """Close every open decoder"""
+        with self._lock:
+            decoders = list(self._decoders.values())
+            self._decoders.clear()
+        for decoder in decoders:
+            with decoder.lock:
+                decoder.close()
+
+    def _decode_at(self, decoder, seconds, width, height):
+        """Seek to the keyframe before seconds and decode forward to it"""
+        stream = decoder.stream
+        target_pts = int(seconds / stream.time_base)
+        if stream.start_time is not None:
+            target_pts += stream.start_time
+
+        decoder.container.seek(target_pts, stream=stream, backward=True, any_frame=False)
+
+        # Decode forward from the keyframe to the first frame at/after the target
+        last_frame = None
+        for frame in decoder.container.decode(stream):
+            last_frame = frame
+            if frame.pts is not None and frame.pts >= target_pts:
+                break
+
+        if last_frame is None:
+            return None
+        return last_frame.reformat(width=width, height=height, format='rgb24').to_image()
+
+    def _get_decoder(self, video_path):
+        """Get the open decoder for a source, reopening it if the file changed"""
+        identity = file_identity(video_path)
+        with self._lock:
+            decoder = self._decoders.get(video_path)
+            if decoder is not None and decoder.identity == identity:
+                return decoder
+
+        new_decoder = _OpenDecoder(video_path)
+        with self._lock:
+            old_decoder = self._decoders.get(video_path)
+            self._decoders[video_path] = new_decoder
+            self._start_reaper()
+
+        if old_decoder is not None:
+            with old_decoder.lock:
+                old_decoder.close()
+        return new_decoder
+
+    def _discard(self, video_path, decoder):
+        """Forget and close a decoder (caller holds decoder.lock)"""
+        with self._lock:
+            if self._decoders.get(video_path) is decoder:
+                del self._decoders[video_path]
+        decoder.close()
+
+    def _start_reaper(self):
+        """Start the idle reaper thread if it isn't running (caller holds the lock)"""
+        if self._reaper is None or not self._reaper.is_alive():
+            self._reaper = threading.Thread(target=self._reap_idle, daemon=True)
+            self._reaper.start()
+
+    def _reap_idle(self):
+        """Periodically close decoders that have been idle too long"""
+        while True:
+            time.sleep(max(1.0, self.idle_timeout / 3))
+            now = time.monotonic()
+            with self._lock:
+                idle = [(path, decoder) for path, decoder in self._decoders.items()
+                        if now - decoder.last_used > self.idle_timeout]
+                for path, _ in idle:
+                    del self._decoders[path]
+                # Stop once nothing is open; _get_decoder restarts the reaper
+                stop = not self._decoders
+                if stop:
+                    self._reaper = None
+            for _, decoder in idle:
+                with decoder.lock:
+                    decoder.close()
+            if stop:
+                return
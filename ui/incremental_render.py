@@ -0,0 +1,141 @@
+import os
+from .segment_cache import SegmentCache
+
+class IncrementalRenderer:
+    """
+    Export strategy that encodes every segment on its own and caches it
+
+    Each segment is encoded independently with the job's encoder settings
+    and stored in the SegmentCache. Re-exporting after changing one segment
+    only encodes that segment again; every other piece comes from the cache
+    and all pieces are joined with a stream copy.
+    """
+
+    def __init__(self, muxer, cache=None):
+        """
+        Initialize the IncrementalRenderer
+
+        Args:
+            muxer: VideoMuxer used to run commands, read encoder settings and report progress
+            cache: SegmentCache to use (defaults to the shared cache)
+        """
+        self.muxer = muxer
+        self.cache = cache or SegmentCache.shared()
+
+    def check_support(self, encoder):
+        """
+        Check whether the job can be rendered incrementally
+
+        Args:
+            encoder: EncoderSettings of the job
+
+        Returns:
+            (supported, reason) tuple; reason explains why not
+        """
+        if encoder.video_codec == 'copy':
+            return False, "stream copy has nothing to cache"
+        return True, ""
+
+    def render(self, segments, output_path, temp_dir):
+        """
+        Render the segments to output_path, reusing cached pieces
+
+        Args:
+            segments: List of (source_idx, input_file, start, end) tuples in concat order
+            output_path: Path for the output file
+            temp_dir: Directory for the concat list and logs
+
+        Returns:
+            Dict with the number of distinct pieces taken from the cache (hits)
+            and encoded (misses) by this render
+        """
+        video_args = self.muxer.video_args
+        if self.muxer.core_budget:
+            video_args = self.muxer.thread_limited_video_args(video_args, self.muxer.core_budget)
+        # Thread limits don't change the encoded result, so they stay out of the key
+        keys = [SegmentCache.make_key(input_file, start, end, self.muxer.video_args, self.muxer.audio_args)
+                for _, input_file, start, end in segments]
+        if None in keys:
+            raise Exception("Source file disappeared before rendering")
+
+        self.cache.pin(keys)
+        try:
+            # Repeated ranges share a key: each distinct piece is looked up and encoded once
+            pieces = {}  # key -> cached file
+            missing = []  # order index of the first segment of every uncached key
+            seen = set()
+            for order_idx, key in enumerate(keys):
+                if key in seen:
+                    continue
+                seen.add(key)
+                path = self.cache.get(key)
+                if path is not None:
+                    pieces[key] = path
+                else:
+                    missing.append(order_idx)
+
+            hits = len(pieces)
+            cache_text = f"cache: {hits} hit{'s' if hits != 1 else ''}, {len(missing)} to encode"
+            to_encode = sum(segments[idx][3] - segments[idx][2] for idx in missing)
+            encoded = 0.0
+
+            for count, order_idx in enumerate(missing, 1):
+                _, input_file, start, end = segments[order_idx]
+                text = f"Encoding segment {order_idx + 1} ({count}/{len(missing)}, {cache_text})"
+
+                def report(stats, done=encoded, duration=end - start, text=text):
+                    position = done + min(stats.out_time, duration)
+                    progress = min(int(position / to_encode * 100), 98) if to_encode else 0
+                    summary = stats.summary()
+                    self.muxer.update_progress(progress, f"{text}... {summary}".rstrip())
+                    if self.muxer.stats_callback:
+                        self.muxer.stats_callback(stats)
+
+                self.muxer.update_progress(int(encoded / to_encode * 100) if to_encode else 0, f"{text}...")
+                key = keys[order_idx]
+                pieces[key] = self._encode_segment(key, input_file, start, end, video_args, temp_dir, report)
+                encoded += end - start
+
+            self.muxer.update_progress(99, f"Joining {len(segments)} pieces ({cache_text})...")
+            self._join([pieces[key] for key in keys], output_path, temp_dir)
+        finally:
+            self.cache.unpin(keys)
+
+        print(f"Incremental render: {hits} cached, {len(missing)} encoded")
+        return {'hits': hits, 'misses': len(missing)}
+
+    def _encode_segment(self, key, input_file, start, end, video_args, temp_dir, report):
+        """Encode one segment into the cache and return its path"""
+        temp_path = self.cache.temp_path(key)
+        cmd = [
+            'ffmpeg',
+            # Seeking before -i is frame accurate when transcoding
+            '-ss', f'{start:.6f}',
+            '-i', input_file,
+            '-t', f'{end - start:.6f}',
+            '-map', '0:v:0', '-map', '0:a:0?',
+            *video_args,
+            *self.muxer.audio_args,
+            '-y', temp_path
+        ]
+        try:
+            self.muxer.run_ffmpeg_with_progress(cmd, end - start, os.path.join(temp_dir, f'{key}.log'),
+                                                callback=report)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return self.cache.put(key, temp_path)
+
+    def _join(self, pieces, output_path, temp_dir):
+        """Losslessly join the encoded pieces into the output"""
+        piece_list = os.path.join(temp_dir, 'incremental.txt')
+        with open(piece_list, 'w') as f:
+            for piece in pieces:
+                f.write(f"file {self.muxer.concat_quote(piece)}\n")
+
+        cmd = ['ffmpeg', '-v', 'error', '-f', 'concat', '-safe', '0', '-i', piece_list,
+               '-map', '0', '-c', 'copy', '-y', output_path]
+        returncode, _, stderr = self.muxer.run_command(cmd)
+        if returncode != 0:
+            raise Exception(f"ffmpeg error (cmd: {' '.join(cmd)}): {stderr}")
@@ -0,0 +1,252 @@
+"""
+Plain data model for mux jobs
+
+A MuxJob describes what to render (sources, segments, encoder settings and
+output) without referencing any Tk objects, so the same job can be built by
+the GUI or loaded from a JSON/YAML file on a headless render node.
+"""
+import json
+import os
+from dataclasses import dataclass, field, asdict
+from .encoder_profiles import DEFAULT_PROFILE, profile_settings
+
+try:
+    import yaml
+except ImportError:
+    # YAML job files are optional; JSON always works
+    yaml = None
+
+EXPORT_MODES = ('reencode', 'smart', 'direct', 'incremental')
+
+
+def parse_time(value):
+    """
+    Convert a time value to seconds
+
+    Args:
+        value: Number of seconds, or a string in format hh:mm:ss, mm:ss or ss
+
+    Returns:
+        Time in seconds (float)
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    parts = str(value).strip().split(':')
+    if len(parts) > 3 or not all(parts):
+        raise ValueError(f"Invalid time: {value!r}")
+    seconds = 0.0
+    for part in parts:
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+@dataclass
+class SegmentSpec:
+    """A time range of a source, in seconds"""
+    start: float
+    end: float
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+
+@dataclass
+class SourceSpec:
+    """A source file and the segments to keep from it"""
+    path: str
+    segments: list = field(default_factory=list)
+
+
+@dataclass
+class EncoderSettings:
+    """Encoder settings for the compression step ('copy' codecs skip encoding)"""
+    video_codec: str = 'libx265'
+    preset: str = 'medium'
+    crf: int = 23
+    tune: str = ''
+    audio_codec: str = 'libvorbis'
+    audio_quality: int = 5
+    audio_bitrate: str = ''  # e.g. '128k'; used instead of audio_quality when set
+
+    @classmethod
+    def from_profile(cls, name, **overrides):
+        """
+        Build settings from a named profile (see encoder_profiles)
+
+        Args:
+            name: Profile name
+            **overrides: Fields to change on top of the profile
+        """
+        settings = profile_settings(name)
+        settings.update(overrides)
+        return cls(**settings)
+
+    def video_args(self):
+        """Get the ffmpeg video encoder arguments"""
+        if self.video_codec == 'copy':
+            return ['-c:v', 'copy']
+        args = ['-c:v', self.video_codec, '-preset', self.preset, '-crf', str(self.crf)]
+        if self.tune:
+            args += ['-tune', self.tune]
+        return args
+
+    def audio_args(self):
+        """Get the ffmpeg audio encoder arguments"""
+        if self.audio_codec == 'copy':
+            return ['-c:a', 'copy']
+        if self.audio_bitrate:
+            return ['-c:a', self.audio_codec, '-b:a', self.audio_bitrate]
+        return ['-c:a', self.audio_codec, '-q:a', str(self.audio_quality)]
+
+
+@dataclass
+class MuxJob:
+    """Everything needed to render one output file"""
+    sources: list
+    output_path: str
+    encoder: EncoderSettings = field(default_factory=EncoderSettings)
+    export_mode: str = 'reencode'
+    name: str = ''
+    profile: str = ''
+
+    def segment_list(self):
+        """
+        Flatten the job into segments in concat order
+
+        Returns:
+            List of (source_idx, path, start_seconds, end_seconds) tuples
+        """
+        return [(source_idx, source.path, segment.start, segment.end)
+                for source_idx, source in enumerate(self.sources)
+                for segment in source.segments]
+
+    def total_duration(self):
+        """Get the duration of the rendered timeline in seconds"""
+        return sum(end - start for _, _, start, end in self.segment_list())
+
+    def validate(self):
+        """
+        Check the job for errors that can be detected without probing
+
+        Raises:
+            ValueError describing the first problem found
+        """
+        if not self.output_path:
+            raise ValueError("No output path")
+        if self.export_mode not in EXPORT_MODES:
+            raise ValueError(f"Unknown export mode: {self.export_mode}")
+        if self.export_mode == 'direct' and self.encoder.video_codec == 'copy':
+            # Stream copy would start each range at its inpoint, not on a keyframe
+            raise ValueError("Direct export needs a video encoder; use the cut export to stream copy")
+        if not self.segment_list():
+            raise ValueError("No valid segments to process")
+        for source in self.sources:
+            if not os.path.exists(source.path):
+                raise ValueError(f"Source not found: {source.path}")
+            for segment in source.segments:
+                if segment.start < 0 or segment.end <= segment.start:
+                    raise ValueError(f"Invalid segment {segment.start}-{segment.end}s in {source.path}")
+
+    def to_dict(self):
+        """Convert the job to plain JSON-compatible data"""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data, default_profile=DEFAULT_PROFILE):
+        """
+        Build a job from plain data (as loaded from JSON/YAML)
+
+        Segment times may be numbers of seconds or "hh:mm:ss" strings. A
+        named encoder profile is applied first and the encoder fields
+        override it.
+
+        Args:
+            data: Dict with sources, output_path and optional profile,
+                  encoder, export_mode and name
+            default_profile: Profile used when data names none
+
+        Returns:
+            MuxJob object
+        """
+        sources = []
+        for source in data.get('sources', []):
+            segments = [SegmentSpec(parse_time(segment['start']), parse_time(segment['end']))
+                        for segment in source.get('segments', [])]
+            sources.append(SourceSpec(source['path'], segments))
+
+        profile = data.get('profile', '')
+        encoder = EncoderSettings.from_profile(profile or default_profile, **data.get('encoder', {}))
+
+        return cls(
+            sources=sources,
+            output_path=data.get('output_path', ''),
+            encoder=encoder,
+            export_mode=data.get('export_mode', 'reencode'),
+            name=data.get('name', ''),
+            profile=profile,
+        )
+
+    @classmethod
+    def load(cls, path, default_profile=DEFAULT_PROFILE):
+        """
+        Load a job file (.json, .yaml or .yml)
+
+        Relative source and output paths are resolved against the job file's directory.
+
+        Args:
+            path: Job file path
+            default_profile: Profile used when the job file names none
+
+        Returns:
+            MuxJob object
+        """
+        with open(path, 'r') as f:
+            if path.endswith(('.yaml', '.yml')):
+                if yaml is None:
+                    raise Exception("PyYAML is required for YAML job files (pip install pyyaml)")
+                data = yaml.safe_load(f)
+            else:
+                data = json.load(f)
+
+        job = cls.from_dict(data, default_profile)
+        base_dir = os.path.dirname(os.path.abspath(path))
+        for source in job.sources:
+            source.path = os.path.join(base_dir, source.path)
+        if job.output_path:
+            job.output_path = os.path.join(base_dir, job.output_path)
+        if not job.name:
+            job.name = os.path.splitext(os.path.basename(path))[0]
+        return job
+
+    def save(self, path):
+        """Write the job to a JSON file"""
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=4)
+
+    @classmethod
+    def from_editors(cls, editors, output_path, **options):
+        """
+        Build a job from the GUI's FileSegmentEditors (call on the Tk thread)
+
+        Editors without an existing file and segments with an empty start or
+        end are skipped, like the GUI always did.
+
+        Args:
+            editors: List of FileSegmentEditor objects
+            output_path: Path for the output file
+            **options: Extra MuxJob fields (encoder, export_mode, name, profile)
+
+        Returns:
+            MuxJob object
+        """
+        if options.get('profile') and 'encoder' not in options:
+            options['encoder'] = EncoderSettings.from_profile(options['profile'])
+
+        sources = []
+        for editor in editors:
+            source = editor.to_source_spec()
+            if source is not None and source.segments:
+                sources.append(source)
+        return cls(sources=sources, output_path=output_path, **options)
@@ -0,0 +1,291 @@
+import array
+import bisect
+import os
+import subprocess
+import threading
+from .cache_utils import get_cache_dir, identity_key
+
+class KeyframeIndex:
+    """
+    Keyframe index of the first video stream of a source file
+
+    The index is built once with an ffprobe packet listing and stored as
+    packed arrays (keyframe timestamps and byte positions) in the cache
+    directory, keyed by path + size + mtime, so it survives app restarts
+    and is invalidated automatically when the file changes.
+
+    Timestamps are relative to the start of the file (the container's
+    start_time is subtracted), like segment times and ffmpeg's -ss, so
+    sources that don't start at zero (MPEG-TS, many camera files) seek
+    and cut at the right places.
+    """
+
+    MAGIC = b'KFI2'
+    # Part of the cache key; bump when the meaning of the stored data changes
+    VERSION = 2
+
+    # Loaded indexes by cache key, shared by the whole application
+    _indexes = {}
+    _building = {}
+    _lock = threading.Lock()
+
+    def __init__(self, times, positions):
+        """
+        Initialize the KeyframeIndex
+
+        Args:
+            times: array('d') of keyframe timestamps in seconds, sorted
+            positions: array('q') of keyframe byte positions (-1 if unknown)
+        """
+        self.times = times
+        self.positions = positions
+
+    def __len__(self):
+        return len(self.times)
+
+    def keyframe_at_or_before(self, seconds):
+        """
+        Find the last keyframe at or before a timestamp
+
+        Args:
+            seconds: Timestamp in seconds
+
+        Returns:
+            Keyframe time in seconds, or None if there is none
+        """
+        idx = bisect.bisect_right(self.times, seconds) - 1
+        return self.times[idx] if idx >= 0 else None
+
+    def keyframe_at_or_after(self, seconds):
+        """
+        Find the first keyframe at or after a timestamp
+
+        Args:
+            seconds: Timestamp in seconds
+
+        Returns:
+            Keyframe time in seconds, or None if there is none
+        """
+        idx = bisect.bisect_left(self.times, seconds)
+        return self.times[idx] if idx < len(self.times) else None
+
+    def keyframes_between(self, start, end):
+        """
+        List the keyframes inside a time range
+
+        Args:
+            start: Range start in seconds (inclusive)
+            end: Range end in seconds (inclusive)
+
+        Returns:
+            List of keyframe times
+        """
+        lo = bisect.bisect_left(self.times, start)
+        hi = bisect.bisect_right(self.times, end)
+        return list(self.times[lo:hi])
+
+    @classmethod
+    def for_file(cls, path):
+        """
+        Get the index for a source, loading it from disk or building it
+
+        Blocks while ffprobe runs if the index is not cached yet.
+
+        Args:
+            path: Source file path
+
+        Returns:
+            KeyframeIndex object
+        """
+        key = cls._key(path)
+        if key is None:
+            raise Exception(f"File not found: {path}")
+
+        index = cls.cached(path)
+        if index is not None:
+            return index
+
+        # Only one thread builds a given index; the others wait for it
+        with cls._lock:
+            event = cls._building.get(key)
+            owner = event is None
+            if owner:
+                event = threading.Event()
+                cls._building[key] = event
+
+        if not owner:
+            event.wait()
+            index = cls._indexes.get(key)
+            if index is None:
+                raise Exception(f"Could not index keyframes of {path}")
+            return index
+
+        try:
+            index = cls.build(path)
+            index._save(cls._cache_path(key))
+            with cls._lock:
+                cls._indexes[key] = index
+            return index
+        finally:
+            with cls._lock:
+                cls._building.pop(key, None)
+            event.set()
+
+    @classmethod
+    def cached(cls, path):
+        """
+        Get the index for a source only if it is already in memory or on disk
+
+        Args:
+            path: Source file path
+
+        Returns:
+            KeyframeIndex object or None
+        """
+        key = cls._key(path)
+        if key is None:
+            return None
+
+        with cls._lock:
+            index = cls._indexes.get(key)
+        if index is not None:
+            return index
+
+        index = cls._load(cls._cache_path(key))
+        if index is not None:
+            with cls._lock:
+                cls._indexes[key] = index
+        return index
+
+    @classmethod
+    def build_in_background(cls, path, callback=None):
+        """
+        Build (or load) the index for a source on a daemon thread
+
+        Args:
+            path: Source file path
+            callback: Optional function called with the KeyframeIndex (or None
+                      on failure) from the background thread
+        """
+        def worker():
+            try:
+                index = cls.for_file(path)
+            except Exception as e:
+                print(f"Warning: Could not index keyframes of {path}: {e}")
+                index = None
+            if callback:
+                callback(index)
+
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+
+    @classmethod
+    def build(cls, path, muxer=None):
+        """
+        Build an index with ffprobe without touching the cache
+
+        Args:
+            path: Source file path
+            muxer: VideoMuxer to run ffprobe through, so cancelling its job
+                   kills it (None runs it untracked)
+
+        Returns:
+            KeyframeIndex object
+        """
+        cmd = [
+            'ffprobe', '-v', 'error',
+            '-select_streams', 'v:0',
+            '-show_entries', 'packet=pts_time,pos,flags:format=start_time',
+            '-of', 'csv=p=1',
+            path
+        ]
+        popen = muxer.popen if muxer else subprocess.Popen
+        process = popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        try:
+            keyframes, start_time, stderr = cls._read_listing(process)
+        finally:
+            if muxer:
+                muxer.release(process)
+        if process.returncode != 0:
+            raise Exception(f"ffprobe error listing keyframes: {stderr}")
+
+        keyframes.sort()
+        return cls(array.array('d', (t - start_time for t, _ in keyframes)),
+                   array.array('q', (p for _, p in keyframes)))
+
+    @staticmethod
+    def _read_listing(process):
+        """
+        Read the packet listing of a running ffprobe
+
+        Returns:
+            ([(pts_time, pos)] of the keyframes, format start_time, stderr) tuple
+        """
+        # Stream the listing: long files have millions of packets
+        keyframes = []
+        start_time = 0.0
+        for line in process.stdout:
+            fields = line.strip().split(',')
+            if fields[0] == 'format' and len(fields) > 1:
+                try:
+                    start_time = float(fields[1])
+                except ValueError:
+                    pass
+                continue
+            fields = fields[1:]
+            if len(fields) < 3 or 'K' not in fields[2]:
+                continue
+            try:
+                pts_time = float(fields[0])
+            except ValueError:
+                continue
+            try:
+                pos = int(fields[1])
+            except ValueError:
+                pos = -1
+            keyframes.append((pts_time, pos))
+
+        stderr = process.stderr.read()
+        process.wait()
+        return keyframes, start_time, stderr
+
+    @classmethod
+    def _key(cls, path):
+        """Get the cache key of a source (None if the file is missing)"""
+        return identity_key(path, 'keyframes', cls.VERSION)
+
+    @staticmethod
+    def _cache_path(key):
+        """Get the cache file path for an index key"""
+        return os.path.join(get_cache_dir('keyframes'), f'{key}.kfi')
+
+    def _save(self, cache_path):
+        """Write the index to disk (atomically, via a temporary file)"""
+        tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(self.MAGIC)
+                f.write(len(self.times).to_bytes(8, 'little'))
+                self.times.tofile(f)
+                self.positions.tofile(f)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"Warning: Could not save keyframe index: {e}")
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    @classmethod
+    def _load(cls, cache_path):
+        """Read an index from disk, or return None if missing or corrupt"""
+        try:
+            with open(cache_path, 'rb') as f:
+                if f.read(4) != cls.MAGIC:
+                    return None
+                count = int.from_bytes(f.read(8), 'little')
+                times = array.array('d')
+                positions = array.array('q')
+                times.fromfile(f, count)
+                positions.fromfile(f, count)
+            return cls(times, positions)
+        except (OSError, EOFError, ValueError):
+            return None
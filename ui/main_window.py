@@ -1,6 +1,7 @@
 import tkinter as tk
 from .editor_panel import EditorPanel
 from .control_panel import ControlPanel
+from .ui_dispatcher import UIDispatcher
 
 class MainWindow:
     def __init__(self):
@@ -12,6 +13,9 @@ class MainWindow:
         # Modern dark theme
         bg_color = '#1e1e1e'
         self.root.configure(bg=bg_color)
+        
+        # Single main-loop drain for all updates coming from worker threads
+        UIDispatcher.for_widget(self.root)
 
         # Create main container with two sections
         main_container = tk.Frame(self.root, bg=bg_color)
@@ -0,0 +1,300 @@
+import json
+import os
+import statistics
+import subprocess
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from .cache_utils import get_cache_dir, identity_key
+
+@dataclass
+class MediaInfo:
+    """Container and stream metadata of one source file"""
+    path: str
+    duration: float = 0.0
+    format_name: str = ''
+    size: int = 0
+    bit_rate: int = 0  # overall bits per second
+    video_codec: str = ''
+    video_profile: str = ''
+    pix_fmt: str = ''
+    width: int = 0
+    height: int = 0
+    frame_rate: float = 0.0
+    video_bit_rate: int = 0
+    audio_codec: str = ''
+    audio_channels: int = 0
+    audio_sample_rate: int = 0
+    audio_bit_rate: int = 0
+    # Median keyframe distance near the start of the file (0 = unknown)
+    keyframe_interval: float = 0.0
+    # Raw ffprobe stream dicts, for callers that need more than the fields above
+    streams: list = field(default_factory=list)
+
+    @property
+    def has_video(self):
+        return bool(self.video_codec)
+
+    @property
+    def has_audio(self):
+        return bool(self.audio_codec)
+
+    @property
+    def byte_rate(self):
+        """Average bytes per second (the whole size if the duration is unknown)"""
+        return self.size / self.duration if self.duration > 0 else self.size
+
+    def stream(self, codec_type):
+        """Get the raw ffprobe dict of the first stream of a type ('video', 'audio'), or None"""
+        return next((s for s in self.streams if s.get('codec_type') == codec_type), None)
+
+    def to_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def from_ffprobe(cls, path, data):
+        """
+        Build a MediaInfo from ffprobe's JSON output
+
+        Args:
+            path: Source file path
+            data: Parsed output of -show_format -show_streams -show_packets
+        """
+        fmt = data.get('format', {})
+        streams = data.get('streams', [])
+        info = cls(path=path,
+                   duration=_number(fmt.get('duration')),
+                   format_name=fmt.get('format_name', ''),
+                   size=int(_number(fmt.get('size'))),
+                   bit_rate=int(_number(fmt.get('bit_rate'))),
+                   streams=streams)
+
+        video = info.stream('video')
+        if video:
+            info.video_codec = video.get('codec_name', '')
+            info.video_profile = video.get('profile', '')
+            info.pix_fmt = video.get('pix_fmt', '')
+            info.width = int(video.get('width', 0))
+            info.height = int(video.get('height', 0))
+            info.frame_rate = _rate(video.get('avg_frame_rate')) or _rate(video.get('r_frame_rate'))
+            info.video_bit_rate = int(_number(video.get('bit_rate')))
+            info.keyframe_interval = _keyframe_interval(data.get('packets', []), video.get('index'))
+        audio = info.stream('audio')
+        if audio:
+            info.audio_codec = audio.get('codec_name', '')
+            info.audio_channels = int(audio.get('channels', 0))
+            info.audio_sample_rate = int(_number(audio.get('sample_rate')))
+            info.audio_bit_rate = int(_number(audio.get('bit_rate')))
+
+        if not info.size:
+            try:
+                info.size = os.path.getsize(path)
+            except OSError:
+                pass
+        return info
+
+
+def _number(value):
+    """Parse an ffprobe number field ('N/A' and missing values become 0)"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _rate(value):
+    """Parse an ffprobe rational such as '30000/1001'"""
+    if not value or '/' not in value:
+        return _number(value)
+    num, den = value.split('/', 1)
+    den = _number(den)
+    return _number(num) / den if den else 0.0
+
+
+def _keyframe_interval(packets, video_index):
+    """Median distance between the keyframes among the sampled packets"""
+    times = sorted(_number(p.get('pts_time')) for p in packets
+                   if p.get('stream_index') == video_index and 'K' in p.get('flags', '')
+                   and p.get('pts_time') not in (None, 'N/A'))
+    gaps = [b - a for a, b in zip(times, times[1:]) if b > a]
+    return round(statistics.median(gaps), 3) if gaps else 0.0
+
+
+class MediaProbe:
+    """
+    Shared, cached metadata probe for source files
+
+    A probe is one ffprobe call with JSON output that returns the format,
+    every stream and the packets of the first few seconds (for the keyframe
+    interval hint). Results are kept in memory and on disk, keyed by path +
+    size + mtime, so every part of the application probes a file at most
+    once. Probes run on a small thread pool; submit() returns a Future and
+    concurrent requests for the same file share one ffprobe run.
+    """
+
+    # Seconds of packets read for the keyframe interval hint
+    PACKET_SAMPLE_SECONDS = 20
+    MAX_WORKERS = 4
+
+    # Probed files by cache key, shared by the whole application
+    _results = {}
+    _pending = {}
+    _executor = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def submit(cls, path, callback=None):
+        """
+        Probe a file on the probe thread pool
+
+        Args:
+            path: Source file path
+            callback: Optional function called with the MediaInfo (or None on
+                      failure) from a background thread; use a UIDispatcher to
+                      get back to Tk
+
+        Returns:
+            concurrent.futures.Future resolving to a MediaInfo
+        """
+        key = identity_key(path)
+        if key is None:
+            future = Future()
+            future.set_exception(Exception(f"File not found: {path}"))
+        else:
+            with cls._lock:
+                info = cls._results.get(key)
+                future = cls._pending.get(key)
+                if info is not None:
+                    future = Future()
+                    future.set_result(info)
+                elif future is None:
+                    if cls._executor is None:
+                        cls._executor = ThreadPoolExecutor(max_workers=cls.MAX_WORKERS,
+                                                           thread_name_prefix='media-probe')
+                    future = cls._executor.submit(cls._load_or_probe, path, key)
+                    cls._pending[key] = future
+
+        if callback:
+            def done(finished):
+                try:
+                    info = finished.result()
+                except Exception as e:
+                    print(f"Warning: Could not probe {path}: {e}")
+                    info = None
+                callback(info)
+            future.add_done_callback(done)
+        return future
+
+    @classmethod
+    def probe(cls, path):
+        """
+        Get the metadata of a file, probing it if it isn't cached
+
+        Blocks while ffprobe runs; don't call from the Tk main thread.
+
+        Args:
+            path: Source file path
+
+        Returns:
+            MediaInfo object
+
+        Raises:
+            Exception if the file is missing or can't be probed
+        """
+        return cls.submit(path).result()
+
+    @classmethod
+    def cached(cls, path):
+        """
+        Get the metadata of a file only if it is already in memory or on disk
+
+        Args:
+            path: Source file path
+
+        Returns:
+            MediaInfo object or None
+        """
+        key = identity_key(path)
+        if key is None:
+            return None
+        with cls._lock:
+            info = cls._results.get(key)
+        if info is None:
+            info = cls._load(cls._cache_path(key), path)
+            if info is not None:
+                with cls._lock:
+                    cls._results[key] = info
+        return info
+
+    @classmethod
+    def _load_or_probe(cls, path, key):
+        """Worker: read the disk cache or run ffprobe, then publish the result"""
+        try:
+            info = cls._load(cls._cache_path(key), path)
+            if info is None:
+                info = cls.run_ffprobe(path)
+                cls._save(cls._cache_path(key), info)
+            with cls._lock:
+                cls._results[key] = info
+            return info
+        finally:
+            with cls._lock:
+                cls._pending.pop(key, None)
+
+    @classmethod
+    def run_ffprobe(cls, path):
+        """
+        Probe a file with ffprobe without touching the cache
+
+        Args:
+            path: Source file path
+
+        Returns:
+            MediaInfo object
+        """
+        cmd = [
+            'ffprobe', '-v', 'error',
+            '-show_format', '-show_streams',
+            # Packets of the first seconds only: enough for the keyframe interval
+            '-read_intervals', f'%+{cls.PACKET_SAMPLE_SECONDS}',
+            '-show_entries', 'packet=stream_index,pts_time,flags',
+            '-of', 'json',
+            path
+        ]
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        if result.returncode != 0:
+            raise Exception(f"ffprobe error: {result.stderr.strip()}")
+        try:
+            data = json.loads(result.stdout)
+        except ValueError as e:
+            raise Exception(f"ffprobe returned invalid JSON: {e}")
+        return MediaInfo.from_ffprobe(path, data)
+
+    @staticmethod
+    def _cache_path(key):
+        """Get the cache file path for a probe key"""
+        return os.path.join(get_cache_dir('probe'), f'{key}.json')
+
+    @staticmethod
+    def _save(cache_path, info):
+        """Write a probe result to disk (atomically, via a temporary file)"""
+        tmp_path = f'{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(info.to_dict(), f)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"Warning: Could not save probe result: {e}")
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    @staticmethod
+    def _load(cache_path, path):
+        """Read a probe result from disk, or return None if missing or corrupt"""
+        try:
+            with open(cache_path) as f:
+                data = json.load(f)
+            data['path'] = path
+            return MediaInfo(**data)
+        except (OSError, ValueError, TypeError):
+            return None
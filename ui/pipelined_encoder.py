@@ -0,0 +1,186 @@
+import errno
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+class PipelinedEncoder:
+    """
+    Overlap mkvmerge cutting with the ffmpeg encode
+
+    The concat list handed to the encoder names one FIFO per segment.
+    ffmpeg's concat demuxer only opens the next entry once the previous
+    one is exhausted, so segments can be cut while earlier ones are being
+    encoded: a feeder thread streams each finished cut into its FIFO in
+    concat order and deletes it afterwards. At most `lookahead` cut
+    segments exist at any time, which caps the scratch space. The encoder
+    is the same single ffmpeg process as in the sequential path, so the
+    output is identical.
+    """
+
+    def __init__(self, muxer, lookahead):
+        """
+        Initialize the PipelinedEncoder
+
+        Args:
+            muxer: VideoMuxer used to run commands and report progress
+            lookahead: Maximum number of cut segments waiting for the encoder
+        """
+        self.muxer = muxer
+        self.lookahead = max(1, lookahead)
+
+        self._cut_done = 0
+        self._fed = 0
+        self._total = 0
+        self._encode_stats = None
+        self._error = None
+        self._progress_lock = threading.Lock()
+
+    @staticmethod
+    def available():
+        """Check whether the platform supports named pipes"""
+        return hasattr(os, 'mkfifo')
+
+    def encode(self, segments, output_path, video_args, total_duration, temp_dir):
+        """
+        Cut and encode the segments to output_path
+
+        Args:
+            segments: List of (source_idx, input_file, start, end) in concat order
+            output_path: Path for the output file
+            video_args: Video encoder arguments
+            total_duration: Timeline duration in seconds
+
+        Returns:
+            Final EncodeProgress of the encoder
+        """
+        cut_jobs = self.muxer._build_per_segment_jobs(segments, temp_dir)
+        self._total = len(cut_jobs)
+        self._cut_done = 0
+        self._fed = 0
+        self._error = None
+        self.muxer._cancel_event.clear()
+
+        fifos = []
+        for order_idx in range(len(cut_jobs)):
+            fifo = os.path.join(temp_dir, f'pipe_{order_idx}.mkv')
+            os.mkfifo(fifo)
+            fifos.append(fifo)
+
+        concat_file = os.path.join(temp_dir, 'concat.txt')
+        with open(concat_file, 'w') as f:
+            for fifo in fifos:
+                f.write(f"file {self.muxer.concat_quote(fifo)}\n")
+
+        encoder_done = threading.Event()
+        feeder = threading.Thread(target=self._feed, args=(cut_jobs, fifos, encoder_done), daemon=True)
+        feeder.start()
+
+        cmd = [
+            'ffmpeg',
+            '-f', 'concat',
+            '-safe', '0',
+            '-i', concat_file,
+            *video_args,
+            *self.muxer.audio_args,
+            '-y',
+            output_path
+        ]
+        try:
+            stats = self.muxer.run_ffmpeg_with_progress(cmd, total_duration,
+                                                        os.path.join(temp_dir, 'ffmpeg.log'),
+                                                        callback=self._report_encode)
+        except Exception:
+            # A failed cut is the root cause; the encoder only saw a broken pipe
+            encoder_done.set()
+            feeder.join()
+            if self._error is not None:
+                raise self._error
+            raise
+        encoder_done.set()
+        feeder.join()
+        if self._error is not None:
+            raise self._error
+        return stats
+
+    def _feed(self, cut_jobs, fifos, encoder_done):
+        """Cut segments ahead of the encoder and stream them into their FIFOs in order"""
+        fed = threading.Condition(self._progress_lock)
+        workers = max(1, min(self.muxer.cut_workers, self.lookahead))
+
+        def cut(order_idx, cmd):
+            # Segment N may only be cut once segment N - lookahead has been fed,
+            # so scratch usage stays bounded and cuts never overtake the feeder
+            with fed:
+                while order_idx >= self._fed + self.lookahead:
+                    if encoder_done.is_set():
+                        raise Exception("Encoder stopped")
+                    fed.wait(0.1)
+            self.muxer._run_cut(cmd)
+            with self._progress_lock:
+                self._cut_done += 1
+            self._report()
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(cut, order_idx, cmd) for order_idx, (cmd, _) in enumerate(cut_jobs)]
+                for future, (_, outputs), fifo in zip(futures, cut_jobs, fifos):
+                    _, segment_file = outputs[0]
+                    try:
+                        future.result()
+                        if not os.path.exists(segment_file):
+                            raise Exception(f"mkvmerge did not create expected segment: {segment_file}")
+                        self._stream(segment_file, fifo, encoder_done)
+                    finally:
+                        if os.path.exists(segment_file):
+                            os.remove(segment_file)
+                    with fed:
+                        self._fed += 1
+                        fed.notify_all()
+        except Exception as e:
+            if not encoder_done.is_set():
+                self._error = e
+            # Unblock the encoder: stop queued cuts and kill everything still running
+            self.muxer._cancel_event.set()
+            self.muxer.kill_active_processes()
+
+    def _stream(self, segment_file, fifo, encoder_done):
+        """Copy a cut segment into the FIFO the encoder will read it from"""
+        # Opening a FIFO for writing blocks until the reader opens it; poll instead
+        # so a dead encoder can't hang the feeder
+        while True:
+            try:
+                fd = os.open(fifo, os.O_WRONLY | os.O_NONBLOCK)
+                break
+            except OSError as e:
+                if e.errno != errno.ENXIO:
+                    raise
+            if encoder_done.is_set():
+                raise Exception("Encoder stopped before reading all segments")
+            time.sleep(0.05)
+
+        os.set_blocking(fd, True)
+        with open(fd, 'wb') as pipe, open(segment_file, 'rb') as source:
+            shutil.copyfileobj(source, pipe, 1024 * 1024)
+
+    def _report_encode(self, stats):
+        """Encoder telemetry callback"""
+        with self._progress_lock:
+            self._encode_stats = stats
+        if self.muxer.stats_callback:
+            self.muxer.stats_callback(stats)
+        self._report()
+
+    def _report(self):
+        """Show both pipeline stages in one progress line"""
+        with self._progress_lock:
+            stats = self._encode_stats
+            cut_text = f"cut {self._cut_done}/{self._total}"
+        if stats is None:
+            self.muxer.update_progress(0, f"Cutting and compressing... {cut_text}, encoder starting")
+            return
+        summary = stats.summary()
+        self.muxer.update_progress(min(stats.percent, 99),
+                                   f"Cutting and compressing... {cut_text}, encoded {stats.percent}%"
+                                   + (f" ({summary})" if summary else ""))
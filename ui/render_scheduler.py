@@ -0,0 +1,300 @@
+import itertools
+import os
+import threading
+import time
+from .video_muxer import VideoMuxer
+
+class RenderJob:
+    """A queued or running mux job and its state"""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    CANCELLING = 'cancelling'  # cancel requested, processes still exiting
+    DONE = 'done'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+
+    def __init__(self, job_id, job, priority, background, cores):
+        self.id = job_id
+        self.job = job
+        self.priority = priority
+        self.background = background
+        self.requested_cores = cores
+        self.cores = None
+        self.state = self.QUEUED
+        self.progress = 0
+        self.text = "Queued"
+        self.error = None
+        self.stats = None  # latest EncodeProgress as a dict
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.muxer = None
+        self._order = 0
+
+    @property
+    def name(self):
+        return self.job.name or os.path.basename(self.job.output_path)
+
+    @property
+    def finished(self):
+        return self.state in (self.DONE, self.FAILED, self.CANCELLED)
+
+    @property
+    def active(self):
+        """Whether the job holds its cores (running, or cancelled but not exited yet)"""
+        return self.state in (self.RUNNING, self.CANCELLING)
+
+    def snapshot(self):
+        """Get a plain dict describing the job (safe to hand to other threads)"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'output_path': self.job.output_path,
+            'state': self.state,
+            'priority': self.priority,
+            'background': self.background,
+            'cores': self.cores,
+            'progress': self.progress,
+            'text': self.text,
+            'error': self.error,
+            'stats': self.stats,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class RenderScheduler:
+    """
+    Runs many mux jobs concurrently within a CPU core budget
+
+    Queued jobs start in priority order (lower value first, then queue
+    order) whenever enough cores are free. Each running job gets a core
+    budget that limits its x265 thread pools and mkvmerge concurrency, so
+    concurrent jobs never oversubscribe the machine. A job never gets more
+    than 1/max_concurrent of the budget, which leaves room for jobs that
+    are queued later. Background jobs run
+    their processes under nice/ionice so interactive work stays responsive.
+    """
+
+    def __init__(self, total_cores=None, min_cores_per_job=2, max_concurrent=2, on_update=None,
+                 muxer_options=None):
+        """
+        Initialize the RenderScheduler
+
+        Args:
+            total_cores: Cores available to all jobs together (None or 0 = CPU count)
+            min_cores_per_job: Smallest budget a job is started with
+            max_concurrent: Number of jobs the budget is meant to be shared by;
+                            one job gets at most total_cores // max_concurrent
+            on_update: Function called (from any thread) whenever a job changes
+            muxer_options: Extra keyword arguments for every VideoMuxer
+        """
+        self.total_cores = total_cores or os.cpu_count() or 1
+        self.min_cores_per_job = max(1, min(min_cores_per_job, self.total_cores))
+        self.max_concurrent = max(1, max_concurrent or 1)
+        self.on_update = on_update
+        self.muxer_options = muxer_options or {}
+
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+
+        threading.Thread(target=self._dispatch_loop, daemon=True).start()
+
+    def submit(self, job, priority=0, background=False, cores=None):
+        """
+        Queue a job
+
+        Args:
+            job: MuxJob to render
+            priority: Lower values start first
+            background: Run the job's processes at reduced CPU and I/O priority
+            cores: Fixed core budget (None = share the free cores)
+
+        Returns:
+            Job id
+        """
+        with self._condition:
+            render_job = RenderJob(next(self._ids), job, priority, background, cores)
+            render_job._order = next(self._order)
+            self._jobs[render_job.id] = render_job
+            self._condition.notify_all()
+        self._notify()
+        return render_job.id
+
+    def jobs(self):
+        """
+        Inspect the queue
+
+        Returns:
+            List of job snapshots: running jobs first, then queued jobs in
+            the order they will start, then finished jobs
+        """
+        with self._condition:
+            running = [job for job in self._jobs.values() if job.active]
+            queued = self._queued_in_order()
+            finished = sorted((job for job in self._jobs.values() if job.finished),
+                              key=lambda job: job.finished_at or 0)
+            return [job.snapshot() for job in running + queued + finished]
+
+    def set_priority(self, job_id, priority):
+        """Change the priority of a queued job"""
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None or job.state != RenderJob.QUEUED:
+                return False
+            job.priority = priority
+            self._condition.notify_all()
+        self._notify()
+        return True
+
+    def move(self, job_id, offset):
+        """
+        Move a queued job up (negative offset) or down in the queue
+
+        The job takes over the priority of the job it passes, so the new
+        position sticks.
+        """
+        with self._condition:
+            queued = self._queued_in_order()
+            positions = [job.id for job in queued]
+            if job_id not in positions:
+                return False
+            old_idx = positions.index(job_id)
+            new_idx = max(0, min(len(queued) - 1, old_idx + offset))
+            if new_idx == old_idx:
+                return False
+
+            job = queued.pop(old_idx)
+            queued.insert(new_idx, job)
+            # Renumber the queue so the new order is explicit
+            for idx, queued_job in enumerate(queued):
+                queued_job._order = idx
+            neighbour = queued[new_idx + 1] if new_idx + 1 < len(queued) else queued[new_idx - 1]
+            job.priority = neighbour.priority
+            self._condition.notify_all()
+        self._notify()
+        return True
+
+    def cancel(self, job_id):
+        """Cancel a queued job or kill a running one"""
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished or job.state == RenderJob.CANCELLING:
+                return False
+            if job.state == RenderJob.QUEUED:
+                job.state = RenderJob.CANCELLED
+                job.text = "Cancelled"
+                job.finished_at = time.time()
+            else:
+                # Keep the job's cores until its processes have exited (see _run)
+                job.state = RenderJob.CANCELLING
+                job.text = "Cancelling..."
+                if job.muxer:
+                    job.muxer.cancel()
+            self._condition.notify_all()
+        self._notify()
+        return True
+
+    def clear_finished(self):
+        """Forget finished jobs"""
+        with self._condition:
+            for job_id in [job.id for job in self._jobs.values() if job.finished]:
+                del self._jobs[job_id]
+        self._notify()
+
+    def wait(self):
+        """Block until no job is queued or running"""
+        with self._condition:
+            while any(not job.finished for job in self._jobs.values()):
+                self._condition.wait()
+
+    def _queued_in_order(self):
+        """Queued jobs in start order (caller holds the lock)"""
+        queued = [job for job in self._jobs.values() if job.state == RenderJob.QUEUED]
+        return sorted(queued, key=lambda job: (job.priority, job._order))
+
+    def _free_cores(self):
+        """Cores not assigned to running jobs (caller holds the lock)"""
+        used = sum(job.cores for job in self._jobs.values() if job.active)
+        return self.total_cores - used
+
+    def _dispatch_loop(self):
+        """Start queued jobs whenever their core budget fits"""
+        while True:
+            with self._condition:
+                while True:
+                    queued = self._queued_in_order()
+                    free = self._free_cores()
+                    if queued and free >= self._cores_for(queued[0], free, len(queued)):
+                        break
+                    self._condition.wait()
+
+                job = queued[0]
+                job.cores = self._cores_for(job, free, len(queued))
+                job.state = RenderJob.RUNNING
+                job.text = "Starting..."
+                job.started_at = time.time()
+
+            self._notify()
+            threading.Thread(target=self._run, args=(job,), daemon=True).start()
+
+    def _cores_for(self, job, free, queued_count):
+        """Decide the core budget for the next job to start"""
+        if job.requested_cores:
+            return min(job.requested_cores, self.total_cores)
+        # Share the free cores between the waiting jobs, but keep a share free for
+        # jobs queued later, and never go below the minimum
+        share = min(free // max(1, queued_count), self.total_cores // self.max_concurrent)
+        return max(self.min_cores_per_job, min(free, share))
+
+    def _run(self, job):
+        """Render one job (runs on its own thread)"""
+        # Progress arrives on the muxer's threads; snapshot() and cancel() touch the same fields
+        def progress(value, text):
+            with self._condition:
+                job.progress = value
+                if job.state != RenderJob.CANCELLING:
+                    job.text = text
+            self._notify()
+
+        def stats(encode_progress):
+            stats = encode_progress.to_dict()
+            with self._condition:
+                job.stats = stats
+
+        muxer = VideoMuxer(progress_callback=progress, stats_callback=stats, core_budget=job.cores,
+                           background=job.background, **self.muxer_options)
+        with self._condition:
+            job.muxer = muxer
+            cancelled = job.state == RenderJob.CANCELLING
+        if cancelled:
+            muxer.cancel()
+
+        try:
+            muxer.process_job(job.job)
+            state, text, error = RenderJob.DONE, "Complete!", None
+        except Exception as e:
+            state, text, error = RenderJob.FAILED, "Error occurred", str(e)
+
+        with self._condition:
+            if job.state == RenderJob.CANCELLING:
+                state, text, error = RenderJob.CANCELLED, "Cancelled", None
+            job.state = state
+            job.text = text
+            job.error = error
+            job.finished_at = time.time()
+            job.muxer = None
+            self._condition.notify_all()
+        self._notify()
+
+    def _notify(self):
+        """Tell the listener that the queue changed"""
+        if self.on_update:
+            try:
+                self.on_update()
+            except Exception as e:
+                print(f"Error in render queue listener: {e}")
@@ -0,0 +1,81 @@
+import math
+
+class RowVirtualizer:
+    """
+    Keeps widgets only for the editors and segments in or near the viewport
+
+    Editors outside the area of one viewport height above and below the
+    visible one are collapsed to an empty frame of their expanded height,
+    so only the few editors on screen have header widgets. Within an
+    expanded editor, segments are laid out in fixed-height slots, so the
+    segments overlapping the area follow from the scroll offset by
+    arithmetic alone, without measuring any widget. Those segments are
+    bound to a row (widgets and thumbnails); rows that scroll out go back
+    to their editor's pool and are reused for the next segments that
+    scroll in. Updates are coalesced to one pass per idle cycle and never
+    force a geometry flush: an editor expanded in one pass gets its rows
+    in the next, once Tk has laid it out.
+    """
+
+    def __init__(self, canvas, get_editors, margin=1.0):
+        """
+        Initialize the RowVirtualizer
+
+        Args:
+            canvas: Canvas that scrolls the editors
+            get_editors: Function returning every FileSegmentEditor in layout order
+            margin: Extra area kept expanded above and below the viewport,
+                    in viewport heights
+        """
+        self.canvas = canvas
+        self.get_editors = get_editors
+        self.margin = margin
+
+        self._scheduled = None
+
+    def schedule(self, *args):
+        """Request an update on the next idle cycle (usable as an event handler)"""
+        if self._scheduled is None:
+            self._scheduled = self.canvas.after_idle(self.update)
+
+    def update(self):
+        """Expand the editors near the viewport, bind their visible rows and collapse the rest"""
+        self._scheduled = None
+        # A minimized window gets a Configure event (and a new pass) when it comes back
+        if not self.canvas.winfo_exists() or not self.canvas.winfo_ismapped():
+            return
+
+        view_height = self.canvas.winfo_height()
+        canvas_top = self.canvas.winfo_rooty()
+        top = -view_height * self.margin
+        bottom = view_height * (1 + self.margin)
+
+        pending = False
+        for editor in self.get_editors():
+            if not editor.frame.winfo_exists():
+                continue
+            editor_top = editor.frame.winfo_rooty() - canvas_top
+            # Editors packed since the last layout pass have no size yet; use their estimate
+            editor_height = editor.frame.winfo_height() if editor.frame.winfo_ismapped() else editor.estimated_height()
+            if editor_top + editor_height < top or editor_top > bottom:
+                # Never pull the widgets out from under the field being edited
+                if editor.expanded and not editor.has_focus():
+                    editor.collapse()
+                continue
+            if not editor.expanded:
+                editor.expand()
+            if not editor.segments_frame.winfo_ismapped():
+                # Expanded but not laid out yet; its slots have no position
+                pending = True
+                continue
+
+            # Slot i spans offset + i*h .. offset + (i+1)*h relative to the viewport
+            offset = editor.segments_frame.winfo_rooty() - canvas_top
+            height = editor.row_height()
+            first = max(0, math.floor((top - offset) / height))
+            last = min(len(editor.segments), math.ceil((bottom - offset) / height))
+            editor.show_rows(first, max(first, last))
+
+        if pending:
+            # Rows of newly expanded editors are bound once Tk has placed them
+            self.schedule()
@@ -0,0 +1,293 @@
+import os
+import re
+import subprocess
+import threading
+import zipfile
+from .cache_utils import get_cache_dir, identity_key
+from .media_probe import MediaProbe
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy is optional; without it the editor just doesn't offer scene suggestions
+    np = None
+
+class SceneAnalysis:
+    """
+    Per-frame change scores of one source
+
+    Scores are kept for every sampled frame, so suggestions for another
+    threshold or minimum scene length come from the cached analysis
+    without decoding the file again.
+    """
+
+    def __init__(self, times, scores):
+        """
+        Initialize the SceneAnalysis
+
+        Args:
+            times: Array of sampled frame timestamps in seconds
+            scores: Array of change scores (0..1) against the previous sample
+        """
+        self.times = times
+        self.scores = scores
+
+    def __len__(self):
+        return len(self.times)
+
+    def changes(self, threshold=0.3, min_scene_seconds=1.0):
+        """
+        Pick the scene changes
+
+        Samples scoring above the threshold are candidates; of candidates
+        closer together than min_scene_seconds only the strongest is kept
+        (fades and flashes otherwise produce a burst of cuts).
+
+        Args:
+            threshold: Minimum change score
+            min_scene_seconds: Minimum distance between two changes
+
+        Returns:
+            List of (seconds, score) tuples in time order
+        """
+        candidates = np.flatnonzero(self.scores >= threshold)
+        picked = []
+        for idx in candidates:
+            time, score = float(self.times[idx]), float(self.scores[idx])
+            if picked and time - picked[-1][0] < min_scene_seconds:
+                if score > picked[-1][1]:
+                    picked[-1] = (time, score)
+                continue
+            picked.append((time, score))
+        return picked
+
+
+class SceneDetector:
+    """
+    Finds scene changes by streaming tiny grayscale frames into NumPy
+
+    ffmpeg decodes, samples and downscales the video to WIDTH x HEIGHT
+    grayscale and writes raw bytes to a pipe. The frames are read in
+    batches straight into an array, and each sample is scored against
+    the previous one by mean absolute pixel difference and by the change
+    of its 32-bin luma histogram, all vectorized over the batch. Long
+    files are sampled at their keyframes only, which skips decoding all
+    other frames; shorter ones at a reduced frame rate. The timestamp of
+    every frame comes from the same ffmpeg run (a showinfo filter at the
+    end of the chain), so scores and times can't drift apart. Results are
+    cached per source on disk, like the keyframe index.
+    """
+
+    WIDTH = 64
+    HEIGHT = 36
+    HISTOGRAM_BINS = 32
+    BATCH_FRAMES = 512
+
+    # Sampling for 'auto': files longer than this are analysed at keyframes only
+    LONG_FILE_SECONDS = 20 * 60
+    SAMPLE_FPS = 4
+
+    # Part of the cache key; bump when the meaning of the stored data changes
+    VERSION = 2
+
+    SHOWINFO_PTS = re.compile(r'Parsed_showinfo.*?pts_time:\s*(-?[\d.]+)')
+
+    # Loaded analyses by cache key, shared by the whole application
+    _analyses = {}
+    _lock = threading.Lock()
+
+    def __init__(self, sample='auto', fps=SAMPLE_FPS):
+        """
+        Initialize the SceneDetector
+
+        Args:
+            sample: 'keyframes', 'fps' or 'auto' (keyframes for long files)
+            fps: Sample rate for the 'fps' mode
+        """
+        if sample not in ('auto', 'keyframes', 'fps'):
+            raise ValueError(f"Unknown sample mode: {sample}")
+        self.sample = sample
+        self.fps = fps
+
+    @staticmethod
+    def available():
+        """Check whether NumPy is installed"""
+        return np is not None
+
+    def analyze(self, path):
+        """
+        Get the scene analysis of a source, from the cache or by decoding it
+
+        Blocks while ffmpeg runs; don't call from the Tk main thread.
+
+        Args:
+            path: Source file path
+
+        Returns:
+            SceneAnalysis object
+        """
+        if np is None:
+            raise Exception("Scene detection needs NumPy (pip install numpy)")
+
+        sample = self._resolve_sample(path)
+        key = identity_key(path, 'scenes', self.VERSION, sample, self.fps, self.WIDTH, self.HEIGHT)
+        if key is None:
+            raise Exception(f"File not found: {path}")
+
+        with self._lock:
+            analysis = self._analyses.get(key)
+        if analysis is not None:
+            return analysis
+
+        cache_path = os.path.join(get_cache_dir('scenes'), f'{key}.npz')
+        analysis = self._load(cache_path)
+        if analysis is None:
+            analysis = self._analyze_stream(path, sample)
+            self._save(cache_path, analysis)
+        with self._lock:
+            self._analyses[key] = analysis
+        return analysis
+
+    def analyze_in_background(self, path, callback):
+        """
+        Run analyze() on a daemon thread
+
+        Args:
+            path: Source file path
+            callback: Function called with the SceneAnalysis (or None on
+                      failure) from the background thread
+        """
+        def worker():
+            try:
+                analysis = self.analyze(path)
+            except Exception as e:
+                print(f"Warning: Could not detect scenes in {path}: {e}")
+                analysis = None
+            callback(analysis)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _resolve_sample(self, path):
+        """Pick the sampling mode for 'auto' from the source duration"""
+        if self.sample != 'auto':
+            return self.sample
+        try:
+            duration = MediaProbe.probe(path).duration
+        except Exception:
+            duration = 0
+        return 'keyframes' if duration > self.LONG_FILE_SECONDS else 'fps'
+
+    def _analyze_stream(self, path, sample):
+        """Decode the sampled frames and score them batch by batch"""
+        # showinfo logs the timestamp of every frame that reaches the pipe (at info level)
+        scale = f'scale={self.WIDTH}:{self.HEIGHT}:flags=area,format=gray,showinfo'
+        cmd = ['ffmpeg', '-hide_banner', '-nostats', '-v', 'info']
+        if sample == 'keyframes':
+            # The decoder drops everything but keyframes; one output frame per keyframe
+            cmd += ['-skip_frame', 'nokey', '-i', path, '-vf', scale]
+        else:
+            cmd += ['-i', path, '-vf', f'fps={self.fps},{scale}']
+        # Passthrough: every filtered (and logged) frame is written exactly once
+        cmd += ['-map', '0:v:0', '-an', '-sn', '-fps_mode', 'passthrough',
+                '-f', 'rawvideo', '-pix_fmt', 'gray', 'pipe:1']
+
+        frame_bytes = self.WIDTH * self.HEIGHT
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+        # Drain the log while frames are read, so a full stderr pipe can't stall ffmpeg
+        times = []
+        errors = []
+
+        def read_log():
+            for line in process.stderr:
+                line = line.decode(errors='replace')
+                match = self.SHOWINFO_PTS.search(line)
+                if match:
+                    times.append(float(match.group(1)))
+                elif 'Parsed_showinfo' not in line:
+                    errors.append(line.rstrip())
+
+        log_reader = threading.Thread(target=read_log, daemon=True)
+        log_reader.start()
+        scores = []
+        previous = None
+        try:
+            while True:
+                data = process.stdout.read(frame_bytes * self.BATCH_FRAMES)
+                count = len(data) // frame_bytes
+                if count == 0:
+                    break
+                frames = np.frombuffer(data[:count * frame_bytes], dtype=np.uint8).reshape(count, -1)
+                batch_scores, previous = self.score_batch(frames, previous)
+                scores.append(batch_scores)
+            process.wait()
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            log_reader.join()
+        if process.returncode != 0:
+            log = '\n'.join(errors[-10:]).strip()
+            raise Exception(f"ffmpeg error analysing scenes: {log}")
+
+        scores = np.concatenate(scores) if scores else np.zeros(0, dtype=np.float32)
+        if len(times) != len(scores):
+            raise Exception(f"ffmpeg reported {len(times)} timestamps for {len(scores)} frames")
+        return SceneAnalysis(np.asarray(times, dtype=np.float64), scores)
+
+    @classmethod
+    def score_batch(cls, frames, previous=None):
+        """
+        Score each frame against the one before it
+
+        Args:
+            frames: uint8 array of shape (count, pixels)
+            previous: Last frame of the previous batch (None at the start)
+
+        Returns:
+            (scores, last_frame): float32 scores of shape (count,) in 0..1
+            (the first frame of the file scores 0) and the frame to pass as
+            previous for the next batch
+        """
+        if previous is not None:
+            stacked = np.vstack([previous[np.newaxis], frames])
+        else:
+            stacked = np.vstack([frames[:1], frames])
+
+        pixels = stacked.shape[1]
+        # Mean absolute difference of consecutive frames
+        diff = np.abs(np.diff(stacked.astype(np.int16), axis=0)).mean(axis=1) / 255.0
+
+        # Luma histograms of all frames at once: offset each frame's bins so a
+        # single bincount counts every frame
+        shift = 8 - int(np.log2(cls.HISTOGRAM_BINS))
+        bins = (stacked >> shift).astype(np.int64)
+        bins += (np.arange(len(stacked)) * cls.HISTOGRAM_BINS)[:, np.newaxis]
+        histograms = np.bincount(bins.ravel(), minlength=len(stacked) * cls.HISTOGRAM_BINS)
+        histograms = histograms.reshape(len(stacked), cls.HISTOGRAM_BINS) / pixels
+        # Total variation distance between consecutive histograms (0..1)
+        hist_diff = np.abs(np.diff(histograms, axis=0)).sum(axis=1) / 2
+
+        scores = ((diff + hist_diff) / 2).astype(np.float32)
+        return scores, frames[-1]
+
+    @staticmethod
+    def _save(cache_path, analysis):
+        """Write an analysis to disk (atomically, via a temporary file)"""
+        tmp_path = f'{cache_path}.{os.getpid()}.tmp.npz'
+        try:
+            np.savez(tmp_path, times=analysis.times, scores=analysis.scores)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"Warning: Could not save scene analysis: {e}")
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    @staticmethod
+    def _load(cache_path):
+        """Read an analysis from disk, or return None if missing or corrupt"""
+        try:
+            with np.load(cache_path) as data:
+                return SceneAnalysis(data['times'], data['scores'])
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            return None
@@ -0,0 +1,395 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from .cache_utils import get_cache_dir
+from .media_probe import MediaProbe
+from .segment_cache import SegmentCache
+
+class ScratchSpaceError(Exception):
+    """Raised before a job starts when no scratch location has enough free space"""
+
+
+class ScratchManager:
+    """
+    Picks and cleans up scratch directories for jobs
+
+    Candidate locations are the configured scratch directories, the system
+    temp directory and the output file's directory. They are ranked by
+    speed (tmpfs, then SSD/NVMe, then rotating disks; configured order breaks
+    ties) and a job gets the fastest one with room for its estimated
+    intermediates. Space taken by other running jobs of this process is
+    reserved, so concurrent jobs don't all pick the same nearly full disk.
+
+    Scratch directories carry the owning process id in their name, and
+    every allocated directory is recorded in a registry under the cache
+    directory until it is released. A startup sweep removes the leftovers
+    of crashed processes wherever they were created, including a job's
+    output directory.
+
+    Incremental exports encode straight into the segment cache, so their
+    preflight checks the free space of the cache's device instead, for the
+    segments that aren't cached yet.
+    """
+
+    PREFIX = 'tk_video_muxer-'
+
+    # Safety margin on top of the estimate: container overhead, logs, rounding
+    MARGIN = 1.1
+    MIN_BYTES = 64 * 1024 * 1024
+
+    # Bytes reserved by running jobs, per device
+    _reserved = {}
+    _lock = threading.Lock()
+
+    def __init__(self, scratch_dirs=None, segment_cache_bytes=None):
+        """
+        Initialize the ScratchManager
+
+        Args:
+            scratch_dirs: Preferred scratch directories (fastest first)
+            segment_cache_bytes: Size limit of the segment cache (None keeps the current one)
+        """
+        self.scratch_dirs = [os.path.abspath(os.path.expanduser(path)) for path in scratch_dirs or []]
+        self.segment_cache_bytes = segment_cache_bytes
+        self._allocations = {}  # temp_dir -> [(device, reserved bytes)]
+
+    def candidates(self, output_path=None):
+        """
+        List the usable scratch locations, fastest first
+
+        Args:
+            output_path: Output file of the job (its directory is a candidate)
+
+        Returns:
+            List of directory paths
+        """
+        paths = list(self.scratch_dirs)
+        paths.append(tempfile.gettempdir())
+        if output_path:
+            paths.append(os.path.dirname(os.path.abspath(output_path)))
+
+        seen = set()
+        usable = []
+        for order, path in enumerate(paths):
+            if path in seen or not os.path.isdir(path) or not os.access(path, os.W_OK):
+                continue
+            seen.add(path)
+            usable.append((self.speed_rank(path), order, path))
+        return [path for _, _, path in sorted(usable)]
+
+    def allocate(self, job, chunked=False, lookahead=0, split_streams=False):
+        """
+        Create the scratch directory for a job
+
+        Args:
+            job: MuxJob to render
+            chunked: Whether the job will use the chunked encoder
+            lookahead: Segments cut ahead of a pipelined encode (0 = not pipelined)
+            split_streams: Whether streams are encoded to separate files before muxing
+
+        Returns:
+            (temp_dir, estimated_bytes) tuple
+
+        Raises:
+            ScratchSpaceError if no location has enough free space
+        """
+        # Estimates probe the sources, so they run before the lock is taken
+        needed = self.estimate_bytes(job, chunked, lookahead, split_streams)
+        cache_needed = self.estimate_cache_bytes(job)
+        candidates = self.candidates(job.output_path)
+        free_by_path = {}
+
+        with self._lock:
+            reservations = self._reserve_cache_space(cache_needed)
+            for path in candidates:
+                device = os.stat(path).st_dev
+                free = shutil.disk_usage(path).free - self._reserved.get(device, 0)
+                free_by_path[path] = free
+                if free >= needed:
+                    temp_dir = tempfile.mkdtemp(prefix=f'{self.PREFIX}{os.getpid()}-', dir=path)
+                    self._register(temp_dir)
+                    self._reserved[device] = self._reserved.get(device, 0) + needed
+                    reservations.append((device, needed))
+                    self._allocations[temp_dir] = reservations
+                    return temp_dir, needed
+            self._unreserve(reservations)
+
+        locations = ', '.join(f"{path} ({self.format_bytes(free)} free)" for path, free in free_by_path.items())
+        raise ScratchSpaceError(
+            f"Not enough scratch space: this job needs about {self.format_bytes(needed)} of temporary "
+            f"files, but no location has room ({locations or 'no writable location'}). "
+            f"Add a larger directory to scratch_dirs or use the 'direct' export mode.")
+
+    def release(self, temp_dir):
+        """Delete a scratch directory and drop its reservation"""
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        self._unregister(temp_dir)
+        with self._lock:
+            self._unreserve(self._allocations.pop(temp_dir, []))
+
+    def estimate_cache_bytes(self, job):
+        """
+        Estimate the segment cache space an incremental export may write
+
+        Only segments missing from the cache are encoded, each distinct
+        range once. Encoded segments are rarely larger than the selected
+        material, so its size is used as the upper bound, capped at the
+        cache's size limit.
+
+        Args:
+            job: MuxJob to render
+
+        Returns:
+            Estimated bytes, including the safety margin (0 for other modes
+            or when every segment is cached)
+        """
+        if job.export_mode != 'incremental' or job.encoder.video_codec == 'copy':
+            return 0
+        cache = SegmentCache.shared(self.segment_cache_bytes)
+        video_args = job.encoder.video_args()
+        audio_args = job.encoder.audio_args()
+
+        missing = {}  # key -> estimated bytes
+        for source in job.sources:
+            bitrate = None
+            for segment in source.segments:
+                key = SegmentCache.make_key(source.path, segment.start, segment.end, video_args, audio_args)
+                if key is None or key in missing or os.path.exists(cache.path_for(key)):
+                    continue
+                if bitrate is None:
+                    bitrate = self.source_byte_rate(source.path)
+                missing[key] = segment.duration * bitrate
+        if not missing:
+            return 0
+        return min(int(sum(missing.values()) * self.MARGIN) + self.MIN_BYTES, cache.max_bytes)
+
+    def _reserve_cache_space(self, needed):
+        """
+        Reserve segment cache space for an incremental export (caller holds the lock)
+
+        Args:
+            needed: Bytes from estimate_cache_bytes()
+
+        Returns:
+            List of (device, bytes) reservations
+
+        Raises:
+            ScratchSpaceError if the cache's device doesn't have enough free space
+        """
+        if not needed:
+            return []
+        cache_dir = SegmentCache.shared(self.segment_cache_bytes).cache_dir
+        device = os.stat(cache_dir).st_dev
+        free = shutil.disk_usage(cache_dir).free - self._reserved.get(device, 0)
+        if free < needed:
+            raise ScratchSpaceError(
+                f"Not enough space for the segment cache: this incremental export may write about "
+                f"{self.format_bytes(needed)} to {cache_dir}, which has {self.format_bytes(free)} free. "
+                f"Free up space there or use another export mode.")
+        self._reserved[device] = self._reserved.get(device, 0) + needed
+        return [(device, needed)]
+
+    def _unreserve(self, reservations):
+        """Give back reserved bytes (caller holds the lock)"""
+        for device, reserved in reservations:
+            self._reserved[device] = max(0, self._reserved.get(device, 0) - reserved)
+
+    @staticmethod
+    def _registry_entry(temp_dir):
+        """Get the registry file that records a scratch directory"""
+        digest = hashlib.sha1(temp_dir.encode('utf-8')).hexdigest()[:12]
+        return os.path.join(get_cache_dir('scratch'), f'{os.path.basename(temp_dir)}.{digest}')
+
+    def _register(self, temp_dir):
+        """Record a scratch directory so a later sweep can find it after a crash"""
+        try:
+            with open(self._registry_entry(temp_dir), 'w') as f:
+                f.write(temp_dir)
+        except OSError as e:
+            print(f"Warning: Could not record scratch directory {temp_dir}: {e}")
+
+    def _unregister(self, temp_dir):
+        """Forget a released scratch directory"""
+        try:
+            os.unlink(self._registry_entry(temp_dir))
+        except OSError:
+            pass
+
+    def estimate_bytes(self, job, chunked=False, lookahead=0, split_streams=False):
+        """
+        Estimate the scratch space a job needs
+
+        Cut segments and stream-copied pieces are about as large as the
+        selected material, which is derived from each source's average
+        bitrate. Chunked encodes additionally hold a joined copy of the
+        timeline and the encoded chunks; direct and incremental exports need
+        no intermediates. A pipelined encode only holds the largest
+        `lookahead` segments at a time. Split-stream encodes keep the encoded
+        streams until the final mux, which are at most as large again.
+
+        Args:
+            job: MuxJob to render
+            chunked: Whether the job will use the chunked encoder
+            lookahead: Segments cut ahead of a pipelined encode (0 = not pipelined)
+            split_streams: Whether streams are encoded to separate files before muxing
+
+        Returns:
+            Estimated bytes, including the safety margin
+        """
+        if job.export_mode == 'direct' and not split_streams:
+            return self.MIN_BYTES
+        if job.export_mode == 'incremental' and job.encoder.video_codec != 'copy':
+            # Pieces are encoded straight into the segment cache
+            return self.MIN_BYTES
+
+        sizes = []
+        for source in job.sources:
+            bitrate = self.source_byte_rate(source.path)
+            sizes.extend(segment.duration * bitrate for segment in source.segments)
+        if lookahead and job.export_mode != 'smart':
+            # Smart renders copy pieces to scratch before any fallback encode
+            sizes = sorted(sizes, reverse=True)[:lookahead]
+        selected = sum(sizes)
+
+        # Cut segments (reencode) or copied pieces (smart); a chunked encode adds the
+        # joined timeline and the encoded chunks, which are at most as large again
+        needed = selected * 3 if chunked and job.export_mode == 'reencode' else selected
+        if split_streams and not chunked:
+            # Direct exports cut nothing, so only the encoded streams count
+            needed = selected if job.export_mode == 'direct' else selected * 2
+        return int(needed * self.MARGIN) + self.MIN_BYTES
+
+    @staticmethod
+    def source_byte_rate(path):
+        """
+        Get the average bytes per second of a source
+
+        Returns:
+            Bytes per second (file size / duration); the whole file size if
+            the duration can't be probed
+        """
+        try:
+            return MediaProbe.probe(path).byte_rate
+        except Exception:
+            return os.path.getsize(path)
+
+    def sweep(self):
+        """
+        Remove scratch directories left behind by processes that no longer run
+
+        Returns:
+            Number of directories removed
+        """
+        removed = 0
+        for path in self.candidates():
+            try:
+                entries = os.listdir(path)
+            except OSError:
+                continue
+            for name in entries:
+                if self._is_stale(name):
+                    temp_dir = os.path.join(path, name)
+                    shutil.rmtree(temp_dir, ignore_errors=True)
+                    self._unregister(temp_dir)
+                    removed += 1
+
+        # Directories created elsewhere (e.g. next to an output file) are found via the registry
+        registry = get_cache_dir('scratch')
+        for entry in os.listdir(registry):
+            if not self._is_stale(entry):
+                continue
+            entry_path = os.path.join(registry, entry)
+            try:
+                with open(entry_path) as f:
+                    temp_dir = f.read().strip()
+            except OSError:
+                continue
+            if os.path.basename(temp_dir).startswith(self.PREFIX) and os.path.isdir(temp_dir):
+                shutil.rmtree(temp_dir, ignore_errors=True)
+                removed += 1
+            try:
+                os.unlink(entry_path)
+            except OSError:
+                pass
+        if removed:
+            print(f"Removed {removed} stale scratch director{'y' if removed == 1 else 'ies'}")
+        return removed
+
+    def sweep_in_background(self):
+        """Run sweep() on a daemon thread"""
+        threading.Thread(target=self.sweep, daemon=True).start()
+
+    def _is_stale(self, name):
+        """Check whether a scratch directory (or registry entry) name belongs to a dead process"""
+        if not name.startswith(self.PREFIX):
+            return False
+        pid = name[len(self.PREFIX):].split('-')[0]
+        return pid.isdigit() and not self._process_alive(int(pid))
+
+    @staticmethod
+    def _process_alive(pid):
+        """Check whether a process id is in use"""
+        if pid == os.getpid():
+            return True
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            # Exists, but belongs to someone else
+            return True
+        return True
+
+    @staticmethod
+    def speed_rank(path):
+        """
+        Rank a location by expected speed: 0 = tmpfs, 1 = SSD/NVMe or
+        unknown, 2 = rotating disk (Linux only; other systems get 1)
+        """
+        mount = ScratchManager._mount_for(path)
+        if mount is None:
+            return 1
+        device, fs_type = mount
+        if fs_type in ('tmpfs', 'ramfs'):
+            return 0
+
+        # /dev/nvme0n1p2 -> nvme0n1, /dev/sda1 -> sda
+        name = os.path.basename(os.path.realpath(device))
+        for candidate in (name, name.rstrip('0123456789').rstrip('p'), name.rstrip('0123456789')):
+            rotational = f'/sys/block/{candidate}/queue/rotational'
+            if os.path.exists(rotational):
+                try:
+                    with open(rotational) as f:
+                        return 2 if f.read().strip() == '1' else 1
+                except OSError:
+                    break
+        return 1
+
+    @staticmethod
+    def _mount_for(path):
+        """Find the (device, filesystem type) of the mount containing path"""
+        try:
+            with open('/proc/mounts') as f:
+                mounts = [line.split()[:3] for line in f]
+        except OSError:
+            return None
+
+        path = os.path.realpath(path)
+        best = None
+        for device, mount_point, fs_type in mounts:
+            mount_point = mount_point.replace('\\040', ' ')
+            if path == mount_point or path.startswith(mount_point.rstrip('/') + '/'):
+                if best is None or len(mount_point) > len(best[0]):
+                    best = (mount_point, device, fs_type)
+        return (best[1], best[2]) if best else None
+
+    @staticmethod
+    def format_bytes(value):
+        """Format a byte count, e.g. 1.5 GB"""
+        for unit in ('B', 'KB', 'MB', 'GB'):
+            if abs(value) < 1024:
+                return f"{value:.1f} {unit}" if unit != 'B' else f"{int(value)} B"
+            value /= 1024
+        return f"{value:.1f} TB"
@@ -0,0 +1,172 @@
+import os
+import threading
+from .cache_utils import get_cache_dir, identity_key
+
+class SegmentCache:
+    """
+    Content-addressed store of individually encoded segments
+
+    Entries are keyed by source identity (path + size + mtime), the in and
+    out points and the full encoder arguments, so a segment is only reused
+    when re-encoding it would produce the same result. The store is trimmed
+    back under its size limit by evicting the least recently used files;
+    segments in use by a running render are pinned and never evicted.
+    """
+
+    EXTENSION = '.mkv'
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_bytes=5 * 1024 ** 3, cache_dir=None):
+        """
+        Initialize the SegmentCache
+
+        Args:
+            max_bytes: Maximum total size of the store
+            cache_dir: Directory for the store (defaults to the app cache)
+        """
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir or get_cache_dir('segments')
+
+        self._lock = threading.Lock()
+        self._pinned = {}  # key -> number of renders using it
+
+        # Hit/miss counters
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def shared(cls, max_bytes=None):
+        """
+        Get the application-wide cache instance
+
+        Args:
+            max_bytes: Size limit to apply (None keeps the current one)
+
+        Returns:
+            SegmentCache object
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            if max_bytes:
+                cls._shared.max_bytes = max_bytes
+            return cls._shared
+
+    @staticmethod
+    def make_key(video_path, start, end, video_args, audio_args):
+        """
+        Build the cache key for an encoded segment
+
+        Returns:
+            Hex digest string, or None if the source is missing
+        """
+        return identity_key(video_path, f'{start:.6f}', f'{end:.6f}',
+                            ' '.join(video_args), ' '.join(audio_args))
+
+    def path_for(self, key):
+        """Get the file path of an entry (whether or not it exists)"""
+        return os.path.join(self.cache_dir, f'{key}{self.EXTENSION}')
+
+    def get(self, key):
+        """
+        Look up an encoded segment and mark it as recently used
+
+        Args:
+            key: Key from make_key()
+
+        Returns:
+            File path or None
+        """
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return path
+
+    def temp_path(self, key):
+        """Path to encode a new entry to before put() (same filesystem as the store)"""
+        return f'{self.path_for(key)}.{os.getpid()}.{threading.get_ident()}.tmp{self.EXTENSION}'
+
+    def put(self, key, temp_path):
+        """
+        Move a finished encode into the store
+
+        Args:
+            key: Key from make_key()
+            temp_path: File written at temp_path(key)
+
+        Returns:
+            File path of the entry
+        """
+        path = self.path_for(key)
+        os.replace(temp_path, path)
+        self._evict()
+        return path
+
+    def pin(self, keys):
+        """Protect entries from eviction while a render uses them"""
+        with self._lock:
+            for key in keys:
+                self._pinned[key] = self._pinned.get(key, 0) + 1
+
+    def unpin(self, keys):
+        """Release entries pinned with pin()"""
+        with self._lock:
+            for key in keys:
+                count = self._pinned.get(key, 0) - 1
+                if count > 0:
+                    self._pinned[key] = count
+                else:
+                    self._pinned.pop(key, None)
+
+    def stats(self):
+        """
+        Get the hit/miss counters
+
+        Returns:
+            Dict with hits, misses and hit_rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def _evict(self):
+        """Delete least recently used entries until the store is at 90% of its limit"""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(self.EXTENSION) and '.tmp' not in entry.name:
+                try:
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path, entry.name[:-len(self.EXTENSION)]))
+                except OSError:
+                    pass
+
+        total = sum(size for _, size, _, _ in entries)
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+
+        target = int(self.max_bytes * 0.9)
+        with self._lock:
+            pinned = set(self._pinned)
+        for _, size, path, key in entries:
+            if total <= target:
+                break
+            if key in pinned:
+                continue
+            try:
+                os.unlink(path)
+                total -= size
+            except OSError:
+                pass
@@ -0,0 +1,362 @@
+import glob
+import json
+import os
+import statistics
+from dataclasses import dataclass, field, replace
+from .job_spec import SourceSpec, SegmentSpec
+from .media_probe import MediaProbe
+from .scratch_manager import ScratchManager
+from .segment_cache import SegmentCache
+
+@dataclass
+class PlanIssue:
+    """A problem found while planning; errors stop the job before anything runs"""
+    severity: str  # 'error' or 'warning'
+    message: str
+
+
+@dataclass
+class SegmentPlan:
+    """Validated, optimized execution plan of a job"""
+    job: object  # MuxJob with the planned segments
+    issues: list = field(default_factory=list)
+    input_segments: int = 0
+    planned_segments: int = 0
+    merged: int = 0  # segments folded into their predecessor
+    duplicates: int = 0  # repeated ranges that are cut only once
+    clamped: int = 0  # segments ending past the source, shortened
+    processes: dict = field(default_factory=dict)  # tool -> number of runs
+    read_bytes: int = 0
+    scratch_bytes: int = 0
+    timeline_seconds: float = 0.0
+    estimated_seconds: float = None
+    estimate_basis: str = ''
+
+    @property
+    def errors(self):
+        return [issue.message for issue in self.issues if issue.severity == 'error']
+
+    @property
+    def warnings(self):
+        return [issue.message for issue in self.issues if issue.severity == 'warning']
+
+    def check(self):
+        """
+        Raise if the plan has errors
+
+        Raises:
+            ValueError listing every error
+        """
+        errors = self.errors
+        if errors:
+            raise ValueError(f"{len(errors)} problem(s) in the segment list:\n" + '\n'.join(errors))
+
+    def summary(self):
+        """Human-readable dry-run summary"""
+        processes = ', '.join(f"{count} {tool}" for tool, count in self.processes.items() if count) or 'none'
+        lines = [
+            f"Segments: {self.input_segments} entered, {self.planned_segments} planned "
+            f"({self.merged} merged, {self.duplicates} duplicate cut(s) skipped, {self.clamped} clamped)",
+            f"Timeline: {self.timeline_seconds:.1f}s",
+            f"Processes: {processes}",
+            f"Read: {ScratchManager.format_bytes(self.read_bytes)}, "
+            f"scratch: {ScratchManager.format_bytes(self.scratch_bytes)}",
+        ]
+        if self.estimated_seconds is not None:
+            lines.append(f"Estimated time: {self.estimated_seconds:.0f}s ({self.estimate_basis})")
+        else:
+            lines.append(f"Estimated time: unknown ({self.estimate_basis})")
+        lines += [f"Warning: {message}" for message in self.warnings]
+        lines += [f"Error: {message}" for message in self.errors]
+        return '\n'.join(lines)
+
+    def to_dict(self):
+        """Plain data for the job metrics and the CLI summary (without the job)"""
+        return {
+            'input_segments': self.input_segments,
+            'planned_segments': self.planned_segments,
+            'merged': self.merged,
+            'duplicates': self.duplicates,
+            'clamped': self.clamped,
+            'processes': dict(self.processes),
+            'read_bytes': self.read_bytes,
+            'scratch_bytes': self.scratch_bytes,
+            'timeline_seconds': round(self.timeline_seconds, 3),
+            'estimated_seconds': round(self.estimated_seconds, 1) if self.estimated_seconds is not None else None,
+            'estimate_basis': self.estimate_basis,
+            'errors': self.errors,
+            'warnings': self.warnings,
+        }
+
+
+class SegmentPlanner:
+    """
+    Turns a job's segment list into a checked execution plan
+
+    Every range is validated against the probed source durations before
+    any process is started, so a bad segment fails the job immediately
+    with all problems listed instead of halfway through a long render.
+    Consecutive ranges of the same source are merged when the user allows
+    it (touching, or also overlapping), identical ranges are cut once and reused, and
+    the plan reports the processes, bytes and time the render will take.
+    """
+
+    MERGE_MODES = ('none', 'adjacent', 'overlapping')
+
+    # Ranges closer than this (seconds) count as touching
+    ADJACENT_TOLERANCE = 0.001
+    # Ends this close past the probed duration are rounding, not mistakes
+    DURATION_TOLERANCE = 0.05
+    # Assumed throughput of stream-copy cuts when estimating time (bytes/s)
+    COPY_BYTES_PER_SECOND = 150 * 1024 * 1024
+
+    def __init__(self, muxer, merge='none'):
+        """
+        Initialize the SegmentPlanner
+
+        Args:
+            muxer: VideoMuxer whose options (split mode, chunks, ...) the plan follows
+            merge: 'none' (cut every range as entered), 'adjacent' (merge
+                   touching ranges; with stream-copy cuts the merged range
+                   snaps to keyframes once instead of at each inner boundary,
+                   so the output can differ there) or 'overlapping' (also
+                   merge overlapping ranges, which drops the repeated part)
+        """
+        if merge not in self.MERGE_MODES:
+            raise ValueError(f"Unknown merge mode: {merge}")
+        self.muxer = muxer
+        self.merge = merge
+
+    def plan(self, job):
+        """
+        Validate and optimize a job without starting any render process
+
+        Args:
+            job: MuxJob to plan
+
+        Returns:
+            SegmentPlan object; call check() before rendering
+        """
+        plan = SegmentPlan(job=job)
+        durations = self._probe_durations(job, plan)
+
+        flat = []
+        for source in job.sources:
+            plan.input_segments += len(source.segments)
+            if not os.path.exists(source.path):
+                # Already reported by the probe step
+                continue
+            for segment in source.segments:
+                checked = self._check_segment(source.path, segment, durations.get(source.path), plan)
+                if checked is not None:
+                    flat.append((source.path, *checked))
+
+        # Incremental exports cache per range; merging would invalidate the cached pieces
+        merged = flat if job.export_mode == 'incremental' else self._merge(flat, plan)
+        plan.job = replace(job, sources=self._to_sources(merged))
+        segments = plan.job.segment_list()
+        plan.planned_segments = len(segments)
+        plan.timeline_seconds = plan.job.total_duration()
+
+        unique, _ = self.dedupe(segments)
+        plan.duplicates = len(segments) - len(unique)
+        if not segments:
+            plan.issues.append(PlanIssue('error', "No valid segments to process"))
+            return plan
+
+        self._estimate(plan, unique)
+        return plan
+
+    @staticmethod
+    def dedupe(segments):
+        """
+        Collapse identical ranges so each is cut only once
+
+        Args:
+            segments: List of (source_idx, path, start, end) in concat order
+
+        Returns:
+            (unique, concat_map) where unique lists the first occurrence of
+            every range and concat_map[i] is the index in unique of segment i
+        """
+        unique = []
+        index = {}
+        concat_map = []
+        for segment in segments:
+            _, path, start, end = segment
+            key = (path, round(start, 6), round(end, 6))
+            if key not in index:
+                index[key] = len(unique)
+                unique.append(segment)
+            concat_map.append(index[key])
+        return unique, concat_map
+
+    @staticmethod
+    def read_order(segments):
+        """
+        Order segment indices by source and position, for sequential reads
+
+        Returns:
+            List of indices into segments
+        """
+        return sorted(range(len(segments)), key=lambda idx: (segments[idx][1], segments[idx][2]))
+
+    def _probe_durations(self, job, plan):
+        """Probe every source concurrently and record the ones that can't be read"""
+        futures = {}
+        for source in job.sources:
+            if source.path in futures:
+                continue
+            if not os.path.exists(source.path):
+                plan.issues.append(PlanIssue('error', f"Source not found: {source.path}"))
+                continue
+            futures[source.path] = MediaProbe.submit(source.path)
+
+        durations = {}
+        for path, future in futures.items():
+            try:
+                info = future.result()
+            except Exception as e:
+                plan.issues.append(PlanIssue('warning', f"Could not probe {path}, ranges not checked: {e}"))
+                continue
+            if info.duration > 0:
+                durations[path] = info.duration
+        return durations
+
+    def _check_segment(self, path, segment, duration, plan):
+        """Validate one range; returns (start, end), possibly clamped, or None if unusable"""
+        name = os.path.basename(path)
+        label = f"{name} {segment.start:.3f}-{segment.end:.3f}s"
+        if segment.start < 0:
+            plan.issues.append(PlanIssue('error', f"{label}: starts before 0"))
+            return None
+        if segment.end <= segment.start:
+            plan.issues.append(PlanIssue('error', f"{label}: end is not after start"))
+            return None
+        if duration is None:
+            return segment.start, segment.end
+        if segment.start >= duration:
+            plan.issues.append(PlanIssue('error', f"{label}: starts after the end of the source ({duration:.3f}s)"))
+            return None
+        if segment.end > duration + self.DURATION_TOLERANCE:
+            plan.issues.append(PlanIssue('warning', f"{label}: ends past the source, shortened to {duration:.3f}s"))
+            plan.clamped += 1
+            return segment.start, duration
+        return segment.start, min(segment.end, duration)
+
+    def _merge(self, flat, plan):
+        """Merge consecutive ranges of the same source as the merge mode allows"""
+        if self.merge == 'none':
+            return flat
+        merged = []
+        for path, start, end in flat:
+            if merged and merged[-1][0] == path:
+                _, prev_start, prev_end = merged[-1]
+                touching = abs(start - prev_end) <= self.ADJACENT_TOLERANCE
+                overlapping = self.merge == 'overlapping' and prev_start <= start < prev_end
+                if touching or overlapping:
+                    merged[-1] = (path, prev_start, max(prev_end, end))
+                    plan.merged += 1
+                    continue
+            merged.append((path, start, end))
+        return merged
+
+    @staticmethod
+    def _to_sources(flat):
+        """Group consecutive ranges of the same file back into SourceSpecs"""
+        sources = []
+        for path, start, end in flat:
+            if not sources or sources[-1].path != path:
+                sources.append(SourceSpec(path, []))
+            sources[-1].segments.append(SegmentSpec(start, end))
+        return sources
+
+    def _estimate(self, plan, unique):
+        """Fill in the process counts, bytes and time of the planned job"""
+        muxer = self.muxer
+        job = plan.job
+        chunked, pipelined = muxer.encode_strategy(job)
+        segments = job.segment_list()
+
+        plan.read_bytes = int(sum((end - start) * self._byte_rate(path) for _, path, start, end in unique))
+        plan.scratch_bytes = muxer.scratch.estimate_bytes(
+            job, chunked, lookahead=muxer.pipeline_lookahead if pipelined else 0,
+            split_streams=muxer.split_streams and not chunked)
+
+        processes = {'mkvmerge': 0, 'ffmpeg': 0}
+        if job.export_mode == 'incremental' and job.encoder.video_codec != 'copy':
+            cache = SegmentCache.shared(muxer.segment_cache_bytes)
+            video_args = job.encoder.video_args()
+            audio_args = job.encoder.audio_args()
+            missing = sum(1 for _, path, start, end in unique
+                          if not os.path.exists(cache.path_for(
+                              SegmentCache.make_key(path, start, end, video_args, audio_args))))
+            processes['ffmpeg'] = missing + 1
+        elif job.export_mode == 'smart':
+            # Up to two boundary encodes and one copy per segment, plus the join
+            processes['ffmpeg'] = 3 * len(segments) + 1
+        else:
+            if job.export_mode != 'direct':
+                if pipelined:
+                    processes['mkvmerge'] = len(segments)
+                else:
+                    processes['mkvmerge'] = muxer.cut_job_count(unique)
+            if chunked:
+                # Join, chunk encodes, audio encode and the final join
+                processes['ffmpeg'] = muxer.encode_chunks + 3
+            elif muxer.split_streams:
+                tracks = self._audio_tracks(segments[0][1])
+                processes['ffmpeg'] = 1 + tracks
+                processes['mkvmerge'] += 1
+            else:
+                processes['ffmpeg'] = 1
+        plan.processes = processes
+
+        copy = job.encoder.video_codec == 'copy'
+        speed = None if copy else self.historical_speed(job.profile)
+        cut_seconds = 0.0
+        if job.export_mode not in ('direct', 'incremental') and not pipelined:
+            cut_seconds = plan.read_bytes / self.COPY_BYTES_PER_SECOND
+        if copy:
+            plan.estimated_seconds = plan.read_bytes / self.COPY_BYTES_PER_SECOND + cut_seconds
+            plan.estimate_basis = 'stream copy at disk speed'
+        elif speed:
+            plan.estimated_seconds = plan.timeline_seconds / speed + cut_seconds
+            plan.estimate_basis = f"{speed:.2f}x realtime from earlier {job.profile or 'default'} jobs"
+        else:
+            plan.estimate_basis = 'no earlier jobs with this profile in metrics_dir'
+
+    def historical_speed(self, profile):
+        """
+        Median encoder speed of finished jobs with a profile, from metrics_dir
+
+        Returns:
+            Speed (1.0 = realtime) or None if there are no records
+        """
+        if not self.muxer.metrics_dir:
+            return None
+        speeds = []
+        for path in glob.glob(os.path.join(self.muxer.metrics_dir, '*.metrics.json')):
+            try:
+                with open(path) as f:
+                    record = json.load(f)
+            except (OSError, ValueError):
+                continue
+            speed = record.get('encode', {}).get('speed')
+            if record.get('status') == 'ok' and record.get('profile') == profile and speed:
+                speeds.append(speed)
+        return statistics.median(speeds) if speeds else None
+
+    @staticmethod
+    def _byte_rate(path):
+        """Average bytes per second of a source (0 if unknown)"""
+        info = MediaProbe.cached(path)
+        return info.byte_rate if info else 0
+
+    @staticmethod
+    def _audio_tracks(path):
+        """Number of audio tracks of a source (0 if unknown)"""
+        info = MediaProbe.cached(path)
+        if info is None:
+            return 0
+        return sum(1 for stream in info.streams if stream.get('codec_type') == 'audio')
@@ -0,0 +1,356 @@
+import bisect
+import os
+from .keyframe_index import KeyframeIndex
+from .media_probe import MediaProbe
+
+class SmartRenderMismatch(Exception):
+    """Raised when a re-encoded piece can't be joined with the copied GOPs"""
+
+
+class SmartRenderPieceError(Exception):
+    """Raised when ffmpeg fails to copy or encode one of the pieces"""
+
+
+class SmartRenderer:
+    """
+    Export strategy that avoids re-encoding whole GOPs
+
+    Every segment is split at the keyframes it contains: the complete GOPs
+    in the middle are stream-copied and only the partial GOPs before the
+    first and after the last keyframe are re-encoded with parameters that
+    match the source, so the pieces can be joined losslessly.
+
+    Every piece carries its parameter sets (SPS/PPS, and VPS for HEVC)
+    in-band: copied GOPs are converted to Annex B, which repeats them
+    before each keyframe, and the encoders repeat their headers. Decoders
+    therefore switch parameter sets at each piece instead of decoding the
+    copied GOPs against the codec private data of the first piece. Each
+    re-encoded piece is probed and compared with its source, every piece
+    must share the time base of the first one, and any mismatch raises
+    SmartRenderMismatch so the caller can re-encode instead. A failing
+    piece command raises SmartRenderPieceError for the same fallback.
+    """
+
+    # Source codec -> (encoder, {ffprobe profile: encoder profile})
+    ENCODERS = {
+        'h264': ('libx264', {
+            'Constrained Baseline': 'baseline',
+            'Baseline': 'baseline',
+            'Main': 'main',
+            'High': 'high',
+            'High 10': 'high10',
+            'High 4:2:2': 'high422',
+            'High 4:4:4 Predictive': 'high444',
+        }),
+        'hevc': ('libx265', {
+            'Main': 'main',
+            'Main 10': 'main10',
+            'Main Still Picture': 'mainstillpicture',
+        }),
+    }
+
+    # Bitstream filters that put the parameter sets in-band before every keyframe
+    ANNEXB_FILTERS = {
+        'h264': 'h264_mp4toannexb',
+        'hevc': 'hevc_mp4toannexb',
+    }
+
+    # Stream parameters a re-encoded piece must share with its source
+    MATCHED_FIELDS = ('codec_name', 'profile', 'level', 'pix_fmt', 'width', 'height',
+                      'sample_aspect_ratio', 'r_frame_rate', 'field_order', 'color_range',
+                      'color_space', 'color_transfer', 'color_primaries')
+
+    # Colour parameters passed to the encoder: ffprobe field -> ffmpeg option
+    COLOR_OPTIONS = {
+        'color_range': '-color_range',
+        'color_space': '-colorspace',
+        'color_transfer': '-color_trc',
+        'color_primaries': '-color_primaries',
+    }
+
+    # Quality used for the re-encoded boundary pieces (visually lossless)
+    BOUNDARY_CRF = '16'
+
+    def __init__(self, muxer):
+        """
+        Initialize the SmartRenderer
+
+        Args:
+            muxer: VideoMuxer used to run commands and report progress
+        """
+        self.muxer = muxer
+        self._stream_info = {}
+        self._time_base = None  # time base of the first piece; the concat demuxer needs one
+
+    def check_support(self, segments):
+        """
+        Check whether the segments can be smart-rendered
+
+        All sources must use the same codec parameters (profile, level,
+        pixel format, resolution, frame rate, timebase, colour) and audio
+        codec, and the codec/profile must have a matching encoder.
+
+        Args:
+            segments: List of (source_idx, input_file, start, end) tuples
+
+        Returns:
+            (supported, reason) tuple; reason explains why not
+        """
+        signature = None
+        for _, input_file, _, _ in segments:
+            info = self.get_stream_info(input_file)
+            if info is None:
+                return False, f"could not probe {os.path.basename(input_file)}"
+
+            video = info['video']
+            if video.get('codec_name') not in self.ENCODERS:
+                return False, f"unsupported codec {video.get('codec_name')}"
+            _, profiles = self.ENCODERS[video['codec_name']]
+            if video.get('profile') not in profiles:
+                return False, f"unsupported {video['codec_name']} profile {video.get('profile')}"
+
+            audio = info['audio']
+            source_signature = (tuple(video.get(field) for field in self.MATCHED_FIELDS),
+                                video.get('time_base'),
+                                audio.get('codec_name') if audio else None)
+            if signature is None:
+                signature = source_signature
+            elif source_signature != signature:
+                return False, "sources use different codec parameters"
+
+        return True, ""
+
+    def render(self, segments, output_path, temp_dir):
+        """
+        Render the segments to output_path
+
+        Args:
+            segments: List of (source_idx, input_file, start, end) tuples in concat order
+            output_path: Path for the output file
+            temp_dir: Directory for intermediate pieces
+
+        Raises:
+            SmartRenderMismatch: A piece doesn't match its source or the other
+                                 pieces (nothing has been written to output_path)
+            SmartRenderPieceError: ffmpeg failed on a piece (likewise)
+        """
+        self._time_base = None
+        video_pieces = []
+        audio_pieces = []
+        has_audio = self.get_stream_info(segments[0][1])['audio'] is not None
+
+        total = len(segments)
+        copied_seconds = 0
+        encoded_seconds = 0
+
+        for order_idx, (_, input_file, start, end) in enumerate(segments):
+            progress = int((order_idx / total) * 100)
+            self.muxer.update_progress(progress, f"Smart rendering segment {order_idx + 1}/{total}...")
+
+            for piece_idx, (piece_start, piece_end, copy) in enumerate(self.plan_segment(input_file, start, end)):
+                piece_path = os.path.join(temp_dir, f"smart_{order_idx}_{piece_idx}.mkv")
+                if copy:
+                    self._copy_piece(input_file, piece_start, piece_end, piece_path)
+                    copied_seconds += piece_end - piece_start
+                else:
+                    self._encode_piece(input_file, piece_start, piece_end, piece_path)
+                    encoded_seconds += piece_end - piece_start
+                self._verify_piece(input_file, piece_path, encoded=not copy)
+                video_pieces.append(piece_path)
+
+            if has_audio:
+                audio_path = os.path.join(temp_dir, f"smart_audio_{order_idx}.mka")
+                self._copy_audio(input_file, start, end, audio_path)
+                audio_pieces.append(audio_path)
+
+        print(f"Smart render: copied {copied_seconds:.1f}s, re-encoded {encoded_seconds:.1f}s")
+        self.muxer.update_progress(99, "Joining smart-rendered pieces...")
+        self._join(video_pieces, audio_pieces, output_path, temp_dir)
+
+    def plan_segment(self, input_file, start, end):
+        """
+        Split a segment into re-encoded and stream-copied pieces
+
+        Args:
+            input_file: Source file
+            start: Segment start in seconds
+            end: Segment end in seconds
+
+        Returns:
+            List of (piece_start, piece_end, copy) tuples
+        """
+        keyframes = self.get_keyframes(input_file)
+
+        # First keyframe at/after start and last keyframe at/before end
+        first_idx = bisect.bisect_left(keyframes, start)
+        last_idx = bisect.bisect_right(keyframes, end) - 1
+
+        if first_idx >= len(keyframes) or last_idx < first_idx or keyframes[first_idx] >= end:
+            # No complete GOP inside the segment
+            return [(start, end, False)]
+
+        first_key = keyframes[first_idx]
+        last_key = keyframes[last_idx]
+
+        pieces = []
+        if first_key > start:
+            pieces.append((start, first_key, False))
+        if last_key > first_key:
+            pieces.append((first_key, last_key, True))
+        if end > last_key:
+            pieces.append((last_key, end, False))
+        return pieces
+
+    def get_stream_info(self, input_file):
+        """
+        Probe the first video and audio stream of a source
+
+        Args:
+            input_file: Source file
+
+        Returns:
+            {'video': dict, 'audio': dict or None} or None if probing failed
+        """
+        if input_file in self._stream_info:
+            return self._stream_info[input_file]
+
+        info = None
+        try:
+            probe = MediaProbe.probe(input_file)
+            if probe.has_video:
+                info = {'video': probe.stream('video'), 'audio': probe.stream('audio')}
+        except Exception:
+            info = None
+
+        self._stream_info[input_file] = info
+        return info
+
+    def get_keyframes(self, input_file):
+        """
+        List the keyframe timestamps of the first video stream
+
+        Args:
+            input_file: Source file
+
+        Returns:
+            Sorted sequence of keyframe times in seconds
+        """
+        return KeyframeIndex.for_file(input_file).times
+
+    def _copy_piece(self, input_file, start, end, piece_path):
+        """Stream-copy the video between two keyframes, with in-band parameter sets"""
+        video = self.get_stream_info(input_file)['video']
+        cmd = [
+            'ffmpeg', '-v', 'error',
+            '-ss', f'{start:.6f}',
+            '-i', input_file,
+            '-t', f'{end - start:.6f}',
+            '-map', '0:v:0',
+            '-c:v', 'copy',
+            '-bsf:v', self.ANNEXB_FILTERS[video['codec_name']],
+            '-avoid_negative_ts', 'make_zero',
+            '-y', piece_path
+        ]
+        self._run_ffmpeg(cmd, SmartRenderPieceError)
+
+    def _encode_piece(self, input_file, start, end, piece_path):
+        """Re-encode a partial GOP with parameters matching the source"""
+        video = self.get_stream_info(input_file)['video']
+        encoder, profiles = self.ENCODERS[video['codec_name']]
+
+        cmd = [
+            'ffmpeg', '-v', 'error',
+            '-ss', f'{start:.6f}',
+            '-i', input_file,
+            '-t', f'{end - start:.6f}',
+            '-map', '0:v:0',
+            '-fps_mode', 'passthrough',
+            '-c:v', encoder,
+            '-profile:v', profiles[video['profile']],
+            '-pix_fmt', video['pix_fmt'],
+            '-crf', self.BOUNDARY_CRF,
+            '-preset', 'medium',
+        ]
+        for field, option in self.COLOR_OPTIONS.items():
+            if video.get(field) not in (None, 'unknown'):
+                cmd += [option, video[field]]
+        cmd += self._header_args(video)
+        cmd += ['-y', piece_path]
+        self._run_ffmpeg(cmd, SmartRenderPieceError)
+
+    @staticmethod
+    def _header_args(video):
+        """Encoder options for the source level and repeated in-band headers"""
+        level = video.get('level')
+        if video['codec_name'] == 'h264':
+            args = ['-x264-params', 'repeat-headers=1']
+            if level and level > 0:
+                # ffprobe reports H.264 levels times 10 (41 = level 4.1)
+                args += ['-level:v', f'{level / 10:g}']
+            return args
+        params = 'repeat-headers=1'
+        if level and level > 0:
+            # ffprobe reports HEVC levels times 30 (123 = level 4.1)
+            params += f':level-idc={level / 30:g}'
+        return ['-x265-params', params]
+
+    def _verify_piece(self, input_file, piece_path, encoded):
+        """
+        Check that a piece can be joined with the others
+
+        Every piece must have the time base of the first one (all pieces
+        are Matroska, so this is the container's, not the source's); a
+        re-encoded piece must also use the source's codec parameters.
+        """
+        source = self.get_stream_info(input_file)['video']
+        try:
+            piece = MediaProbe.run_ffprobe(piece_path).stream('video') or {}
+        except Exception as e:
+            raise SmartRenderMismatch(f"could not probe piece: {e}")
+        if self._time_base is None:
+            self._time_base = piece.get('time_base')
+        elif piece.get('time_base') != self._time_base:
+            raise SmartRenderMismatch(f"piece time_base {piece.get('time_base')} "
+                                      f"does not match {self._time_base}")
+        if not encoded:
+            return
+        for field in self.MATCHED_FIELDS:
+            if piece.get(field) != source.get(field):
+                raise SmartRenderMismatch(f"boundary piece {field} {piece.get(field)} "
+                                          f"does not match source {source.get(field)}")
+
+    def _copy_audio(self, input_file, start, end, audio_path):
+        """Stream-copy the audio of a whole segment"""
+        cmd = [
+            'ffmpeg', '-v', 'error',
+            '-ss', f'{start:.6f}',
+            '-i', input_file,
+            '-t', f'{end - start:.6f}',
+            '-map', '0:a:0',
+            '-c:a', 'copy',
+            '-y', audio_path
+        ]
+        self._run_ffmpeg(cmd, SmartRenderPieceError)
+
+    def _join(self, video_pieces, audio_pieces, output_path, temp_dir):
+        """Losslessly join the video pieces and audio pieces into the output"""
+        video_list = os.path.join(temp_dir, 'smart_video.txt')
+        with open(video_list, 'w') as f:
+            for piece in video_pieces:
+                f.write(f"file {self.muxer.concat_quote(piece)}\n")
+
+        cmd = ['ffmpeg', '-v', 'error', '-f', 'concat', '-safe', '0', '-i', video_list]
+        if audio_pieces:
+            audio_list = os.path.join(temp_dir, 'smart_audio.txt')
+            with open(audio_list, 'w') as f:
+                for piece in audio_pieces:
+                    f.write(f"file {self.muxer.concat_quote(piece)}\n")
+            cmd += ['-f', 'concat', '-safe', '0', '-i', audio_list, '-map', '0:v', '-map', '1:a']
+        cmd += ['-c', 'copy', '-y', output_path]
+        self._run_ffmpeg(cmd)
+
+    def _run_ffmpeg(self, cmd, error=Exception):
+        """Run an ffmpeg command and raise error on failure"""
+        returncode, _, stderr = self.muxer.run_command(cmd)
+        if returncode != 0:
+            raise error(f"ffmpeg error (cmd: {' '.join(cmd)}): {stderr}")
@@ -0,0 +1,233 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_EXCEPTION, wait
+from .encode_telemetry import EncodeProgress
+from .media_probe import MediaProbe
+
+class SplitStreamEncoder:
+    """
+    Encode video and every audio track in separate processes, then mux
+
+    The single-process encode runs the audio encoder inside the video
+    pipeline and only keeps the first audio track. Here the video is
+    encoded on its own with the job's thread budget while each audio
+    track is encoded (or stream-copied, when the sources already use the
+    target codec) by its own ffmpeg process at the same time. The pieces
+    are joined losslessly with mkvmerge and the result is checked for A/V
+    drift.
+    """
+
+    # Source codec names that can be stream-copied instead of re-encoded with an encoder
+    COPY_COMPATIBLE = {
+        'libvorbis': 'vorbis',
+        'libopus': 'opus',
+        'aac': 'aac',
+        'libfdk_aac': 'aac',
+        'libmp3lame': 'mp3',
+        'flac': 'flac',
+        'ac3': 'ac3',
+    }
+
+    # Largest start offset between video and audio (seconds) before warning
+    SYNC_START_TOLERANCE = 0.1
+    # Largest length difference between video and audio (seconds) before warning
+    SYNC_END_TOLERANCE = 0.5
+
+    MATROSKA_EXTENSIONS = ('.mkv', '.mka', '.webm')
+
+    def __init__(self, muxer):
+        """
+        Initialize the SplitStreamEncoder
+
+        Args:
+            muxer: VideoMuxer used to run commands, read encoder settings and report progress
+        """
+        self.muxer = muxer
+
+        # Latest telemetry per stream, for the combined progress line
+        self._stream_stats = {}
+        self._progress_lock = threading.Lock()
+
+    def encode(self, concat_file, segments, output_path, video_args, total_duration, temp_dir):
+        """
+        Encode the timeline described by concat_file to output_path
+
+        Args:
+            concat_file: ffmpeg concat list (cut segments or direct ranges)
+            segments: List of (source_idx, input_file, start, end) in concat order
+            output_path: Path for the output file
+            video_args: Video encoder arguments (already thread limited)
+            total_duration: Timeline duration in seconds
+            temp_dir: Directory for the encoded streams
+
+        Returns:
+            Dict describing the A/V sync check (see check_sync)
+        """
+        audio_tracks = self.audio_plan(segments)
+        video_file = os.path.join(temp_dir, 'video.mkv')
+        audio_files = [os.path.join(temp_dir, f'audio_{track}.mka') for track in range(len(audio_tracks))]
+        copied = sum(1 for copy in audio_tracks if copy)
+        print(f"Split-stream encode: video + {len(audio_tracks)} audio track(s), {copied} stream-copied")
+
+        self._stream_stats = {'video': EncodeProgress()}
+        self._stream_stats.update({f'audio {track + 1}': EncodeProgress() for track in range(len(audio_tracks))})
+
+        input_args = ['-f', 'concat', '-safe', '0', '-i', concat_file]
+        video_cmd = ['ffmpeg', *input_args, '-map', '0:v:0', '-an', '-sn', *video_args, '-y', video_file]
+        jobs = [('video', video_cmd)]
+        for track, copy in enumerate(audio_tracks):
+            codec_args = ['-c:a', 'copy'] if copy else self.muxer.audio_args
+            jobs.append((f'audio {track + 1}',
+                         ['ffmpeg', *input_args, '-map', f'0:a:{track}', '-vn', '-sn',
+                          *codec_args, '-y', audio_files[track]]))
+
+        with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+            futures = [executor.submit(self._encode_stream, name, cmd, total_duration, temp_dir)
+                       for name, cmd in jobs]
+            done, pending = wait(futures, return_when=FIRST_EXCEPTION)
+            for future in done:
+                error = future.exception()
+                if error is not None:
+                    # Fail fast: kill the other stream encoders
+                    for other in pending:
+                        other.cancel()
+                    self.muxer.kill_active_processes()
+                    raise error
+
+        self.muxer.update_progress(99, f"Muxing video and {len(audio_files)} audio track(s)...")
+        self._mux(video_file, audio_files, output_path)
+        self.muxer.metrics['encode'] = self._stream_stats['video'].to_dict()
+        self.muxer.metrics['streams'] = {name: stats.to_dict() for name, stats in self._stream_stats.items()}
+        return self.check_sync(output_path)
+
+    def audio_plan(self, segments):
+        """
+        Decide per audio track whether it can be stream-copied
+
+        A track is copied when the audio encoder is 'copy' or when the track
+        already uses the target codec in every source.
+
+        Args:
+            segments: List of (source_idx, input_file, start, end)
+
+        Returns:
+            List with one bool (copy) per audio track of the first source
+        """
+        sources = list(dict.fromkeys(input_file for _, input_file, _, _ in segments))
+        codecs_by_source = []
+        for source in sources:
+            streams = MediaProbe.probe(source).streams
+            codecs_by_source.append([s.get('codec_name') for s in streams if s.get('codec_type') == 'audio'])
+
+        audio_codec = self.muxer.audio_args[1] if len(self.muxer.audio_args) > 1 else ''
+        target = self.COPY_COMPATIBLE.get(audio_codec)
+        plan = []
+        for track, codec in enumerate(codecs_by_source[0] if codecs_by_source else []):
+            same_everywhere = all(len(codecs) > track and codecs[track] == codec for codecs in codecs_by_source)
+            plan.append(audio_codec == 'copy' or (same_everywhere and codec == target))
+        return plan
+
+    def check_sync(self, output_path):
+        """
+        Compare the start and length of every audio stream with the video
+
+        Args:
+            output_path: Muxed output file
+
+        Returns:
+            Dict with the video start/duration, the largest start and end
+            drift in seconds and whether both are within tolerance
+        """
+        info = MediaProbe.run_ffprobe(output_path)
+        video = info.stream('video')
+        audio = [s for s in info.streams if s.get('codec_type') == 'audio']
+        if video is None or not audio:
+            return {'checked': False}
+
+        video_start, video_duration = self._stream_span(video, info.duration)
+        start_drift = 0.0
+        end_drift = 0.0
+        for stream in audio:
+            start, duration = self._stream_span(stream, info.duration)
+            start_drift = max(start_drift, abs(start - video_start))
+            end_drift = max(end_drift, abs((start + duration) - (video_start + video_duration)))
+
+        in_sync = start_drift <= self.SYNC_START_TOLERANCE and end_drift <= self.SYNC_END_TOLERANCE
+        if not in_sync:
+            print(f"Warning: A/V drift in {output_path}: audio starts {start_drift:.3f}s and ends "
+                  f"{end_drift:.3f}s away from the video")
+        return {
+            'checked': True,
+            'video_start': round(video_start, 3),
+            'video_duration': round(video_duration, 3),
+            'start_drift': round(start_drift, 3),
+            'end_drift': round(end_drift, 3),
+            'in_sync': in_sync,
+        }
+
+    @staticmethod
+    def _stream_span(stream, fallback_duration):
+        """Get (start, duration) of a probed stream in seconds"""
+        try:
+            start = float(stream.get('start_time', 0))
+        except ValueError:
+            start = 0.0
+        duration = stream.get('duration')
+        if duration in (None, 'N/A'):
+            # Matroska keeps per-track lengths in a DURATION tag (hh:mm:ss.nnnnnnnnn)
+            duration = stream.get('tags', {}).get('DURATION')
+            if duration:
+                hours, minutes, seconds = duration.split(':')
+                duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+        try:
+            return start, float(duration)
+        except (TypeError, ValueError):
+            return start, fallback_duration
+
+    def _encode_stream(self, name, cmd, total_duration, temp_dir):
+        """Encode one stream (runs on a worker thread)"""
+        log_path = os.path.join(temp_dir, f"{name.replace(' ', '_')}.log")
+        stats = self.muxer.run_ffmpeg_with_progress(
+            cmd, total_duration, log_path, callback=lambda stats: self._report_progress(name, stats))
+        stats.finished = True
+        self._report_progress(name, stats)
+
+    def _mux(self, video_file, audio_files, output_path):
+        """Join the encoded streams losslessly"""
+        if os.path.splitext(output_path)[1].lower() in self.MATROSKA_EXTENSIONS:
+            cmd = ['mkvmerge', '-q', '-o', output_path, video_file, *audio_files]
+            returncode, stdout, stderr = self.muxer.run_command(cmd)
+            if returncode not in (0, 1):  # mkvmerge returns 1 for warnings
+                raise Exception(f"mkvmerge error (cmd: {' '.join(cmd)}): {stderr or stdout}")
+            return
+
+        # Other containers: let ffmpeg copy the streams
+        cmd = ['ffmpeg', '-v', 'error', '-i', video_file]
+        for audio_file in audio_files:
+            cmd += ['-i', audio_file]
+        cmd += ['-map', '0:v']
+        for idx in range(len(audio_files)):
+            cmd += ['-map', f'{idx + 1}:a']
+        cmd += ['-c', 'copy', '-y', output_path]
+        returncode, _, stderr = self.muxer.run_command(cmd)
+        if returncode != 0:
+            raise Exception(f"ffmpeg error (cmd: {' '.join(cmd)}): {stderr}")
+
+    def _report_progress(self, name, stats):
+        """Show the progress of every stream in one line"""
+        with self._progress_lock:
+            self._stream_stats[name] = stats
+            snapshot = dict(self._stream_stats)
+        if name == 'video' and self.muxer.stats_callback:
+            self.muxer.stats_callback(stats)
+
+        # The slowest stream decides when the mux can start
+        percent = min(100 if s.finished else s.percent for s in snapshot.values())
+        parts = []
+        for stream_name, stream_stats in snapshot.items():
+            state = 'done' if stream_stats.finished else f"{stream_stats.percent}%"
+            parts.append(f"{stream_name} {state}")
+        summary = snapshot['video'].summary()
+        self.muxer.update_progress(min(percent, 98),
+                                   f"Encoding streams... {', '.join(parts)}"
+                                   + (f" ({summary})" if summary and not snapshot['video'].finished else ""))
@@ -0,0 +1,195 @@
+import os
+import threading
+from collections import OrderedDict
+from PIL import Image
+from .cache_utils import get_cache_dir, identity_key
+
+class ThumbnailCache:
+    """
+    Two-level thumbnail cache: in-memory LRU backed by an on-disk store
+
+    Entries are keyed by (source identity, timestamp, width, height), where
+    the source identity is path + size + mtime. Decoded PIL images are kept
+    in memory; every image is also written as a PNG to the cache directory,
+    which is trimmed back under its size limit by evicting the least
+    recently used files.
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, memory_items=512, disk_bytes=100 * 1024 * 1024, cache_dir=None):
+        """
+        Initialize the ThumbnailCache
+
+        Args:
+            memory_items: Maximum number of decoded images kept in memory
+            disk_bytes: Maximum total size of the on-disk store
+            cache_dir: Directory for the on-disk store (defaults to the app cache)
+        """
+        self.memory_items = memory_items
+        self.disk_bytes = disk_bytes
+        self.cache_dir = cache_dir or get_cache_dir('thumbnails')
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_usage = None  # Computed lazily on first write
+
+        # Hit/miss counters
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @classmethod
+    def shared(cls):
+        """
+        Get the application-wide cache instance
+
+        Returns:
+            ThumbnailCache object
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @staticmethod
+    def make_key(video_path, seconds, width, height):
+        """
+        Build the cache key for a thumbnail
+
+        Returns:
+            Key string, or None if the source file is missing
+        """
+        return identity_key(video_path, seconds, width, height)
+
+    def get(self, key):
+        """
+        Look up a thumbnail
+
+        Args:
+            key: Key from make_key()
+
+        Returns:
+            PIL Image or None on a miss
+        """
+        with self._lock:
+            image = self._memory.get(key)
+            if image is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return image
+
+        path = self._disk_path(key)
+        try:
+            with Image.open(path) as disk_image:
+                image = disk_image.copy()
+            # Touch the file so eviction sees it as recently used
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.disk_hits += 1
+            self._remember(key, image)
+        return image
+
+    def put(self, key, image):
+        """
+        Store a thumbnail in memory and on disk
+
+        Args:
+            key: Key from make_key()
+            image: PIL Image
+        """
+        with self._lock:
+            self._remember(key, image)
+
+        path = self._disk_path(key)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        try:
+            image.save(tmp_path, format='PNG')
+            os.replace(tmp_path, path)
+            size = os.path.getsize(path)
+        except OSError as e:
+            print(f"Warning: Could not write thumbnail cache: {e}")
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            return
+
+        with self._lock:
+            if self._disk_usage is None:
+                self._disk_usage = self._scan_disk_usage()
+            else:
+                self._disk_usage += size
+            needs_eviction = self._disk_usage > self.disk_bytes
+        if needs_eviction:
+            self._evict_disk()
+
+    def stats(self):
+        """
+        Get the hit/miss counters
+
+        Returns:
+            Dict with memory_hits, disk_hits, misses, hit_rate and memory_items
+        """
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            hits = self.memory_hits + self.disk_hits
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': hits / lookups if lookups else 0.0,
+                'memory_items': len(self._memory),
+            }
+
+    def _remember(self, key, image):
+        """Insert into the memory LRU (caller holds the lock)"""
+        self._memory[key] = image
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _disk_path(self, key):
+        """Get the on-disk path for a key"""
+        return os.path.join(self.cache_dir, f'{key}.png')
+
+    def _scan_disk_usage(self):
+        """Sum the size of the on-disk store"""
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.png'):
+                try:
+                    total += entry.stat().st_size
+                except OSError:
+                    pass
+        return total
+
+    def _evict_disk(self):
+        """Delete least recently used files until the store is at 90% of its limit"""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.png'):
+                try:
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                except OSError:
+                    pass
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        target = int(self.disk_bytes * 0.9)
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+                total -= size
+            except OSError:
+                pass
+
+        with self._lock:
+            self._disk_usage = total
@@ -1,8 +1,10 @@
 import subprocess
 import os
-import tempfile
 from PIL import Image, ImageTk
 import tkinter as tk
+from .keyframe_index import KeyframeIndex
+from .thumbnail_cache import ThumbnailCache
+from .frame_decoder import FrameDecoderPool
 
 class ThumbnailExtractor:
     """Extract video frame thumbnails using ffmpeg"""
@@ -22,6 +24,28 @@ class ThumbnailExtractor:
             return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
         return 0
     
+    @staticmethod
+    def seek_args(video_path, seconds):
+        """
+        Build the ffmpeg seek and input arguments for a timestamp
+        
+        When a keyframe index is cached for the source, the input seek jumps
+        straight to the keyframe at or before the timestamp and the remaining
+        offset is decoded, so ffmpeg doesn't have to search the container.
+        
+        Args:
+            video_path: Path to the video file
+            seconds: Timestamp in seconds
+            
+        Returns:
+            List of ffmpeg arguments including -i
+        """
+        index = KeyframeIndex.cached(video_path)
+        keyframe = index.keyframe_at_or_before(seconds) if index else None
+        if keyframe is None:
+            return ['-ss', str(seconds), '-i', video_path]
+        return ['-ss', f'{keyframe:.6f}', '-i', video_path, '-ss', f'{seconds - keyframe:.6f}']
+    
     @staticmethod
     def extract_thumbnail(video_path, timestamp_str, width=120, height=68):
         """
@@ -36,73 +60,130 @@ class ThumbnailExtractor:
         Returns:
             ImageTk.PhotoImage object or None if extraction fails
         """
+        img = ThumbnailExtractor.extract_image(video_path, timestamp_str, width, height)
+        if img is None:
+            return None
+        return ImageTk.PhotoImage(img)
+    
+    @staticmethod
+    def extract_image(video_path, timestamp_str, width=120, height=68, is_cancelled=None):
+        """
+        Extract a frame as a PIL image, going through the thumbnail cache
+        
+        Args:
+            video_path: Path to the video file
+            timestamp_str: Time string in format hh:mm:ss or mm:ss
+            width: Thumbnail width in pixels
+            height: Thumbnail height in pixels
+            is_cancelled: Optional function returning True once the result is
+                          no longer wanted; a running ffmpeg is then killed
+            
+        Returns:
+            PIL Image object or None if extraction fails
+        """
         if not video_path or not os.path.exists(video_path):
             return None
         
         if not timestamp_str or timestamp_str.strip() == "":
             return None
         
-        try:
-            # Convert time to seconds
-            seconds = ThumbnailExtractor.time_to_seconds(timestamp_str)
-            
-            # Validate that we have a valid time
-            if seconds < 0:
-                return None
+        # Convert time to seconds
+        seconds = ThumbnailExtractor.time_to_seconds(timestamp_str)
+        
+        # Validate that we have a valid time
+        if seconds < 0:
+            return None
+        
+        cache = ThumbnailCache.shared()
+        key = cache.make_key(video_path, seconds, width, height)
+        if key is not None:
+            img = cache.get(key)
+            if img is not None:
+                return img
+        
+        img = ThumbnailExtractor._decode_frame(video_path, seconds, width, height, is_cancelled)
+        if img is not None and key is not None:
+            cache.put(key, img)
+        return img
+    
+    @staticmethod
+    def cache_stats():
+        """
+        Get the thumbnail cache hit/miss counters
+        
+        Returns:
+            Dict as returned by ThumbnailCache.stats()
+        """
+        return ThumbnailCache.shared().stats()
+    
+    @staticmethod
+    def _decode_frame(video_path, seconds, width, height, is_cancelled=None):
+        """
+        Decode a single frame, in-process if PyAV is available
+        
+        Args:
+            video_path: Path to the video file
+            seconds: Timestamp in seconds
+            width: Thumbnail width in pixels
+            height: Thumbnail height in pixels
+            is_cancelled: Optional function returning True to abort
             
-            # Create temporary file for the thumbnail
-            with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as tmp_file:
-                tmp_path = tmp_file.name
+        Returns:
+            PIL Image object or None if extraction fails
+        """
+        if FrameDecoderPool.available():
+            img = FrameDecoderPool.shared().decode(video_path, seconds, width, height)
+            if img is not None:
+                return img
+        return ThumbnailExtractor._decode_frame_ffmpeg(video_path, seconds, width, height, is_cancelled)
+    
+    @staticmethod
+    def _decode_frame_ffmpeg(video_path, seconds, width, height, is_cancelled=None):
+        """
+        Run ffmpeg to decode a single frame
+        
+        The frame is scaled by ffmpeg and streamed as raw RGB over stdout,
+        so there is no intermediate file and no JPEG encode/decode round trip.
+        
+        Args:
+            video_path: Path to the video file
+            seconds: Timestamp in seconds
+            width: Thumbnail width in pixels
+            height: Thumbnail height in pixels
+            is_cancelled: Optional function returning True to kill ffmpeg early
             
+        Returns:
+            PIL Image object or None if extraction fails
+        """
+        try:
             # Use ffmpeg to extract frame at timestamp
             # -ss: seek to position, -i: input file, -frames:v 1: extract 1 frame
-            # -s: scale to size, -q:v 2: quality (2 is high)
-            cmd = [
-                'ffmpeg',
-                '-ss', str(seconds),
-                '-i', video_path,
+            # -s: scale to size, -f rawvideo -pix_fmt rgb24: packed RGB bytes on stdout
+            cmd = ['ffmpeg', '-v', 'error'] + ThumbnailExtractor.seek_args(video_path, seconds) + [
                 '-frames:v', '1',
                 '-s', f'{width}x{height}',
-                '-q:v', '2',
-                '-y',  # Overwrite output file
-                tmp_path
+                '-f', 'rawvideo',
+                '-pix_fmt', 'rgb24',
+                'pipe:1'
             ]
             
-            # Run ffmpeg, suppress output
-            result = subprocess.run(cmd, 
-                                   capture_output=True, 
-                                   text=True,
-                                   timeout=5)
-            
-            # Check if file was created and has content
-            if result.returncode == 0 and os.path.exists(tmp_path) and os.path.getsize(tmp_path) > 0:
-                try:
-                    # Load the image and convert to PhotoImage
-                    img = Image.open(tmp_path)
-                    photo = ImageTk.PhotoImage(img)
-                    
-                    # Clean up temp file
-                    os.unlink(tmp_path)
-                    
-                    return photo
-                except Exception as img_error:
-                    # Image file was created but is invalid/corrupted
-                    if os.path.exists(tmp_path):
-                        os.unlink(tmp_path)
-                    # Only print error if it's not a common case (empty/invalid image)
-                    print(f"Warning: Could not load thumbnail image: {img_error}")
-                    return None
-            else:
-                # ffmpeg failed or file wasn't created properly
-                # Clean up temp file if it exists
-                if os.path.exists(tmp_path):
-                    os.unlink(tmp_path)
-                # Don't print error - this is normal when timestamp is invalid or out of range
+            # Run ffmpeg, capture the frame bytes
+            process = subprocess.Popen(cmd,
+                                       stdout=subprocess.PIPE,
+                                       stderr=subprocess.DEVNULL)
+            stdout = ThumbnailExtractor._communicate(process, timeout=5, is_cancelled=is_cancelled)
+            if stdout is None:
                 return None
-                
-        except subprocess.TimeoutExpired:
-            # ffmpeg took too long
+            
+            # A complete frame is exactly width * height * 3 bytes
+            frame_size = width * height * 3
+            if process.returncode == 0 and len(stdout) >= frame_size:
+                return Image.frombytes('RGB', (width, height), stdout[:frame_size])
+            
+            # ffmpeg failed or produced no frame
+            # Don't print error - this is normal when timestamp is invalid or out of range
             return None
+                
         except Exception as e:
             # Only print unexpected errors
             import traceback
@@ -110,6 +191,41 @@ class ThumbnailExtractor:
             traceback.print_exc()
             return None
     
+    @staticmethod
+    def _communicate(process, timeout, is_cancelled=None):
+        """
+        Wait for a process's output, killing it on timeout or cancellation
+        
+        Args:
+            process: subprocess.Popen with a stdout pipe
+            timeout: Maximum seconds to wait
+            is_cancelled: Optional function polled while waiting
+            
+        Returns:
+            stdout bytes, or None if the process was killed
+        """
+        if is_cancelled is None:
+            try:
+                stdout, _ = process.communicate(timeout=timeout)
+                return stdout
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.communicate()
+                return None
+        
+        waited = 0.0
+        poll_interval = 0.05
+        while True:
+            try:
+                stdout, _ = process.communicate(timeout=poll_interval)
+                return stdout
+            except subprocess.TimeoutExpired:
+                waited += poll_interval
+                if waited >= timeout or is_cancelled():
+                    process.kill()
+                    process.communicate()
+                    return None
+    
     @staticmethod
     def create_placeholder(width=120, height=68, text="No Preview"):
         """
@@ -0,0 +1,140 @@
+import heapq
+import itertools
+import os
+import threading
+from PIL import ImageTk
+from .thumbnail_extractor import ThumbnailExtractor
+from .ui_dispatcher import UIDispatcher
+
+class ThumbnailScheduler:
+    """
+    Shared, bounded work queue for thumbnail extraction
+
+    A fixed pool of worker threads serves requests in priority order. Each
+    request has a key (e.g. one segment row's start or end field); a newer
+    request for the same key replaces the older one, whether it is still
+    queued or already running, so stale frames never land after fresh ones.
+    Finished images are delivered through the UI dispatcher, which turns
+    them into PhotoImages and calls their callbacks on the Tk main thread.
+    """
+
+    # Priorities (lower runs first)
+    PRIORITY_EDITING = 0
+    PRIORITY_VISIBLE = 1
+    PRIORITY_HIDDEN = 2
+
+    _instance = None
+
+    def __init__(self, dispatcher, workers=None):
+        """
+        Initialize the ThumbnailScheduler
+
+        Args:
+            dispatcher: UIDispatcher used to deliver results on the main thread
+            workers: Number of worker threads (defaults to 2, or 1 on single-core machines)
+        """
+        self.dispatcher = dispatcher
+        self.workers = workers or max(1, min(2, os.cpu_count() or 1))
+
+        self._heap = []
+        self._latest = {}  # key -> generation of the newest request
+        self._sequence = itertools.count()
+        self._generations = itertools.count(1)
+        self._condition = threading.Condition()
+
+        for _ in range(self.workers):
+            threading.Thread(target=self._worker, daemon=True).start()
+
+    @classmethod
+    def for_widget(cls, widget):
+        """
+        Get the application-wide scheduler, creating it on first use
+
+        Args:
+            widget: Any widget of the application (used to find the root window)
+
+        Returns:
+            ThumbnailScheduler object
+        """
+        if cls._instance is None:
+            cls._instance = cls(UIDispatcher.for_widget(widget))
+        return cls._instance
+
+    def request(self, key, video_path, timestamp_str, callback, priority=PRIORITY_VISIBLE,
+                width=120, height=68):
+        """
+        Request a thumbnail, superseding any earlier request with the same key
+
+        Args:
+            key: Hashable identifying the thumbnail slot
+            video_path: Path to the video file
+            timestamp_str: Time string in format hh:mm:ss or mm:ss
+            callback: Called on the main thread with an ImageTk.PhotoImage or None
+            priority: One of the PRIORITY_* constants
+            width: Thumbnail width in pixels
+            height: Thumbnail height in pixels
+        """
+        with self._condition:
+            generation = next(self._generations)
+            self._latest[key] = generation
+            job = (video_path, timestamp_str, width, height, callback)
+            heapq.heappush(self._heap, (priority, next(self._sequence), key, generation, job))
+            self._condition.notify()
+
+    def cancel(self, key):
+        """
+        Drop any queued or running request for a key
+
+        Args:
+            key: Key passed to request()
+        """
+        with self._condition:
+            self._latest.pop(key, None)
+
+    def pending(self):
+        """Get the number of requests that are still wanted"""
+        with self._condition:
+            return len(self._latest)
+
+    def _is_current(self, key, generation):
+        """Check whether a request is still the newest for its key"""
+        with self._condition:
+            return self._latest.get(key) == generation
+
+    def _worker(self):
+        """Worker thread: extract thumbnails in priority order"""
+        while True:
+            with self._condition:
+                while True:
+                    while not self._heap:
+                        self._condition.wait()
+                    _, _, key, generation, job = heapq.heappop(self._heap)
+                    # Superseded or cancelled requests are skipped without any work
+                    if self._latest.get(key) == generation:
+                        break
+
+            video_path, timestamp_str, width, height, callback = job
+            try:
+                img = ThumbnailExtractor.extract_image(
+                    video_path, timestamp_str, width, height,
+                    is_cancelled=lambda: not self._is_current(key, generation))
+            except Exception as e:
+                print(f"Unexpected error extracting thumbnail: {e}")
+                img = None
+
+            if self._is_current(key, generation):
+                # Coalesced per key: only the newest result for a slot is applied
+                self.dispatcher.post(('thumbnail', key),
+                                     lambda key=key, generation=generation, img=img, callback=callback:
+                                     self._deliver(key, generation, img, callback))
+
+    def _deliver(self, key, generation, img, callback):
+        """Main thread: hand a finished thumbnail to its callback"""
+        with self._condition:
+            if self._latest.get(key) != generation:
+                return
+            del self._latest[key]
+
+        # PhotoImages must be created on the Tk thread
+        photo = ImageTk.PhotoImage(img) if img is not None else None
+        callback(photo)
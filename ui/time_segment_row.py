@@ -1,31 +1,84 @@
 import tkinter as tk
 import re
-import threading
+from PIL import ImageTk
 from .thumbnail_extractor import ThumbnailExtractor
+from .filmstrip import Filmstrip
+from .thumbnail_scheduler import ThumbnailScheduler
+
+class SegmentEntry:
+    """Start and end time strings of one segment, as typed in the editor"""
+    
+    def __init__(self, start="00:00", end=""):
+        self.start = start
+        self.end = end
+
 
 class TimeSegmentRow:
-    def __init__(self, parent, editor, start_time="00:00"):
+    """
+    Widgets showing one SegmentEntry of a FileSegmentEditor
+    
+    Rows are views: the editor keeps its segments as SegmentEntry data and
+    only binds rows to the entries in or near the visible part of the
+    editor list. A row that scrolls out of view is unbound and returned to
+    the editor's pool, so scrolling reuses the same widgets instead of
+    creating new ones.
+    """
+    
+    # Filmstrip frames closer than this (in seconds) are shown instead of the exact frame
+    FILMSTRIP_TOLERANCE = 0.5
+    
+    # Height of one row slot including the spacing between rows
+    # (updated from the first row that is built)
+    row_height = 82
+    ROW_SPACING = 4
+    _measured = False
+    
+    def __init__(self, parent, editor):
         self.editor = editor
         
         # Modern colors matching parent editor
-        bg_color = '#2b2b2b'
-        fg_color = '#e0e0e0'
-        entry_bg = '#3c3c3c'
+        self.bg_color = '#2b2b2b'
+        self.fg_color = '#e0e0e0'
+        self.entry_bg = '#3c3c3c'
         
-        self.frame = tk.Frame(parent, bg=bg_color, bd=0)
-        self.start_var = tk.StringVar(value=start_time)
+        self.frame = tk.Frame(parent, bg=self.bg_color, bd=0)
+        self.start_var = tk.StringVar()
         self.end_var = tk.StringVar()
+        self.segment = None  # SegmentEntry shown by this row, None while pooled
+        self.removable = True
         
         # Store references to thumbnails to prevent garbage collection
         self.start_thumbnail = None
         self.end_thumbnail = None
         
-        # Add validation
-        vcmd = (parent.register(self.validate_time), '%P')
+        # Pending debounce timers (Tk after ids) per field
+        self._update_timers = {}
+        # Fields currently showing the "No Preview" placeholder
+        self._placeholder_fields = set()
+        # Set while the fields are loaded from an entry, so the load isn't treated as an edit
+        self._loading = False
+        
+        self._build_widgets((parent.register(self.validate_time), '%P'))
+        
+        # Edits go straight into the entry and refresh the thumbnails
+        self.start_var.trace('w', lambda *args: self._on_field_changed('start'))
+        self.end_var.trace('w', lambda *args: self._on_field_changed('end'))
+        
+        if not TimeSegmentRow._measured:
+            self.frame.update_idletasks()
+            if self.frame.winfo_reqheight() > 1:
+                TimeSegmentRow.row_height = self.frame.winfo_reqheight() + self.ROW_SPACING
+                TimeSegmentRow._measured = True
+    
+    def _build_widgets(self, vcmd):
+        """Create the row's widgets (once; pooled rows keep them)"""
+        bg_color = self.bg_color
+        fg_color = self.fg_color
+        entry_bg = self.entry_bg
         
-        tk.Label(self.frame, text="⏱ Start:", bg=bg_color, fg=fg_color, 
+        tk.Label(self.frame, text="⏱ Start:", bg=bg_color, fg=fg_color,
                 font=('Segoe UI', 9)).pack(side=tk.LEFT, padx=8, pady=5)
-        self.start_entry = tk.Entry(self.frame, textvariable=self.start_var, width=10, 
+        self.start_entry = tk.Entry(self.frame, textvariable=self.start_var, width=10,
                                     bg=entry_bg, fg=fg_color, bd=0, relief=tk.FLAT,
                                     insertbackground=fg_color, font=('Consolas', 9),
                                     validate='key', validatecommand=vcmd)
@@ -35,9 +88,9 @@ class TimeSegmentRow:
         self.start_thumb_label = tk.Label(self.frame, bg=bg_color, bd=1, relief=tk.SOLID)
         self.start_thumb_label.pack(side=tk.LEFT, padx=5, pady=5)
         
-        tk.Label(self.frame, text="End:", bg=bg_color, fg=fg_color, 
+        tk.Label(self.frame, text="End:", bg=bg_color, fg=fg_color,
                 font=('Segoe UI', 9)).pack(side=tk.LEFT, padx=8, pady=5)
-        self.end_entry = tk.Entry(self.frame, textvariable=self.end_var, width=10, 
+        self.end_entry = tk.Entry(self.frame, textvariable=self.end_var, width=10,
                                   bg=entry_bg, fg=fg_color, bd=0, relief=tk.FLAT,
                                   insertbackground=fg_color, font=('Consolas', 9),
                                   validate='key', validatecommand=vcmd)
@@ -47,7 +100,7 @@ class TimeSegmentRow:
         self.end_thumb_label = tk.Label(self.frame, bg=bg_color, bd=1, relief=tk.SOLID)
         self.end_thumb_label.pack(side=tk.LEFT, padx=5, pady=5)
         
-        self.remove_button = tk.Button(self.frame, text="✕", command=self.remove, 
+        self.remove_button = tk.Button(self.frame, text="✕", command=self.remove,
                                        bg=bg_color, fg='#e74c3c', bd=0, relief=tk.FLAT,
                                        font=('Arial', 12, 'bold'), cursor='hand2',
                                        highlightthickness=0, width=2,
@@ -57,10 +110,6 @@ class TimeSegmentRow:
         self.remove_button.bind('<Enter>', lambda e: self.remove_button.config(bg='#1e1e1e'))
         self.remove_button.bind('<Leave>', lambda e: self.remove_button.config(bg=bg_color))
         
-        # Bind events to update thumbnails when time changes
-        self.start_var.trace('w', lambda *args: self.schedule_thumbnail_update('start'))
-        self.end_var.trace('w', lambda *args: self.schedule_thumbnail_update('end'))
-        
         # Bind Enter key for navigation
         self.start_entry.bind('<Return>', self.on_start_enter)
         self.end_entry.bind('<Return>', self.on_end_enter)
@@ -68,13 +117,80 @@ class TimeSegmentRow:
         # Bind key release for auto-colon insertion
         self.start_entry.bind('<KeyRelease>', lambda e: self.auto_format_time(self.start_entry, self.start_var))
         self.end_entry.bind('<KeyRelease>', lambda e: self.auto_format_time(self.end_entry, self.end_var))
+    
+    @property
+    def bound(self):
+        """Whether the row currently shows an entry"""
+        return self.segment is not None
+    
+    def show(self, segment):
+        """
+        Show an entry in this row (or reload the current one after the editor changed it)
+        
+        Thumbnails are served from the filmstrip and thumbnail caches when possible.
+        """
+        if segment is not self.segment:
+            self.cancel_thumbnail_updates()
+        self.segment = segment
+        self._loading = True
+        try:
+            self.start_var.set(segment.start)
+            self.end_var.set(segment.end)
+        finally:
+            self._loading = False
         
-        # Initialize placeholders
         self.update_thumbnail_placeholder('start')
         self.update_thumbnail_placeholder('end')
-        
-        # Initialize end time with video duration if available
-        self.update_end_time()
+        if self.editor.file_path.get():
+            self.refresh_thumbnails()
+    
+    def unbind(self):
+        """Hide the row and drop its images so it can be pooled"""
+        if not self.bound:
+            return
+        self.cancel_thumbnail_updates()
+        self.segment = None
+        self.start_thumbnail = None
+        self.end_thumbnail = None
+        self.start_thumb_label.config(image='')
+        self.end_thumb_label.config(image='')
+        self._placeholder_fields.clear()
+        self.frame.place_forget()
+    
+    def place_at(self, idx):
+        """Put the row into the slot of the idx-th segment"""
+        self.frame.place(x=0, y=idx * self.row_height + self.ROW_SPACING // 2, relwidth=1,
+                         height=self.row_height - self.ROW_SPACING)
+    
+    def _on_field_changed(self, field):
+        """Store an edited time in the entry and refresh its thumbnail"""
+        if self._loading or not self.bound:
+            return
+        value = (self.start_var if field == 'start' else self.end_var).get()
+        setattr(self.segment, field, value)
+        self.schedule_thumbnail_update(field)
+    
+    def has_focus(self):
+        """Check whether keyboard focus is in one of the row's fields"""
+        if not self.bound:
+            return False
+        try:
+            focused = self.frame.focus_get()
+        except KeyError:
+            # focus_get fails when focus is inside some Tk-internal widgets
+            return False
+        return focused in (self.start_entry, self.end_entry)
+    
+    def focus_field(self, field):
+        """Move keyboard focus to the start or end field"""
+        entry = self.start_entry if field == 'start' else self.end_entry
+        entry.focus_set()
+        entry.select_range(0, tk.END)
+    
+    def set_removable(self, removable):
+        """Enable or disable the remove button"""
+        self.removable = removable
+        self.remove_button.config(state=tk.NORMAL if removable else tk.DISABLED)
 
     def validate_time(self, value):
         """Validate time format: flexible formats like h:mm:ss, hh:mm:ss, m:ss, mm:ss"""
@@ -155,95 +271,192 @@ class TimeSegmentRow:
                 new_cursor_pos = min(cursor_pos + (formatted.count(':') - value.count(':')), len(formatted))
             entry.icursor(new_cursor_pos)
 
-    def update_end_time(self):
-        """Update end time with video duration if available and not already set"""
-        if not self.end_var.get():  # Only update if empty
-            duration_str = self.editor.get_duration_str()
-            if duration_str:
-                self.end_var.set(duration_str)
-
     def remove(self):
-        self.editor.remove_segment(self)
+        self.editor.remove_segment(self.segment)
     
     def schedule_thumbnail_update(self, field):
         """Schedule a thumbnail update after a short delay (debouncing)"""
+        # Pooled rows fetch their thumbnails when they are bound again
+        if not self.bound:
+            return
+        
         # Cancel any pending update
-        if hasattr(self, f'_{field}_update_timer'):
-            timer = getattr(self, f'_{field}_update_timer')
-            if timer:
-                timer.cancel()
-        
-        # Schedule new update after 500ms delay
-        timer = threading.Timer(0.5, lambda: self.update_thumbnail(field))
-        timer.daemon = True
-        timer.start()
-        setattr(self, f'_{field}_update_timer', timer)
+        timer = self._update_timers.pop(field, None)
+        if timer:
+            self.frame.after_cancel(timer)
+        
+        # Schedule new update after 500ms delay (runs on the Tk main thread)
+        self._update_timers[field] = self.frame.after(500, lambda: self._run_scheduled_update(field))
+    
+    def _run_scheduled_update(self, field):
+        """Debounce timer fired: request the thumbnail"""
+        self._update_timers.pop(field, None)
+        self.update_thumbnail(field)
+    
+    def cancel_thumbnail_updates(self):
+        """Cancel pending debounce timers and queued thumbnail requests for this row"""
+        for timer in self._update_timers.values():
+            self.frame.after_cancel(timer)
+        self._update_timers.clear()
+        scheduler = ThumbnailScheduler.for_widget(self.frame)
+        scheduler.cancel((id(self), 'start'))
+        scheduler.cancel((id(self), 'end'))
+    
+    def thumbnail_priority(self, field):
+        """
+        Get the scheduling priority for one of this row's thumbnails
+        
+        The field being edited comes first, then rows inside the visible
+        part of the editor list, then everything else.
+        """
+        if not self.bound:
+            return ThumbnailScheduler.PRIORITY_HIDDEN
+        entry = self.start_entry if field == 'start' else self.end_entry
+        try:
+            focused = self.frame.focus_get()
+        except KeyError:
+            # focus_get fails when focus is inside some Tk-internal widgets
+            focused = None
+        if focused is entry:
+            return ThumbnailScheduler.PRIORITY_EDITING
+        if self.is_visible():
+            return ThumbnailScheduler.PRIORITY_VISIBLE
+        return ThumbnailScheduler.PRIORITY_HIDDEN
+    
+    def is_visible(self):
+        """Check whether the row is inside the visible area of its scrolling canvas"""
+        if not self.frame.winfo_ismapped():
+            return False
+        
+        # Find the canvas that scrolls the editor list
+        canvas = self.frame.master
+        while canvas is not None and not isinstance(canvas, tk.Canvas):
+            canvas = canvas.master
+        if canvas is None:
+            return True
+        
+        top = self.frame.winfo_rooty() - canvas.winfo_rooty()
+        return top + self.frame.winfo_height() > 0 and top < canvas.winfo_height()
     
     def update_thumbnail_placeholder(self, field):
         """Show a placeholder when no thumbnail is available"""
+        # A placeholder supersedes any thumbnail still being extracted
+        ThumbnailScheduler.for_widget(self.frame).cancel((id(self), field))
+        if not self.bound:
+            return
+        
         placeholder = ThumbnailExtractor.create_placeholder(width=120, height=68)
         if placeholder:
-            if field == 'start':
-                self.start_thumbnail = placeholder
-                self.start_thumb_label.config(image=placeholder)
-            else:
-                self.end_thumbnail = placeholder
-                self.end_thumb_label.config(image=placeholder)
+            self._set_thumbnail(field, placeholder)
+            self._placeholder_fields.add(field)
     
-    def update_thumbnail(self, field):
-        """Update thumbnail for start or end time"""
-        # Get video path from editor
-        video_path = self.editor.file_path.get()
-        if not video_path:
-            self.update_thumbnail_placeholder(field)
+    def _set_thumbnail(self, field, photo):
+        """Show an image in the start or end thumbnail label"""
+        if not self.bound:
             return
+        if field == 'start':
+            self.start_thumbnail = photo
+            self.start_thumb_label.config(image=photo)
+        else:
+            self.end_thumbnail = photo
+            self.end_thumb_label.config(image=photo)
+        self._placeholder_fields.discard(field)
+    
+    def get_complete_time(self, field):
+        """
+        Get the time of a field if it is a complete, valid timestamp
         
-        # Get time value
+        Returns:
+            Time string, or None while the value is empty or partial (like "01:" or "01:2")
+        """
         time_var = self.start_var if field == 'start' else self.end_var
         time_str = time_var.get()
         
         # Validate time format before extracting
         if not time_str or not self.validate_time(time_str):
-            self.update_thumbnail_placeholder(field)
-            return
+            return None
         
         # Check if time has proper format (contains at least one colon)
         if ':' not in time_str:
-            self.update_thumbnail_placeholder(field)
-            return
+            return None
         
         # Check if time string is complete (not partial like "01:" or "01:2")
         parts = time_str.split(':')
         if len(parts) == 2:  # m:ss or mm:ss format
             if len(parts[0]) == 0 or len(parts[1]) < 2:
-                self.update_thumbnail_placeholder(field)
-                return
+                return None
         elif len(parts) == 3:  # h:mm:ss or hh:mm:ss format
             if len(parts[0]) == 0 or len(parts[1]) < 2 or len(parts[2]) < 2:
-                self.update_thumbnail_placeholder(field)
-                return
+                return None
         else:
+            return None
+        
+        return time_str
+    
+    def show_filmstrip_preview(self, field, video_path, time_str):
+        """
+        Show the nearest frame from the source's filmstrip, if one is loaded
+        
+        Returns:
+            True if the filmstrip frame is close enough that no exact frame is needed
+        """
+        strip = Filmstrip.cached(video_path)
+        if strip is None:
+            return False
+        
+        seconds = ThumbnailExtractor.time_to_seconds(time_str)
+        image, cell_time = strip.nearest(seconds)
+        self._set_thumbnail(field, ImageTk.PhotoImage(image))
+        return abs(cell_time - seconds) <= self.FILMSTRIP_TOLERANCE
+    
+    def apply_filmstrip_previews(self):
+        """Fill thumbnails that still show a placeholder from the newly loaded filmstrip"""
+        video_path = self.editor.file_path.get()
+        if not self.bound:
+            return
+        for field in list(self._placeholder_fields):
+            time_str = self.get_complete_time(field)
+            if video_path and time_str:
+                self.show_filmstrip_preview(field, video_path, time_str)
+    
+    def update_thumbnail(self, field):
+        """Update thumbnail for start or end time"""
+        if not self.bound:
+            return
+        
+        # Get video path from editor
+        video_path = self.editor.file_path.get()
+        if not video_path:
+            self.update_thumbnail_placeholder(field)
+            return
+        
+        time_str = self.get_complete_time(field)
+        if not time_str:
             self.update_thumbnail_placeholder(field)
             return
         
-        # Extract thumbnail in background thread
-        def extract_and_update():
-            thumbnail = ThumbnailExtractor.extract_thumbnail(video_path, time_str)
-            
-            # Update UI in main thread
+        # Serve a nearby frame from the filmstrip instantly; the exact frame
+        # is only extracted when the nearest cell is too far away
+        if self.show_filmstrip_preview(field, video_path, time_str):
+            ThumbnailScheduler.for_widget(self.frame).cancel((id(self), field))
+            return
+        
+        # Extract thumbnail on the shared scheduler; newer requests for this
+        # field replace older ones and the result arrives on the main thread
+        segment = self.segment
+        
+        def apply_thumbnail(thumbnail):
+            # The row may have been rebound to another entry in the meantime
+            if not self.frame.winfo_exists() or self.segment is not segment:
+                return
             if thumbnail:
-                if field == 'start':
-                    self.start_thumbnail = thumbnail
-                    self.start_thumb_label.config(image=thumbnail)
-                else:
-                    self.end_thumbnail = thumbnail
-                    self.end_thumb_label.config(image=thumbnail)
-            else:
+                self._set_thumbnail(field, thumbnail)
+            elif field in self._placeholder_fields or not Filmstrip.cached(video_path):
                 self.update_thumbnail_placeholder(field)
         
-        # Run in thread to avoid blocking UI
-        thread = threading.Thread(target=extract_and_update, daemon=True)
-        thread.start()
+        ThumbnailScheduler.for_widget(self.frame).request(
+            (id(self), field), video_path, time_str, apply_thumbnail,
+            priority=self.thumbnail_priority(field))
     
     def refresh_thumbnails(self):
         """Refresh both thumbnails (called when file changes)"""
@@ -252,12 +465,11 @@ class TimeSegmentRow:
     
     def on_start_enter(self, event):
         """Handle Enter key in start field - move to end field"""
-        self.end_entry.focus_set()
-        self.end_entry.select_range(0, tk.END)
+        self.focus_field('end')
         return 'break'  # Prevent default behavior
     
     def on_end_enter(self, event):
         """Handle Enter key in end field - move to next segment or create one"""
         # Ask editor to focus next segment or create new one
-        self.editor.focus_next_segment(self)
+        self.editor.focus_next_segment(self.segment)
         return 'break'  # Prevent default behavior
@@ -0,0 +1,89 @@
+import threading
+from collections import OrderedDict
+
+class UIDispatcher:
+    """
+    Coalescing, main-thread-safe dispatcher for widget updates
+
+    Worker threads post updates from any thread; a periodic drain on the Tk
+    main loop applies them in one batch at a bounded frame rate. Updates
+    posted under the same key replace each other, so a burst of progress
+    reports between two frames costs a single widget update.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, root, fps=20):
+        """
+        Initialize the UIDispatcher
+
+        Args:
+            root: Tk root window
+            fps: Maximum number of batches applied per second
+        """
+        self.root = root
+        self.interval_ms = max(1, int(1000 / fps))
+
+        self._lock = threading.Lock()
+        self._pending = OrderedDict()  # key -> latest update
+        self._calls = []  # updates that must all run (not coalesced)
+
+        self.root.after(self.interval_ms, self._drain)
+
+    @classmethod
+    def for_widget(cls, widget):
+        """
+        Get the application-wide dispatcher, creating it on first use
+
+        The first call must come from the Tk main thread.
+
+        Args:
+            widget: Any widget of the application (used to find the root window)
+
+        Returns:
+            UIDispatcher object
+        """
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(widget.winfo_toplevel())
+            return cls._instance
+
+    def post(self, key, func):
+        """
+        Queue an update that replaces any pending update with the same key
+
+        Args:
+            key: Hashable identifying the widget/state being updated
+            func: Function called without arguments on the main thread
+        """
+        with self._lock:
+            self._pending.pop(key, None)
+            self._pending[key] = func
+
+    def call(self, func):
+        """
+        Queue an update that always runs (e.g. dialogs), in posting order
+
+        Args:
+            func: Function called without arguments on the main thread
+        """
+        with self._lock:
+            self._calls.append(func)
+
+    def _drain(self):
+        """Apply everything queued since the last frame"""
+        # Reschedule first so a modal dialog opened by an update doesn't stall the drain
+        self.root.after(self.interval_ms, self._drain)
+
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+            calls = self._calls
+            self._calls = []
+
+        for func in pending + calls:
+            try:
+                func()
+            except Exception as e:
+                print(f"Error applying UI update: {e}")
@@ -1,24 +1,126 @@
 import subprocess
 import os
-import tempfile
+import shutil
+import threading
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, FIRST_EXCEPTION, wait
+from .smart_render import SmartRenderer, SmartRenderMismatch, SmartRenderPieceError
+from .chunked_encoder import ChunkedEncoder
+from .job_spec import MuxJob, EncoderSettings
+from .encode_telemetry import ProgressReader
+from .scratch_manager import ScratchManager
+from .incremental_render import IncrementalRenderer
+from .segment_cache import SegmentCache
+from .pipelined_encoder import PipelinedEncoder
+from .split_stream_encoder import SplitStreamEncoder
+from .segment_planner import SegmentPlanner
 
 class VideoMuxer:
     """Handles video cutting, concatenation, and compression"""
     
-    def __init__(self, progress_callback=None):
+    SPLIT_MODES = ('per_source', 'per_segment')
+    
+    def __init__(self, progress_callback=None, cut_workers=None, split_mode='per_source',
+                 encode_chunks=1, chunk_threads=None, core_budget=None, background=False,
+                 stats_callback=None, metrics_dir=None, scratch_dirs=None, segment_cache_bytes=None,
+                 pipeline_lookahead=0, split_streams=False, merge_segments='none'):
         """
         Initialize the VideoMuxer
         
         Args:
             progress_callback: Function to call with (value, text) for progress updates
+            cut_workers: Number of mkvmerge processes to run concurrently
+                         (None or 0 picks a default based on the CPU count)
+            split_mode: 'per_source' cuts all segments of a file in one mkvmerge run,
+                        'per_segment' runs mkvmerge once for every segment
+            encode_chunks: Number of keyframe-aligned chunks to encode as
+                           parallel ffmpeg processes (1 = single process)
+            chunk_threads: x265 thread pool size per chunk (None or 0 splits
+                           the CPU count evenly between the chunks)
+            core_budget: Number of CPU cores this job may use (None = all);
+                         limits cut workers and encoder threads
+            background: Run subprocesses at reduced CPU and I/O priority
+            stats_callback: Function to call with an EncodeProgress (fps, speed,
+                            bitrate, ETA, ...) whenever the encoder reports
+            metrics_dir: Directory for a JSON metrics record per job (None = off)
+            scratch_dirs: Preferred directories for intermediate files, fastest
+                          first (the temp and output directories are always candidates)
+            segment_cache_bytes: Size limit of the incremental export's segment cache
+                                 (None keeps the current limit)
+            pipeline_lookahead: Number of segments to cut ahead of a running
+                                single-process encode (0 = cut everything first with
+                                split_mode, the default)
+            split_streams: Encode video and each audio track in separate concurrent
+                           processes and mux them with mkvmerge
+            merge_segments: How the planner merges consecutive ranges of a source:
+                            'none' (the default), 'adjacent' or 'overlapping' (see SegmentPlanner)
         """
+        if split_mode not in self.SPLIT_MODES:
+            raise ValueError(f"Unknown split mode: {split_mode}")
+        if merge_segments not in SegmentPlanner.MERGE_MODES:
+            raise ValueError(f"Unknown merge mode: {merge_segments}")
+        
         self.progress_callback = progress_callback
+        self.stats_callback = stats_callback
+        self.metrics_dir = metrics_dir or None
+        self.segment_cache_bytes = segment_cache_bytes or None
+        self.scratch = ScratchManager(scratch_dirs, self.segment_cache_bytes)
+        self.pipeline_lookahead = max(0, pipeline_lookahead or 0)
+        self.split_streams = split_streams
+        self.merge_segments = merge_segments
+        self.core_budget = core_budget or None
+        self.background = background
+        self.cut_workers = cut_workers or self.default_cut_workers()
+        self.split_mode = split_mode
+        self.encode_chunks = max(1, encode_chunks or 1)
+        cores = self.core_budget or os.cpu_count() or 1
+        self.chunk_threads = chunk_threads or max(1, cores // self.encode_chunks)
+        if self.core_budget:
+            self.cut_workers = max(1, min(self.cut_workers, self.core_budget))
+        
+        # Encoder arguments for the compression step (set per job)
+        self.video_args = EncoderSettings().video_args()
+        self.audio_args = EncoderSettings().audio_args()
+        
+        # Subprocesses currently running, so a failure can kill its siblings
+        self._active_processes = set()
+        self._process_lock = threading.Lock()
+        self._cancel_event = threading.Event()
+        # Set by cancel(); stops the whole job, unlike the per-phase _cancel_event
+        self._job_cancelled = threading.Event()
+        
+        # Metrics of the current job (phase timings, final encoder stats)
+        self.metrics = {}
+    
+    @staticmethod
+    def default_cut_workers():
+        """
+        Get the default number of concurrent cutting processes
+        
+        mkvmerge cuts are mostly I/O bound, so a few workers are enough to
+        saturate a fast disk without starving the rest of the machine.
+        
+        Returns:
+            Worker count (at least 1)
+        """
+        return max(1, min(4, os.cpu_count() or 1))
     
     def update_progress(self, value, text):
         """Update progress if callback is provided"""
         if self.progress_callback:
             self.progress_callback(value, text)
     
+    def update_stats(self, stats):
+        """Report encoder telemetry to the progress bar and the stats callback"""
+        progress = min(stats.percent, 99)
+        summary = stats.summary()
+        self.update_progress(progress, f"Compressing video... {summary}" if summary else "Compressing video...")
+        if self.stats_callback:
+            self.stats_callback(stats)
+    
     def process_videos(self, editors, output_path):
         """
         Process videos: split, concatenate, and compress
@@ -30,154 +132,205 @@ class VideoMuxer:
         Returns:
             True if successful, raises Exception on error
         """
-        temp_dir = tempfile.mkdtemp()
+        return self.process_job(MuxJob.from_editors(editors, output_path))
+    
+    def process_job(self, job):
+        """
+        Render a MuxJob: split, concatenate, and compress
+        
+        Works without Tk, so it can run from the GUI or the headless CLI.
+        
+        Args:
+            job: MuxJob describing sources, segments, encoder and output
+            
+        Returns:
+            True if successful, raises Exception on error
+        """
+        self.metrics = {
+            'job': job.name or os.path.basename(job.output_path),
+            'output_path': job.output_path,
+            'export_mode': job.export_mode,
+            'profile': job.profile,
+            'video_args': job.encoder.video_args(),
+            'audio_args': job.encoder.audio_args(),
+            'timeline_seconds': job.total_duration(),
+            'core_budget': self.core_budget,
+            'started_at': datetime.now(timezone.utc).isoformat(),
+            'phases': {},
+        }
+        started = time.perf_counter()
+        try:
+            result = self._render_job(job)
+            self.metrics['status'] = 'ok'
+            return result
+        except Exception as e:
+            self.metrics['status'] = 'cancelled' if self._job_cancelled.is_set() else 'failed'
+            self.metrics['error'] = str(e)
+            raise
+        finally:
+            self.metrics['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+            if os.path.exists(job.output_path) and self.metrics.get('status') == 'ok':
+                self.metrics['output_bytes'] = os.path.getsize(job.output_path)
+            self._write_metrics()
+    
+    def plan_job(self, job):
+        """
+        Validate and optimize a job's segments without starting any process
+        
+        Args:
+            job: MuxJob to plan
+            
+        Returns:
+            SegmentPlan (its summary() is the dry-run report)
+        """
+        return SegmentPlanner(self, self.merge_segments).plan(job)
+    
+    def encode_strategy(self, job):
+        """
+        Decide how a job's timeline will be encoded
+        
+        Returns:
+            (chunked, pipelined) tuple
+        """
+        chunked = (self.encode_chunks > 1 and job.encoder.video_codec != 'copy'
+                   and job.export_mode != 'direct')
+        # Split-stream encodes read the timeline once per stream, which a FIFO can't serve
+        pipelined = (not chunked and not self.split_streams and job.export_mode != 'direct'
+                     and self.pipeline_lookahead > 0 and PipelinedEncoder.available())
+        return chunked, pipelined
+    
+    def cut_job_count(self, segments):
+        """
+        Count the mkvmerge runs that cutting the segments takes
+        
+        Args:
+            segments: List of distinct (source_idx, input_file, start, end) in concat order
+            
+        Returns:
+            Number of mkvmerge processes for the configured split mode
+        """
+        if self.split_mode == 'per_segment':
+            return len(segments)
+        return len(self._build_per_source_jobs(segments, ''))
+    
+    def _render_job(self, job):
+        """Run the export pipeline for a job (see process_job)"""
+        output_path = job.output_path
+        
+        # Every range is checked against the probed sources before anything runs
+        plan = self.plan_job(job)
+        self.metrics['plan'] = plan.to_dict()
+        print(plan.summary())
+        try:
+            plan.check()
+            job = plan.job
+            job.validate()
+        except ValueError as e:
+            raise Exception(str(e))
+        
+        self.video_args = job.encoder.video_args()
+        self.audio_args = job.encoder.audio_args()
+        
+        # Fails before any work if no scratch location has room for the intermediates
+        chunked, pipelined = self.encode_strategy(job)
+        temp_dir, scratch_bytes = self.scratch.allocate(
+            job, chunked, lookahead=self.pipeline_lookahead if pipelined else 0,
+            split_streams=self.split_streams and not chunked)
+        self.metrics['scratch_dir'] = temp_dir
+        self.metrics['scratch_estimate_bytes'] = scratch_bytes
         segment_files = []
         concat_file = None
         
         try:
-            # Count total segments for progress calculation
-            total_segments = 0
-            for editor in editors:
-                if editor.file_path.get() and os.path.exists(editor.file_path.get()):
-                    total_segments += len(editor.segments)
-            
-            if total_segments == 0:
-                raise Exception("No valid segments to process")
-            
-            # Step 1: Split videos using mkvmerge (0-100% of cutting phase)
-            self.update_progress(0, "Starting video cutting...")
-            current_segment = 0
-            
-            for editor_idx, editor in enumerate(editors):
-                input_file = editor.file_path.get()
-                if not input_file or not os.path.exists(input_file):
-                    continue
-                
-                for seg_idx, segment in enumerate(editor.segments):
-                    start_time = segment.start_var.get()
-                    end_time = segment.end_var.get()
-                    
-                    if not start_time or not end_time:
-                        continue
-                    
-                    # Convert time format to seconds for mkvmerge
-                    start_seconds = self.time_to_seconds(start_time)
-                    end_seconds = self.time_to_seconds(end_time)
-                    
-                    output_segment = os.path.join(temp_dir, f"segment_{editor_idx}_{seg_idx}.mkv")
-                    
-                    # Update progress for this segment
-                    progress = int((current_segment / total_segments) * 100)
-                    self.update_progress(progress, f"Cutting segment {current_segment + 1}/{total_segments}...")
-                    
-                    # Use mkvmerge to split with timestamp format
-                    # Format: --split parts:START-END where times are in format HH:MM:SS.nnnnnnnnn or seconds
-                    cmd = [
-                        'mkvmerge',
-                        '-o', output_segment,
-                        '--split', f'parts:{start_seconds}s-{end_seconds}s',
-                        input_file
-                    ]
-                    
-                    result = subprocess.run(cmd, capture_output=True, text=True)
-                    if result.returncode == 0 or result.returncode == 1:  # mkvmerge returns 1 for warnings
-                        segment_files.append(output_segment)
-                        current_segment += 1
-                    else:
-                        raise Exception(f"mkvmerge error (cmd: {' '.join(cmd)}): {result.stderr}")
-            
-            if not segment_files:
-                raise Exception("No segments were created")
-            
-            # Cutting complete
-            self.update_progress(100, f"Cutting complete! Created {len(segment_files)} segments")
+            segments = job.segment_list()
+            
+            if job.export_mode == 'smart':
+                renderer = SmartRenderer(self)
+                supported, reason = renderer.check_support(segments)
+                if supported:
+                    try:
+                        with self.phase('smart_render'):
+                            renderer.render(segments, output_path, temp_dir)
+                        self.update_progress(100, "Complete!")
+                        return True
+                    except (SmartRenderMismatch, SmartRenderPieceError) as e:
+                        if self._job_cancelled.is_set():
+                            raise Exception("Job cancelled")
+                        reason = str(e)
+                print(f"Smart render not possible ({reason}), falling back to full re-encode")
+                self.update_progress(0, f"Smart render unavailable ({reason}), re-encoding...")
+            
+            if job.export_mode == 'incremental':
+                renderer = IncrementalRenderer(self, SegmentCache.shared(self.segment_cache_bytes))
+                supported, reason = renderer.check_support(job.encoder)
+                if supported:
+                    with self.phase('incremental_render'):
+                        self.metrics['segment_cache'] = renderer.render(segments, output_path, temp_dir)
+                    self.update_progress(100, "Complete!")
+                    return True
+                print(f"Incremental render not possible ({reason}), falling back to full re-encode")
+                self.update_progress(0, f"Incremental render unavailable ({reason}), re-encoding...")
             
             # Calculate total duration from segments
-            total_duration_seconds = 0
-            for editor in editors:
-                if editor.file_path.get() and os.path.exists(editor.file_path.get()):
-                    for segment in editor.segments:
-                        start_time = segment.start_var.get()
-                        end_time = segment.end_var.get()
-                        if start_time and end_time:
-                            start_seconds = self.time_to_seconds(start_time)
-                            end_seconds = self.time_to_seconds(end_time)
-                            segment_duration = end_seconds - start_seconds
-                            total_duration_seconds += segment_duration
+            total_duration_seconds = sum(end - start for _, _, start, end in segments)
             
-            print(f"Calculated total duration: {total_duration_seconds}s")
+            video_args = self.video_args
+            if self.core_budget:
+                video_args = self.thread_limited_video_args(video_args, self.core_budget)
+            
+            if pipelined:
+                # Segments are cut while earlier ones are already being encoded
+                self.update_progress(0, f"Cutting and compressing {len(segments)} segments "
+                                        f"(look-ahead {self.pipeline_lookahead})...")
+                with self.phase('pipeline'):
+                    stats = PipelinedEncoder(self, self.pipeline_lookahead).encode(
+                        segments, output_path, video_args, total_duration_seconds, temp_dir)
+                self.metrics['encode'] = stats.to_dict()
+                self.update_progress(100, "Complete!")
+                return True
+            
+            if job.export_mode == 'direct':
+                # ffmpeg reads the ranges straight from the sources: no cutting, no intermediates
+                concat_file = self._write_direct_concat_list(segments, temp_dir)
+            else:
+                concat_file = self._cut_to_concat_list(segments, temp_dir, segment_files)
             
-            # Step 2: Create concat file for ffmpeg
-            concat_file = os.path.join(temp_dir, 'concat.txt')
-            with open(concat_file, 'w') as f:
-                for seg_file in segment_files:
-                    f.write(f"file '{seg_file}'\n")
+            print(f"Calculated total duration: {total_duration_seconds}s")
             
             # Step 3: Concatenate and compress using ffmpeg (0-100% of compression phase)
             self.update_progress(0, f"Starting compression (total: {int(total_duration_seconds)}s)...")
             
+            # Chunks are split from a stream copy of the timeline, which can't honour
+            # the direct list's inpoints, so direct exports always use one encoder
+            if chunked:
+                with self.phase('encode'):
+                    ChunkedEncoder(self, self.encode_chunks, self.chunk_threads).encode(
+                        concat_file, output_path, total_duration_seconds, temp_dir)
+                self.update_progress(100, "Complete!")
+                return True
+            
+            if self.split_streams:
+                with self.phase('encode'):
+                    self.metrics['av_sync'] = SplitStreamEncoder(self).encode(
+                        concat_file, segments, output_path, video_args, total_duration_seconds, temp_dir)
+                self.update_progress(100, "Complete!")
+                return True
+            
             cmd = [
                 'ffmpeg',
                 '-f', 'concat',
                 '-safe', '0',
                 '-i', concat_file,
-                '-c:v', 'libx265',
-                '-preset', 'medium',
-                '-crf', '23',
-                '-c:a', 'libvorbis',
-                '-q:a', '5',
+                *video_args,
+                *self.audio_args,
                 '-y',
                 output_path
             ]
             
-            # Start ffmpeg process
-            process = subprocess.Popen(cmd, stderr=subprocess.STDOUT, stdout=subprocess.PIPE, 
-                                      text=True, bufsize=1)
-            
-            # Use calculated duration instead of waiting for ffmpeg
-            duration_seconds = total_duration_seconds if total_duration_seconds > 0 else None
-            last_progress = 0
-            
-            # Read stdout line by line (stderr is redirected to stdout)
-            for line in iter(process.stdout.readline, ''):
-                if not line:
-                    break
-                
-                line = line.strip()
-                print(f"FFMPEG: {line}")  # Print to console for debugging
-                
-                # Track progress using time= format
-                if 'time=' in line and duration_seconds:
-                    try:
-                        # Find time= in the line
-                        time_idx = line.find('time=')
-                        if time_idx >= 0:
-                            # Extract time string (format: time=00:00:10.50)
-                            time_part = line[time_idx+5:]
-                            time_str = time_part.split()[0]
-                            
-                            # Parse time
-                            time_parts = time_str.split(':')
-                            if len(time_parts) == 3:
-                                h = int(time_parts[0])
-                                m = int(time_parts[1])
-                                s = float(time_parts[2])
-                                current_seconds = h * 3600 + m * 60 + s
-                                
-                                if duration_seconds > 0:
-                                    progress = min(int((current_seconds / duration_seconds) * 100), 99)
-                                    if progress > last_progress:
-                                        self.update_progress(progress, f"Compressing video...")
-                                        last_progress = progress
-                                        print(f"Progress: {progress}% ({current_seconds:.1f}/{duration_seconds}s)")
-                    except Exception as e:
-                        print(f"Error parsing time: {e} from line: {line}")
-            
-            process.stdout.close()
-            process.wait()
-            
-            if process.returncode != 0:
-                raise Exception(f"ffmpeg error: return code {process.returncode}")
+            with self.phase('encode'):
+                stats = self.run_ffmpeg_with_progress(cmd, total_duration_seconds,
+                                                      os.path.join(temp_dir, 'ffmpeg.log'))
+            self.metrics['encode'] = stats.to_dict()
             
             self.update_progress(100, "Complete!")
             return True
@@ -186,6 +339,397 @@ class VideoMuxer:
             # Cleanup temp files
             self._cleanup(segment_files, concat_file, temp_dir)
     
+    def _cut_to_concat_list(self, segments, temp_dir, segment_files):
+        """
+        Cut the segments with mkvmerge and list them for the concat demuxer
+        
+        Args:
+            segments: List of (source_idx, input_file, start, end) in concat order
+            temp_dir: Directory for the cut segments
+            segment_files: List that receives the cut segment paths (for cleanup)
+            
+        Returns:
+            Path of the concat list
+        """
+        # Step 1: Split videos using mkvmerge (0-100% of cutting phase)
+        self.update_progress(0, "Starting video cutting...")
+        
+        # Repeated ranges are cut once and listed again in the concat file
+        unique, concat_map = SegmentPlanner.dedupe(segments)
+        if self.split_mode == 'per_segment':
+            cut_jobs = self._build_per_segment_jobs(unique, temp_dir)
+            # Start the cuts in file order so each source is read front to back
+            cut_jobs = [cut_jobs[idx] for idx in SegmentPlanner.read_order(unique)]
+        else:
+            cut_jobs = self._build_per_source_jobs(unique, temp_dir)
+        
+        # Outputs are registered up front so a failed job still gets cleaned up
+        segment_files.extend(self._ordered_outputs(cut_jobs))
+        
+        # Run the cuts concurrently; segment_files stays in concat order
+        with self.phase('cut'):
+            self._run_cut_jobs(cut_jobs)
+        
+        missing = [seg_file for seg_file in segment_files if not os.path.exists(seg_file)]
+        if missing:
+            raise Exception(f"mkvmerge did not create expected segment(s): {', '.join(missing)}")
+        
+        if not segment_files:
+            raise Exception("No segments were created")
+        
+        # Cutting complete
+        self.update_progress(100, f"Cutting complete! Created {len(segment_files)} segments")
+        
+        # Step 2: Create concat file for ffmpeg
+        concat_file = os.path.join(temp_dir, 'concat.txt')
+        with open(concat_file, 'w') as f:
+            for unique_idx in concat_map:
+                f.write(f"file {self.concat_quote(segment_files[unique_idx])}\n")
+        return concat_file
+    
+    def _write_direct_concat_list(self, segments, temp_dir):
+        """
+        List the segment ranges of the original sources for the concat demuxer
+        
+        Each entry uses inpoint/outpoint directives, so ffmpeg decodes
+        straight from the sources in a single pass. The ranges are frame
+        accurate because the timeline is re-encoded (MuxJob.validate rejects
+        direct exports with a 'copy' video codec).
+        
+        Args:
+            segments: List of (source_idx, input_file, start, end) in concat order
+            temp_dir: Directory for the concat list
+            
+        Returns:
+            Path of the concat list
+        """
+        concat_file = os.path.join(temp_dir, 'concat.txt')
+        with open(concat_file, 'w') as f:
+            f.write("ffconcat version 1.0\n")
+            for _, input_file, start_seconds, end_seconds in segments:
+                f.write(f"file {self.concat_quote(os.path.abspath(input_file))}\n")
+                f.write(f"inpoint {start_seconds:.6f}\n")
+                f.write(f"outpoint {end_seconds:.6f}\n")
+        self.update_progress(100, f"Listed {len(segments)} segments for direct export")
+        return concat_file
+    
+    @staticmethod
+    def concat_quote(path):
+        """Quote a path for an ffmpeg concat list"""
+        return "'" + path.replace("'", "'\\''") + "'"
+    
+    def run_ffmpeg_with_progress(self, cmd, total_duration, log_path, callback=None):
+        """
+        Run an ffmpeg command, reading telemetry from its -progress stream
+        
+        ffmpeg's log goes to log_path, so the progress stream on stdout stays
+        machine-readable and the log tail can be reported on failure.
+        
+        Args:
+            cmd: ffmpeg command line (progress arguments are added)
+            total_duration: Expected output duration in seconds
+            log_path: File for ffmpeg's own log output
+            callback: Function called with each EncodeProgress
+                      (defaults to update_stats)
+            
+        Returns:
+            Final EncodeProgress snapshot
+        """
+        cmd = [cmd[0], *ProgressReader.ARGS, *cmd[1:]]
+        reader = ProgressReader(total_duration if total_duration > 0 else None,
+                                callback or self.update_stats)
+        
+        with open(log_path, 'w') as log_file:
+            process = self.popen(cmd, stdout=subprocess.PIPE, stderr=log_file, text=True, bufsize=1)
+            try:
+                stats = reader.read(process.stdout)
+                process.stdout.close()
+                process.wait()
+            finally:
+                self.release(process)
+        
+        if self._job_cancelled.is_set():
+            raise Exception("Job cancelled")
+        if process.returncode != 0:
+            with open(log_path, 'r', errors='replace') as log_file:
+                tail = log_file.read()[-2000:].strip()
+            raise Exception(f"ffmpeg error (return code {process.returncode}): {tail}")
+        return stats
+    
+    @contextmanager
+    def phase(self, name):
+        """Time a pipeline phase into the job metrics (use with `with`)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            phases = self.metrics.setdefault('phases', {})
+            phases[name] = round(phases.get(name, 0) + time.perf_counter() - started, 3)
+    
+    def _write_metrics(self):
+        """Write the metrics record of the current job to metrics_dir"""
+        if not self.metrics_dir:
+            return
+        self.metrics['finished_at'] = datetime.now(timezone.utc).isoformat()
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')
+        name = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in self.metrics['job'])
+        try:
+            os.makedirs(self.metrics_dir, exist_ok=True)
+            path = os.path.join(self.metrics_dir, f'{name}.{stamp}.metrics.json')
+            with open(path, 'w') as f:
+                json.dump(self.metrics, f, indent=4)
+        except OSError as e:
+            print(f"Warning: Could not write job metrics: {e}")
+    
+    def _build_per_segment_jobs(self, segments, temp_dir):
+        """
+        Build one mkvmerge job per segment
+        
+        Args:
+            segments: List of (source_idx, input_file, start, end) in concat order
+            temp_dir: Directory for the cut segments
+            
+        Returns:
+            List of (cmd, [(order_idx, output_path)]) cut jobs
+        """
+        cut_jobs = []
+        for order_idx, (source_idx, input_file, start_seconds, end_seconds) in enumerate(segments):
+            output_segment = os.path.join(temp_dir, f"segment_{source_idx}_{order_idx}.mkv")
+            
+            # Use mkvmerge to split with timestamp format
+            # Format: --split parts:START-END where times are in format HH:MM:SS.nnnnnnnnn or seconds
+            cmd = [
+                'mkvmerge',
+                '-o', output_segment,
+                '--split', f'parts:{self._mkv_time(start_seconds)}-{self._mkv_time(end_seconds)}',
+                input_file
+            ]
+            cut_jobs.append((cmd, [(order_idx, output_segment)]))
+        return cut_jobs
+    
+    def _build_per_source_jobs(self, segments, temp_dir):
+        """
+        Build as few mkvmerge jobs as possible by cutting many ranges per run
+        
+        All segments of a source go into a single --split parts:a-b,c-d,...
+        run so the container is only parsed once. mkvmerge needs the ranges in
+        ascending, non-overlapping order, so overlapping segments are spread
+        over additional runs of the same source.
+        
+        Args:
+            segments: List of (source_idx, input_file, start, end) in concat order
+            temp_dir: Directory for the cut segments
+            
+        Returns:
+            List of (cmd, [(order_idx, output_path)]) cut jobs
+        """
+        # Group by source, remembering each segment's position in the concat order
+        by_source = {}
+        for order_idx, (_, input_file, start_seconds, end_seconds) in enumerate(segments):
+            by_source.setdefault(input_file, []).append((start_seconds, end_seconds, order_idx))
+        
+        cut_jobs = []
+        for source_idx, (input_file, ranges) in enumerate(by_source.items()):
+            # Greedily pack the sorted ranges into runs mkvmerge accepts
+            runs = []
+            for start_seconds, end_seconds, order_idx in sorted(ranges):
+                for run in runs:
+                    if start_seconds >= run[-1][1]:
+                        run.append((start_seconds, end_seconds, order_idx))
+                        break
+                else:
+                    runs.append([(start_seconds, end_seconds, order_idx)])
+            
+            for run_idx, run in enumerate(runs):
+                # mkvmerge numbers split outputs through the printf-style %03d
+                output_pattern = os.path.join(temp_dir, f"source_{source_idx}_{run_idx}-%03d.mkv")
+                parts = ','.join(f'{self._mkv_time(start)}-{self._mkv_time(end)}' for start, end, _ in run)
+                cmd = [
+                    'mkvmerge',
+                    '-o', output_pattern,
+                    '--split', f'parts:{parts}',
+                    input_file
+                ]
+                outputs = [(order_idx, output_pattern % (part_idx + 1))
+                           for part_idx, (_, _, order_idx) in enumerate(run)]
+                cut_jobs.append((cmd, outputs))
+        return cut_jobs
+    
+    @staticmethod
+    def thread_limited_video_args(video_args, threads):
+        """
+        Limit video encoder arguments to a number of threads
+        
+        Args:
+            video_args: ffmpeg video encoder arguments
+            threads: Thread budget for the encoder
+            
+        Returns:
+            New argument list
+        """
+        args = list(video_args)
+        if 'copy' in args:
+            return args
+        if 'libx265' in args:
+            frame_threads = max(1, min(4, threads // 4))
+            args += ['-x265-params', f'pools={threads}:frame-threads={frame_threads}']
+        else:
+            args += ['-threads', str(threads)]
+        return args
+    
+    @staticmethod
+    def _mkv_time(seconds):
+        """Format seconds for mkvmerge's --split parts: option (e.g. 12s, 12.5s)"""
+        return f'{seconds:.3f}'.rstrip('0').rstrip('.') + 's'
+    
+    @staticmethod
+    def _ordered_outputs(cut_jobs):
+        """
+        Map the outputs of all cut jobs back into concat order
+        
+        Args:
+            cut_jobs: List of (cmd, [(order_idx, output_path)]) cut jobs
+            
+        Returns:
+            List of output paths sorted by concat position
+        """
+        outputs = [output for _, job_outputs in cut_jobs for output in job_outputs]
+        return [output_path for _, output_path in sorted(outputs)]
+    
+    def _run_cut_jobs(self, cut_jobs):
+        """
+        Run mkvmerge cut jobs on a bounded pool of worker threads
+        
+        Each worker drives one mkvmerge process at a time. If any cut fails,
+        the remaining processes are killed and pending jobs are cancelled.
+        
+        Args:
+            cut_jobs: List of (cmd, [(order_idx, output_path)]) cut jobs
+        """
+        if not cut_jobs:
+            return
+        
+        total = sum(len(outputs) for _, outputs in cut_jobs)
+        workers = min(self.cut_workers, len(cut_jobs))
+        completed = 0
+        self._cancel_event.clear()
+        self.update_progress(0, f"Cutting {total} segments with {len(cut_jobs)} mkvmerge runs "
+                                f"({workers} parallel)...")
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(self._run_cut, cmd): len(outputs) for cmd, outputs in cut_jobs}
+            pending = set(futures)
+            
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_EXCEPTION)
+                for future in done:
+                    error = future.exception()
+                    if error is not None:
+                        # Fail fast: stop queued jobs and kill running siblings
+                        self._cancel_event.set()
+                        for other in pending:
+                            other.cancel()
+                        self.kill_active_processes()
+                        raise error
+                    completed += futures[future]
+                
+                progress = int((completed / total) * 100)
+                self.update_progress(progress, f"Cutting segment {completed}/{total}...")
+    
+    def _run_cut(self, cmd):
+        """
+        Run a single mkvmerge command (called from a worker thread)
+        
+        Args:
+            cmd: mkvmerge command line
+        """
+        if self._cancel_event.is_set():
+            raise Exception("Cutting cancelled")
+        
+        returncode, stdout, stderr = self.run_command(cmd)
+        
+        if self._cancel_event.is_set():
+            raise Exception("Cutting cancelled")
+        if returncode not in (0, 1):  # mkvmerge returns 1 for warnings
+            raise Exception(f"mkvmerge error (cmd: {' '.join(cmd)}): {stderr or stdout}")
+    
+    def run_command(self, cmd):
+        """
+        Run a command to completion while tracking it for fail-fast kills
+        
+        Args:
+            cmd: Command line as a list
+            
+        Returns:
+            (returncode, stdout, stderr) tuple
+        """
+        process = self.popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        try:
+            stdout, stderr = process.communicate()
+        finally:
+            self.release(process)
+        return process.returncode, stdout, stderr
+    
+    def popen(self, cmd, **kwargs):
+        """
+        Start a subprocess and track it so a failure elsewhere can kill it
+        
+        Args:
+            cmd: Command line as a list
+            **kwargs: Passed on to subprocess.Popen
+            
+        Returns:
+            subprocess.Popen object; call release() once it has finished
+        """
+        if self._job_cancelled.is_set():
+            raise Exception("Job cancelled")
+        if self.background:
+            cmd = self.background_prefix() + list(cmd)
+        process = subprocess.Popen(cmd, **kwargs)
+        with self._process_lock:
+            self._active_processes.add(process)
+        return process
+    
+    @staticmethod
+    def background_prefix():
+        """
+        Get the command prefix that runs a process at background priority
+        
+        nice and ionice exec the wrapped command, so the Popen pid stays the
+        encoder's pid and kill_active_processes() still reaches it.
+        
+        Returns:
+            Command prefix list (empty if the tools are not installed)
+        """
+        prefix = []
+        if shutil.which('nice'):
+            prefix += ['nice', '-n', '10']
+        if shutil.which('ionice'):
+            # Idle I/O class: only gets disk time nobody else wants
+            prefix += ['ionice', '-c', '3']
+        return prefix
+    
+    def release(self, process):
+        """Stop tracking a finished subprocess"""
+        with self._process_lock:
+            self._active_processes.discard(process)
+    
+    def cancel(self):
+        """Abort the running job: kill its processes and refuse to start new ones"""
+        self._job_cancelled.set()
+        self._cancel_event.set()
+        self.kill_active_processes()
+    
+    def kill_active_processes(self):
+        """Kill every subprocess still running for this muxer"""
+        with self._process_lock:
+            processes = list(self._active_processes)
+        for process in processes:
+            try:
+                process.kill()
+            except OSError:
+                pass
+    
     def _cleanup(self, segment_files, concat_file, temp_dir):
         """Clean up temporary files and directory"""
         try:
@@ -194,8 +738,8 @@ class VideoMuxer:
                     os.remove(seg_file)
             if concat_file and os.path.exists(concat_file):
                 os.remove(concat_file)
-            if os.path.exists(temp_dir):
-                os.rmdir(temp_dir)
+            # Export strategies may leave their own intermediates behind
+            self.scratch.release(temp_dir)
         except Exception as e:
             # Silent cleanup failure - not critical
             pass